@@ -0,0 +1,121 @@
+"""
+AI 서버 성능 측정 도구
+
+네트워크 없이 한 프로세스 안에서 분석 경로의 단계별 마이크로벤치마크와 /analyze/safety
+부하 테스트를 실행하고, 처리량과 p50/p99 지연 시간을 JSON 결과 파일로 저장합니다.
+두 결과 파일을 비교하여 성능 저하를 찾을 수 있습니다 (저하가 있으면 종료 코드 1).
+
+추론 엔진, 마이크로 배칭, 캐시 등은 서버와 같은 환경 변수로 바꿔 측정합니다.
+서버 로그는 측정에 영향을 주지 않도록 기본적으로 WARNING 이상만 출력합니다.
+
+사용 예:
+    python benchmark.py run --output benchmarks/results/baseline.json
+    RESULT_CACHE_SIZE=0 python benchmark.py run --only load --concurrency 64 --requests 20000
+    python benchmark.py compare benchmarks/results/baseline.json benchmarks/results/current.json
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from benchmarks.results import (
+    build_report, compare_reports, format_comparison, format_table, load_report, save_report
+)
+
+logger = logging.getLogger("benchmark")
+
+
+async def run_benchmarks(args) -> dict:
+    # main은 로깅 설정과 분석기 생성을 포함하므로 환경 변수 적용 후 여기서 import
+    import main
+    from benchmarks.load import run_load
+    from benchmarks.micro import run_microbenchmarks
+    from benchmarks.synthetic import synthetic_requests
+
+    logging.getLogger().setLevel(args.log_level)
+    payloads = synthetic_requests(args.users, seed=args.seed)
+    results = {}
+
+    # 서버와 같은 lifespan(모델 로드, 백그라운드 작업)으로 실행
+    async with main.app.router.lifespan_context(main.app):
+        if args.only in (None, "micro"):
+            logger.warning("⏱️ 마이크로벤치마크 실행 중...")
+            results.update(await run_microbenchmarks(
+                main.safety_analyzer, payloads, main.FastJSONResponse, min_time=args.min_time
+            ))
+        if args.only in (None, "load"):
+            for concurrency in args.concurrency:
+                logger.warning(f"🚀 부하 테스트 실행 중: 동시 요청 {concurrency}")
+                # 이전 단계의 캐시 결과가 측정에 섞이지 않도록 매번 비운 상태에서 시작
+                if main.safety_analyzer.result_cache is not None:
+                    main.safety_analyzer.result_cache.clear()
+                results[f"load.analyze_safety.c{concurrency}"] = await run_load(
+                    main.app,
+                    payloads,
+                    concurrency=concurrency,
+                    total_requests=args.requests,
+                    duration=args.duration
+                )
+
+    config = {
+        "users": args.users,
+        "seed": args.seed,
+        "requests": args.requests,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "min_time": args.min_time
+    }
+    return build_report(config, results)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AI 서버 성능 측정")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="벤치마크 실행")
+    run_parser.add_argument("--only", choices=["micro", "load"], help="일부만 실행")
+    run_parser.add_argument("--users", type=int, default=10000, help="합성 사용자 수")
+    run_parser.add_argument("--seed", type=int, default=42, help="합성 데이터 seed")
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32], help="부하 테스트 동시 요청 수 (여러 개 가능)")
+    run_parser.add_argument("--requests", type=int, default=5000, help="동시 요청 수별 전체 요청 수")
+    run_parser.add_argument("--duration", type=float, help="요청 수 대신 실행 시간(초)으로 부하 테스트")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="마이크로벤치마크별 최소 측정 시간(초)")
+    run_parser.add_argument("--output", help="결과 JSON 파일")
+    run_parser.add_argument("--log-level", default="WARNING", help="서버 로그 수준")
+
+    compare_parser = subparsers.add_parser("compare", help="두 결과 비교")
+    compare_parser.add_argument("baseline", help="기준 결과 파일")
+    compare_parser.add_argument("current", help="비교할 결과 파일")
+    compare_parser.add_argument("--tolerance", type=float, default=0.15, help="허용 저하 비율 (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    if args.command == "compare":
+        try:
+            baseline = load_report(args.baseline)
+            current = load_report(args.current)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ 결과 파일 읽기 실패: {str(e)}")
+            return 1
+        comparable = ("python", "platform", "cpu_count", "numpy", "sklearn", "settings")
+        if any(baseline["environment"].get(key) != current["environment"].get(key) for key in comparable):
+            logger.warning("⚠️ 실행 환경이 다른 결과입니다 (environment 항목 확인)")
+        rows = compare_reports(baseline, current, args.tolerance)
+        print(format_comparison(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    report = asyncio.run(run_benchmarks(args))
+    print(format_table(report["results"]))
+    if args.output:
+        save_report(report, args.output)
+        logger.warning(f"✅ 결과 저장 완료: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
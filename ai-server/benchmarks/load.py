@@ -0,0 +1,67 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .results import summarize
+
+
+async def run_load(
+    app,
+    payloads: List[Dict[str, Any]],
+    concurrency: int = 32,
+    total_requests: int = 5000,
+    duration: Optional[float] = None,
+    warmup_requests: int = 200,
+    path: str = "/analyze/safety"
+) -> Dict[str, Any]:
+    """프로세스 안에서 ASGI 앱에 동시 요청을 보내 처리량과 지연 시간 측정
+
+    네트워크/소켓을 거치지 않으므로 서버 처리 비용(검증, 분석, 직렬화, 미들웨어)만
+    측정된다. concurrency개의 클라이언트가 각자 응답을 받은 즉시 다음 요청을 보내며,
+    duration이 주어지면 요청 수 대신 시간으로 끝낸다. 호출 전에 앱의 lifespan이
+    실행되어 있어야 한다.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for i in range(warmup_requests):
+            await client.post(path, json=payloads[i % len(payloads)])
+
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        next_index = 0
+        clock = time.perf_counter
+        start = clock()
+        deadline = start + duration if duration else None
+
+        async def worker():
+            nonlocal next_index
+            while True:
+                if deadline is not None:
+                    if clock() >= deadline:
+                        return
+                elif next_index >= total_requests:
+                    return
+                index = next_index
+                next_index += 1
+                request_start = clock()
+                try:
+                    response = await client.post(path, json=payloads[index % len(payloads)])
+                    statuses[response.status_code] += 1
+                except Exception as e:
+                    statuses[type(e).__name__] += 1
+                    continue
+                latencies.append(clock() - request_start)
+                # 응답이 대기 없이 끝나는 경우(캐시 적중 등)에도 다른 클라이언트가 실행되도록 양보
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = clock() - start
+
+    errors = sum(count for status, count in statuses.items() if status != 200)
+    result = summarize(latencies, elapsed, errors)
+    result["concurrency"] = concurrency
+    result["status_counts"] = {str(status): count for status, count in statuses.items()}
+    return result
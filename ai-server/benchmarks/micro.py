@@ -0,0 +1,78 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from src.models.schemas import SafetyAnalysisRequest
+from .results import summarize
+
+
+def _measure(fn: Callable[[int], Any], min_time: float, min_calls: int) -> Dict[str, Any]:
+    """fn(i)를 min_time초 이상, min_calls회 이상 반복하며 건별 시간 측정"""
+    latencies: List[float] = []
+    clock = time.perf_counter
+    start = clock()
+    i = 0
+    while i < min_calls or clock() - start < min_time:
+        call_start = clock()
+        fn(i)
+        latencies.append(clock() - call_start)
+        i += 1
+    return summarize(latencies, clock() - start)
+
+
+async def _measure_async(fn: Callable[[int], Awaitable[Any]], min_time: float, min_calls: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    clock = time.perf_counter
+    start = clock()
+    i = 0
+    while i < min_calls or clock() - start < min_time:
+        call_start = clock()
+        await fn(i)
+        latencies.append(clock() - call_start)
+        i += 1
+    return summarize(latencies, clock() - start)
+
+
+async def run_microbenchmarks(
+    analyzer,
+    payloads: List[Dict[str, Any]],
+    response_class,
+    min_time: float = 1.0,
+    min_calls: int = 200
+) -> Dict[str, Dict[str, Any]]:
+    """분석 경로 단계별 마이크로벤치마크 (초기화된 analyzer 필요)
+
+    - extract_features: 요청 -> 특성 (위치 이력/기준 패턴 조회 포함)
+    - rule_based_analysis: 규칙 기반 위험도
+    - predict_with_model: 단건 모델 예측 (마이크로 배칭 대기 시간 포함)
+    - predict_batch_64: 64건 일괄 모델 예측 (건당이 아닌 호출당 시간)
+    - serialize_response: 분석 응답 -> JSON 응답 본문
+    """
+    requests = [SafetyAnalysisRequest(**payload) for payload in payloads]
+    features = [analyzer._extract_features(request) for request in requests]
+    n = len(requests)
+    results = {}
+
+    results["micro.extract_features"] = _measure(
+        lambda i: analyzer._extract_features(requests[i % n]), min_time, min_calls
+    )
+    results["micro.rule_based_analysis"] = _measure(
+        lambda i: analyzer._rule_based_analysis(features[i % n]), min_time, min_calls
+    )
+
+    if analyzer._has_model():
+        results["micro.predict_with_model"] = await _measure_async(
+            lambda i: analyzer._predict_with_model(features[i % n]), min_time, min_calls
+        )
+        batches = [features[start:start + 64] for start in range(0, max(n - 63, 1), 64)]
+        results["micro.predict_batch_64"] = await _measure_async(
+            lambda i: analyzer._predict_batch_with_model(batches[i % len(batches)]), min_time, min_calls // 10
+        )
+
+    responses = [
+        analyzer._build_response(analyzer._store_assessment(None, 3.33, 0.9, "bench", feature), feature, 0.001)
+        for feature in features[:64]
+    ]
+    results["micro.serialize_response"] = _measure(
+        lambda i: response_class(responses[i % len(responses)].model_dump()).body, min_time, min_calls
+    )
+    return results
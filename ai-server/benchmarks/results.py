@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import settings
+
+# 결과 파일 구조가 바뀌면 올림
+RESULTS_FORMAT = 1
+
+# 비교 시 값이 클수록 좋은 지표와 작을수록 좋은 지표
+HIGHER_IS_BETTER = ("throughput_per_s",)
+LOWER_IS_BETTER = ("p50_ms", "p99_ms")
+
+# 결과에 기록하는 성능 관련 설정 (환경 변수로 바꿀 수 있는 값)
+RECORDED_SETTINGS = (
+    "INFERENCE_ENGINE", "INFERENCE_WORKERS", "MICRO_BATCH_ENABLED", "MICRO_BATCH_MAX_SIZE",
+    "MICRO_BATCH_MAX_WAIT_MS", "RESULT_CACHE_SIZE", "BASELINE_STORAGE"
+)
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """건별 지연 시간(초) 목록과 전체 경과 시간으로 처리량/백분위 요약"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    if len(values) == 0:
+        return {"count": 0, "errors": errors, "throughput_per_s": 0.0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "count": int(len(values)),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(values.max()), 4)
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """실행 환경 정보 (다른 환경의 결과를 비교하고 있지 않은지 확인용)"""
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "git_commit": _git_commit(),
+        "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS}
+    }
+
+
+def build_report(config: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "format": RESULTS_FORMAT,
+        "created_at": datetime.now().isoformat(),
+        "environment": environment(),
+        "config": config,
+        "results": results
+    }
+
+
+def save_report(report: Dict[str, Any], path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"지원하지 않는 결과 형식입니다: {path} ({report.get('format')})")
+    return report
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.15) -> List[Dict[str, Any]]:
+    """두 결과에 모두 있는 벤치마크의 지표 변화 (tolerance보다 나빠지면 regression)"""
+    rows = []
+    for name, current_result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            before, after = baseline_result.get(metric), current_result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            rows.append({
+                "name": name,
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "regression": worse > tolerance
+            })
+    return rows
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<36} {'count':>8} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'errors':>7}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<36} {result['count']:>8} {result.get('throughput_per_s') or 0:>12.1f} "
+            f"{result.get('p50_ms', 0):>10.4f} {result.get('p99_ms', 0):>10.4f} {result['errors']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<36} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for row in rows:
+        flag = "  ⚠️ 성능 저하" if row["regression"] else ""
+        lines.append(
+            f"{row['name']:<36} {row['metric']:<18} {row['baseline']:>12.4f} {row['current']:>12.4f} "
+            f"{row['change'] * 100:>+8.1f}%{flag}"
+        )
+    return "\n".join(lines)
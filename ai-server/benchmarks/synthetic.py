@@ -0,0 +1,53 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.services.model_training import generate_sample_data
+
+# 합성 사용자 위치 기준점 (서울 시청)
+BASE_LATITUDE = 37.5665
+BASE_LONGITUDE = 126.9780
+
+
+def synthetic_requests(
+    n_users: int,
+    seed: int = 42,
+    location_ratio: float = 0.5,
+    now_ts: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """모델 학습 데이터와 같은 분포의 합성 사용자로 /analyze/safety 요청 본문 생성
+
+    화면 사용 시간, 앱 실행 횟수, 체크인 경과 시간은 generate_sample_data 분포를 따르고,
+    활동 경과 시간과 위치는 별도 난수로 만든다. 같은 seed이면 같은 요청 목록이 나온다.
+    """
+    now_ts = time.time() if now_ts is None else now_ts
+    X, _ = generate_sample_data(n_users, seed)
+    rng = np.random.RandomState(seed + 1)
+    hours_since_activity = rng.exponential(3, n_users)
+    has_location = rng.random_sample(n_users) < location_ratio
+    # 기준점 주변 약 ±5km 범위
+    latitudes = BASE_LATITUDE + rng.uniform(-0.05, 0.05, n_users)
+    longitudes = BASE_LONGITUDE + rng.uniform(-0.05, 0.05, n_users)
+
+    payloads = []
+    for i in range(n_users):
+        screen_time, app_open_count, hours_since_checkin, _ = X[i]
+        payload = {
+            "user_id": f"bench-{i:06d}",
+            "app_usage": {
+                "screen_time": max(int(screen_time), 0),
+                "app_open_count": int(app_open_count),
+                "last_activity_ts": now_ts - hours_since_activity[i] * 3600
+            },
+            "last_checkin_ts": now_ts - hours_since_checkin * 3600
+        }
+        if has_location[i]:
+            payload["location"] = {
+                "latitude": float(latitudes[i]),
+                "longitude": float(longitudes[i]),
+                "accuracy": 10.0,
+                "timestamp_ts": now_ts
+            }
+        payloads.append(payload)
+    return payloads
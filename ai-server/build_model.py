@@ -0,0 +1,80 @@
+"""
+오프라인 모델 아티팩트 빌드 도구
+
+저장된 모델(models/*.joblib)이나 새로 학습한 기본 모델을 배열 기반 포레스트로
+컴파일하고, scikit-learn과 결과가 같은지 검증한 뒤 메모리 매핑 가능한 버전별
+아티팩트로 저장합니다. 서버는 기동 시 학습이나 역직렬화 없이 이 아티팩트를 엽니다.
+
+사용 예:
+    python build_model.py --version 1.0.0
+    python build_model.py --version 1.1.0 --retrain
+"""
+import argparse
+import logging
+import os
+import sys
+
+from src.config import settings
+from src.services.forest_compiler import CompiledForest, verify_parity
+from src.services.model_artifact import save_artifact
+from src.services.model_training import generate_sample_data, train_default_model
+from src.services.safety_analyzer import FEATURE_COLUMNS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("build_model")
+
+MODEL_PATH = "models/safety_model.joblib"
+SCALER_PATH = "models/safety_scaler.joblib"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="메모리 매핑 가능한 모델 아티팩트 빌드")
+    parser.add_argument("--version", required=True, help="아티팩트 버전 (응답의 model_version으로 노출)")
+    parser.add_argument("--output", default=settings.MODEL_ARTIFACT_DIR, help="아티팩트 루트 디렉터리")
+    parser.add_argument("--retrain", action="store_true", help="저장된 모델 대신 기본 모델을 새로 학습")
+    parser.add_argument("--force", action="store_true", help="같은 버전이 있으면 덮어쓰기")
+    args = parser.parse_args()
+
+    import joblib
+
+    if not args.retrain and os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH):
+        model = joblib.load(MODEL_PATH)
+        scaler = joblib.load(SCALER_PATH)
+        source = "joblib"
+        logger.info(f"📦 저장된 모델 사용: {MODEL_PATH}")
+    else:
+        logger.info("🧠 기본 모델 학습 중...")
+        model, scaler = train_default_model()
+        source = "trained"
+
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    X_sample, _ = generate_sample_data()
+    if not verify_parity(compiled, model, scaler, X_sample):
+        logger.error("❌ 컴파일된 포레스트 결과가 scikit-learn과 달라 아티팩트를 만들지 않습니다")
+        return 1
+
+    try:
+        path = save_artifact(
+            compiled,
+            args.output,
+            args.version,
+            FEATURE_COLUMNS,
+            metadata={"source": source, "parity_verified": True},
+            overwrite=args.force
+        )
+    except FileExistsError as e:
+        logger.error(f"❌ {str(e)} (--force로 덮어쓰기)")
+        return 1
+
+    logger.info(
+        f"✅ 모델 아티팩트 생성 완료: {path} "
+        f"(트리 {compiled.n_estimators}개, 노드 {compiled.n_nodes}개)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,133 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 import uvicorn
+import asyncio
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import logging
 from contextlib import asynccontextmanager
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from src.config import settings
+from src.utils.structured_logging import log_route, setup_logging
+from src.utils.time_utils import parse_timestamp
+
+# 로깅 설정 (JSON 구조화 출력, 큐 + 백그라운드 기록 스레드)
+setup_logging(
+    level=settings.LOG_LEVEL,
+    fmt=settings.LOG_FORMAT,
+    use_queue=settings.LOG_ASYNC,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    route_rate_per_second=settings.LOG_ROUTE_RATE_PER_SECOND
 )
 logger = logging.getLogger(__name__)
 
 # 서비스 import
 from src.services.safety_analyzer import SafetyAnalyzer
-from src.models.schemas import SafetyAnalysisRequest, SafetyAnalysisResponse
+from src.services.metrics import render_prometheus_gauges
+from src.services.shared_metrics import SharedMetricsDirectory
+from src.services.profiler import SamplingProfiler, collapse_stacks
+from src.services.telemetry_stream import TelemetryIngestor, split_ndjson
+from src.services.retraining import RetrainingJob
+from src.server.middleware import RECEIVED_NS_STATE, RequestTimingMiddleware
+from src.server.admission import AdmissionControlMiddleware, AdmissionController
+from src.server.sharding import ShardMembership
+from src.models.schemas import (
+    SafetyAnalysisRequest,
+    SafetyAnalysisResponse,
+    SafetyBatchAnalysisRequest,
+    SafetyBatchAnalysisResponse,
+    OutcomeBatchRequest
+)
+
+# 분석 응답 직렬화: orjson이 설치되어 있으면 사용
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    json_loads, json_dumps = orjson.loads, lambda value: orjson.dumps(value).decode()
+except ImportError:
+    import json
+    FastJSONResponse = JSONResponse
+    json_loads, json_dumps = json.loads, lambda value: json.dumps(value, ensure_ascii=False)
+
+# 실행 워커 수 (production 모드만 멀티 워커, 0이면 CPU 코어 수)
+# 샤드 모드는 사용자별 메모리 상태를 샤드마다 한 벌로 유지해야 하므로 SERVER_WORKERS와 관계없이 1
+if settings.SHARD_ID:
+    server_workers = 1
+else:
+    server_workers = (settings.SERVER_WORKERS or os.cpu_count() or 1) if settings.SERVER_MODE == "production" else 1
+# 위치 공간 색인은 워커별이므로, 멀티 워커 실행에서는 주변 사용자 조회가 이 워커의 사용자로 한정됨
+spatial_partial = server_workers > 1
 
 # AI 서비스 인스턴스
 safety_analyzer = SafetyAnalyzer()
+profiler = SamplingProfiler()
+# 부하 제어: 처리 중 요청 수/이벤트 루프 지연이 높으면 규칙 기반 채점, 더 높으면 낮은 우선순위 요청 거절
+admission = None
+if settings.ADMISSION_ENABLED:
+    admission = AdmissionController(
+        degrade_in_flight=settings.ADMISSION_DEGRADE_IN_FLIGHT,
+        reject_in_flight=settings.ADMISSION_REJECT_IN_FLIGHT,
+        degrade_lag_ms=settings.ADMISSION_DEGRADE_LAG_MS,
+        reject_lag_ms=settings.ADMISSION_REJECT_LAG_MS,
+        lag_interval=settings.ADMISSION_LAG_INTERVAL_MS / 1000,
+        retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS
+    )
+telemetry_ingestor = TelemetryIngestor(
+    safety_analyzer,
+    alert_threshold=settings.STREAM_ALERT_THRESHOLD,
+    flush_interval=settings.STREAM_FLUSH_INTERVAL_MS / 1000,
+    max_users=settings.STREAM_MAX_USERS,
+    should_degrade=admission.should_degrade if admission is not None else None
+)
+# 샤드 모드: 구성 파일로 담당 범위를 알고, 구성이 바뀌면 담당이 바뀐 사용자 상태를 새 담당 샤드로 이관
+shard_membership = None
+if settings.SHARD_ID:
+    shard_membership = ShardMembership(
+        settings.SHARD_ID,
+        settings.SHARD_TOPOLOGY_FILE,
+        safety_analyzer,
+        interval_seconds=settings.SHARD_WATCH_INTERVAL_SECONDS,
+        batch_users=settings.SHARD_HANDOFF_BATCH_USERS,
+        timeout_seconds=settings.SHARD_HANDOFF_TIMEOUT_SECONDS
+    )
+# 재학습은 별도 프로세스(retrain.py)로 실행하고, 배포되면 이 워커의 모델을 바로 교체
+retraining_job = RetrainingJob(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrain.py"),
+    n_jobs=settings.RETRAIN_N_JOBS,
+    nice=settings.RETRAIN_NICE,
+    cpu_seconds=settings.RETRAIN_CPU_SECONDS,
+    on_published=safety_analyzer.reload_model
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 시작 시 초기화
     logger.info("🤖 AI 분석 서버 초기화 중...")
     await safety_analyzer.initialize()
+    telemetry_ingestor.start()
+    if admission is not None:
+        admission.start()
+    if shard_membership is not None:
+        shard_membership.start()
+    # 재시작/배포 전 예약된 체크인 경보를 공유 저장소의 마지막 체크인 시각으로 복원 (샤드 모드는 담당 사용자만)
+    safety_analyzer.restore_checkin_timers(shard_membership.owns if shard_membership is not None else None)
     logger.info("✅ AI 분석 서버 초기화 완료")
     
     yield
     
     # 종료 시 정리
     logger.info("🤖 AI 분석 서버 종료 중...")
+    retraining_job.stop()
+    if admission is not None:
+        admission.stop()
+    if shard_membership is not None:
+        await shard_membership.stop()
+    await telemetry_ingestor.stop()
+    await safety_analyzer.shutdown()
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -51,6 +146,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청 수신 시각 기록 (단계별 시간의 파싱 단계 계산용)
+app.add_middleware(RequestTimingMiddleware)
+
+# 처리 중 요청 수 집계 및 과부하 시 낮은 우선순위 요청 거절 (스트리밍 연결은 집계하지 않음)
+if admission is not None:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission,
+        low_priority_paths=settings.ADMISSION_LOW_PRIORITY_PATHS,
+        untracked_prefixes=("/stream/",)
+    )
+
+def _should_degrade() -> bool:
+    """서버 부하가 높아 분석을 규칙 기반으로 처리해야 하는지"""
+    return admission is not None and admission.should_degrade()
+
+def _record_parse_stage(http_request: Request, stage: str):
+    """요청 수신부터 엔드포인트 진입까지(본문 읽기, JSON 파싱, 검증)를 단계 시간으로 기록"""
+    received_ns = getattr(http_request.state, RECEIVED_NS_STATE, None)
+    if received_ns is not None:
+        safety_analyzer.stage_timings.record_ns(stage, time.perf_counter_ns() - received_ns)
+
 # 상태 확인 엔드포인트
 @app.get("/")
 async def root():
@@ -71,19 +188,31 @@ async def health_check():
 
 # 안전 분석 엔드포인트
 @app.post("/analyze/safety", response_model=SafetyAnalysisResponse)
-async def analyze_safety(request: SafetyAnalysisRequest):
+async def analyze_safety(request: SafetyAnalysisRequest, http_request: Request, verbose: bool = False):
     """
     사용자의 안전 데이터를 분석하여 위험도를 평가합니다.
+    verbose=true이면 analysis_details에 추출된 특성을 포함합니다.
+    서버 부하가 높으면 규칙 기반으로 채점하며 analysis_details.method에 표시됩니다.
     """
     try:
-        logger.info(f"🔍 안전 분석 요청 수신: 사용자 ID {request.user_id}")
+        _record_parse_stage(http_request, "parse")
         
         # AI 분석 수행
-        analysis_result = await safety_analyzer.analyze_safety_data(request)
+        analysis_result = await safety_analyzer.analyze_safety_data(request, verbose, _should_degrade())
         
-        logger.info(f"✅ 안전 분석 완료: 위험도 {analysis_result.risk_level}/10")
+        # 요청별 성공 로그는 route별 속도 제한 대상 (LOG_ROUTE_RATE_PER_SECOND)
+        log_route(
+            logger, "/analyze/safety", "✅ 안전 분석 완료",
+            user_id=request.user_id,
+            risk_level=analysis_result.risk_level,
+            confidence=analysis_result.confidence
+        )
         
-        return analysis_result
+        # 서버에서 만든 응답이므로 response_model 재검증 없이 바로 직렬화
+        serialize_start = time.perf_counter_ns()
+        response = FastJSONResponse(analysis_result.model_dump())
+        safety_analyzer.stage_timings.lap("serialize", serialize_start)
+        return response
         
     except Exception as e:
         logger.error(f"❌ 안전 분석 실패: {str(e)}")
@@ -92,6 +221,140 @@ async def analyze_safety(request: SafetyAnalysisRequest):
             detail=f"안전 분석 중 오류가 발생했습니다: {str(e)}"
         )
 
+# 배치 안전 분석 엔드포인트
+@app.post("/analyze/safety/batch", response_model=SafetyBatchAnalysisResponse)
+async def analyze_safety_batch(batch: SafetyBatchAnalysisRequest, http_request: Request, verbose: bool = False):
+    """
+    여러 사용자의 안전 데이터를 한 번의 모델 호출로 일괄 분석합니다.
+    결과는 요청 순서와 동일한 순서로 반환됩니다.
+    """
+    try:
+        _record_parse_stage(http_request, "batch.parse")
+        start_time = datetime.now()
+        
+        results = await safety_analyzer.analyze_safety_batch(batch.requests, verbose, _should_degrade())
+        
+        response_time = (datetime.now() - start_time).total_seconds()
+        log_route(
+            logger, "/analyze/safety/batch", "✅ 배치 안전 분석 완료",
+            count=len(results),
+            response_time_ms=int(response_time * 1000)
+        )
+        
+        serialize_start = time.perf_counter_ns()
+        response = FastJSONResponse({
+            "results": [result.model_dump() for result in results],
+            "total": len(results),
+            "response_time_ms": int(response_time * 1000)
+        })
+        safety_analyzer.stage_timings.lap("batch.serialize", serialize_start)
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ 배치 안전 분석 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"배치 안전 분석 중 오류가 발생했습니다: {str(e)}"
+        )
+
+def _ingest_message(subscription, raw, errors: list):
+    """JSON 이벤트 객체 하나 또는 배열을 수집 (잘못된 메시지/이벤트는 errors에 기록하고 계속)"""
+    try:
+        payload = json_loads(raw)
+    except ValueError:
+        subscription.errors += 1
+        errors.append({"type": "error", "message": "JSON 형식이 아닙니다"})
+        return
+    for event in payload if isinstance(payload, list) else [payload]:
+        try:
+            telemetry_ingestor.ingest(subscription, event)
+        except ValueError as e:
+            subscription.errors += 1
+            errors.append({"type": "error", "message": str(e), "user_id": event.get("user_id") if isinstance(event, dict) else None})
+
+async def _send_stream_updates(websocket: WebSocket, subscription):
+    """연결의 outbox에 쌓인 위험도 변화/오류 메시지를 순서대로 전송"""
+    while True:
+        message = await subscription.outbox.get()
+        await websocket.send_text(json_dumps(message))
+
+# 원격 측정 스트리밍 수집 (WebSocket)
+@app.websocket("/stream/telemetry")
+async def stream_telemetry(websocket: WebSocket):
+    """
+    연결을 유지한 채 원격 측정 이벤트를 받아 사용자 상태를 갱신하고, 위험도 변화를 실시간으로 보냅니다.
+    메시지는 이벤트 JSON 객체 하나 또는 이벤트 배열입니다.
+    이벤트: {"user_id", "type": app_usage|activity|checkin|location, "ts"(epoch 초, 생략 시 수신 시각), ...}
+    - app_usage: screen_time, app_open_count (활동 시각도 갱신)
+    - location: latitude, longitude, accuracy
+    보내는 메시지: {"type": "risk_change", ...} 또는 {"type": "error", "message"}
+    """
+    await websocket.accept()
+    subscription = telemetry_ingestor.subscribe(settings.STREAM_OUTBOX_SIZE)
+    sender = asyncio.create_task(_send_stream_updates(websocket, subscription))
+    logger.info("🔌 스트리밍 연결 시작")
+    try:
+        while True:
+            errors = []
+            _ingest_message(subscription, await websocket.receive_text(), errors)
+            for error in errors:
+                subscription.push(error)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"❌ 스트리밍 수집 실패: {str(e)}")
+    finally:
+        sender.cancel()
+        telemetry_ingestor.unsubscribe(subscription)
+        logger.info(
+            "🔌 스트리밍 연결 종료",
+            extra={"events": subscription.events, "errors": subscription.errors, "dropped": subscription.dropped}
+        )
+
+# 원격 측정 스트리밍 수집 (NDJSON)
+@app.post("/stream/telemetry")
+async def stream_telemetry_ndjson(http_request: Request):
+    """
+    chunked 전송된 NDJSON 본문(한 줄에 이벤트 하나)을 받는 대로 수집하고 재채점합니다.
+    본문을 모두 받은 뒤 이 요청의 이벤트로 생긴 위험도 변화와 오류를 NDJSON으로 반환합니다
+    (마지막 줄은 {"type": "summary", ...}). 실시간 전송이 필요하면 WebSocket을 사용하세요.
+    """
+    subscription = telemetry_ingestor.subscribe()
+    errors = []
+    try:
+        buffer = b""
+        async for chunk in http_request.stream():
+            lines, buffer = split_ndjson(buffer, chunk, settings.STREAM_MAX_LINE_BYTES)
+            for line in lines:
+                _ingest_message(subscription, line, errors)
+        if buffer.strip():
+            _ingest_message(subscription, buffer, errors)
+        
+        # 이 요청으로 바뀐 사용자를 바로 채점하여 결과에 포함
+        await telemetry_ingestor.flush()
+        messages = []
+        while not subscription.outbox.empty():
+            messages.append(subscription.outbox.get_nowait())
+        messages.extend(errors)
+        messages.append({"type": "summary", "events": subscription.events, "errors": subscription.errors})
+        
+        return Response(
+            "".join(json_dumps(message) + "\n" for message in messages),
+            media_type="application/x-ndjson"
+        )
+        
+    except ValueError as e:
+        # 줄바꿈 없이 STREAM_MAX_LINE_BYTES를 넘는 본문
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ 스트리밍 수집 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"원격 측정 수집 중 오류가 발생했습니다: {str(e)}"
+        )
+    finally:
+        telemetry_ingestor.unsubscribe(subscription)
+
 # 패턴 학습 엔드포인트
 @app.post("/learn/pattern")
 async def learn_user_pattern(
@@ -103,7 +366,7 @@ async def learn_user_pattern(
     사용자의 행동 패턴을 학습합니다.
     """
     try:
-        logger.info(f"📚 패턴 학습 요청: 사용자 ID {user_id}")
+        log_route(logger, "/learn/pattern", "📚 패턴 학습 요청", user_id=user_id)
         
         # 백그라운드에서 패턴 학습 수행
         background_tasks.add_task(
@@ -125,6 +388,25 @@ async def learn_user_pattern(
             detail=f"패턴 학습 중 오류가 발생했습니다: {str(e)}"
         )
 
+# 재학습 데이터(결과 레이블) 수집 엔드포인트
+@app.post("/training/outcomes")
+async def record_training_outcomes(request: OutcomeBatchRequest):
+    """
+    사용자별로 확인된 결과(0: 안전, 1: 주의, 2: 위험)를 재학습 데이터로 추가합니다.
+    features가 없으면 이 워커가 최근 분석한 해당 사용자의 모델 입력을 사용합니다.
+    """
+    try:
+        return await safety_analyzer.record_outcomes(
+            [outcome.model_dump() for outcome in request.outcomes]
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ 재학습 데이터 기록 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"재학습 데이터 기록 중 오류가 발생했습니다: {str(e)}"
+        )
+
 # 모델 상태 조회 엔드포인트
 @app.get("/model/status")
 async def get_model_status():
@@ -142,6 +424,298 @@ async def get_model_status():
             detail=f"모델 상태 조회 중 오류가 발생했습니다: {str(e)}"
         )
 
+# 모델 버전 목록 엔드포인트
+@app.get("/model/versions")
+async def get_model_versions():
+    """
+    레지스트리에 등록된 모델 버전과 현재 활성/섀도 버전을 조회합니다.
+    """
+    try:
+        return await safety_analyzer.get_model_versions()
+        
+    except Exception as e:
+        logger.error(f"❌ 모델 버전 조회 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"모델 버전 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 모델 교체 엔드포인트
+@app.post("/model/reload")
+async def reload_model(version: Optional[str] = None, shadow: bool = False):
+    """
+    모델을 서버 재시작 없이 교체합니다 (version이 없으면 최신 빌드).
+    shadow=true이면 교체하지 않고 후보 모델로 실제 트래픽을 함께 채점합니다.
+    멀티 워커 실행 시에는 요청을 받은 워커에만 적용되므로 LATEST 파일 감시를 사용하세요.
+    """
+    try:
+        logger.info(f"🔄 모델 교체 요청: 버전 {version or 'LATEST'} (shadow={shadow})")
+        return await safety_analyzer.reload_model(version, shadow)
+        
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ 모델 교체 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"모델 교체 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 모델 재학습 엔드포인트
+@app.post("/model/retrain")
+async def retrain_model(version: Optional[str] = None):
+    """
+    축적된 재학습 데이터로 별도 프로세스에서 모델을 재학습합니다 (완료를 기다리지 않음).
+    holdout 평가에서 현재 모델보다 나을 때만 새 버전으로 배포하고 교체합니다.
+    진행 상황은 /model/retrain/status로 확인합니다.
+    """
+    if retraining_job.running:
+        raise HTTPException(status_code=409, detail="이미 재학습이 진행 중입니다")
+    
+    try:
+        logger.info(f"🏋️ 재학습 요청: 버전 {version or '자동'}")
+        return retraining_job.start(version)
+        
+    except Exception as e:
+        logger.error(f"❌ 재학습 시작 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"재학습 시작 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 모델 재학습 상태 엔드포인트
+@app.get("/model/retrain/status")
+async def get_retrain_status():
+    """
+    마지막 재학습의 진행 상태/결과와 재학습 데이터 현황을 조회합니다.
+    멀티 워커 실행 시에는 요청을 받은 워커가 시작한 재학습만 보입니다.
+    """
+    try:
+        return {
+            "job": retraining_job.get_status(),
+            "training_data": await asyncio.to_thread(safety_analyzer.outcome_recorder.get_stats)
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ 재학습 상태 조회 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"재학습 상태 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 섀도 모델 승격 엔드포인트
+@app.post("/model/promote")
+async def promote_shadow_model():
+    """
+    섀도 채점 중인 후보 모델을 활성 모델로 승격합니다.
+    """
+    try:
+        return await safety_analyzer.promote_shadow()
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ 섀도 모델 승격 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"섀도 모델 승격 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 섀도 채점 중단 엔드포인트
+@app.delete("/model/shadow")
+async def clear_shadow_model():
+    """
+    섀도 모델 채점을 중단합니다.
+    """
+    return {
+        "cleared_version": safety_analyzer.clear_shadow(),
+        "active_version": safety_analyzer.model_version
+    }
+
+# 비활동 감시 상태 엔드포인트
+@app.get("/watchdog/status")
+async def get_watchdog_status():
+    """
+    체크인 공백 경보 타이머 현황(추적 사용자, 예약된 경보, 단계별 경보 수)을 조회합니다.
+    멀티 워커 실행 시에는 요청을 받은 워커의 현황입니다.
+    """
+    if safety_analyzer.watchdog is None:
+        raise HTTPException(status_code=404, detail="비활동 감시가 비활성화되어 있습니다 (WATCHDOG_ENABLED=true로 활성화)")
+    return safety_analyzer.watchdog.get_stats()
+
+# 주변 사용자 조회 엔드포인트
+@app.get("/spatial/nearby")
+async def find_nearby_users(
+    user_id: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius_m: float = 1000.0,
+    k: int = 20,
+    max_accuracy_m: Optional[float] = 100.0,
+    max_age_hours: Optional[float] = 24.0
+):
+    """
+    user_id의 마지막 위치(또는 latitude/longitude) 주변 사용자를 가까운 순으로 최대 k명 조회합니다.
+    위치 정확도가 max_accuracy_m보다 나쁘거나 max_age_hours보다 오래된 위치는 제외합니다.
+    샤드 모드가 아닌 멀티 워커 실행 시에는 요청을 받은 워커가 분석한 사용자만 조회되며,
+    이때 응답의 partial이 true입니다 (전체 조회가 필요하면 샤드 모드로 실행).
+    """
+    index = safety_analyzer.spatial_index
+    if index is None:
+        raise HTTPException(status_code=404, detail="위치 공간 색인이 비활성화되어 있습니다 (SPATIAL_INDEX_ENABLED=true로 활성화)")
+    if not 0 < radius_m <= settings.SPATIAL_MAX_RADIUS_METERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"radius_m은 0보다 크고 {settings.SPATIAL_MAX_RADIUS_METERS:g} 이하여야 합니다"
+        )
+    if not 1 <= k <= settings.SPATIAL_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"k는 1 이상 {settings.SPATIAL_MAX_RESULTS} 이하여야 합니다")
+    if user_id is not None:
+        center = index.position(user_id)
+        if center is None:
+            raise HTTPException(status_code=404, detail=f"위치가 기록되지 않은 사용자입니다: {user_id}")
+    elif latitude is not None and longitude is not None:
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+            raise HTTPException(status_code=400, detail="latitude는 -90~90, longitude는 -180~180 범위여야 합니다")
+        center = {"latitude": latitude, "longitude": longitude}
+    else:
+        raise HTTPException(status_code=400, detail="user_id 또는 latitude/longitude가 필요합니다")
+    
+    try:
+        start = time.perf_counter()
+        result = index.query(
+            center["latitude"],
+            center["longitude"],
+            radius_m,
+            k=k,
+            max_accuracy=max_accuracy_m,
+            min_timestamp=time.time() - max_age_hours * 3600 if max_age_hours is not None else None,
+            exclude_user_id=user_id
+        )
+        result["center"] = center
+        result["partial"] = spatial_partial
+        result["query_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+        
+    except Exception as e:
+        logger.error(f"❌ 주변 사용자 조회 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"주변 사용자 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 위치 공간 색인 상태 엔드포인트
+@app.get("/spatial/status")
+async def get_spatial_status():
+    """
+    위치 공간 색인 현황(색인된 사용자, 사용 중인 셀, 갱신 횟수, 메모리)을 조회합니다.
+    """
+    if safety_analyzer.spatial_index is None:
+        raise HTTPException(status_code=404, detail="위치 공간 색인이 비활성화되어 있습니다 (SPATIAL_INDEX_ENABLED=true로 활성화)")
+    return safety_analyzer.spatial_index.get_stats()
+
+# 위험도 이력 조회 구간 단위 (초)
+HISTORY_BUCKETS = {"raw": 0, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+def _parse_query_timestamp(value: str) -> Optional[float]:
+    """쿼리 문자열의 시각 해석 (epoch 초 숫자 또는 ISO 8601)"""
+    try:
+        return float(value)
+    except ValueError:
+        return parse_timestamp(value)
+
+# 사용자 위험도 이력 엔드포인트
+@app.get("/history/{user_id}")
+async def get_risk_history(
+    user_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    days: float = 7.0,
+    bucket: str = "raw",
+    features: bool = False
+):
+    """
+    사용자의 위험도 이력을 조회합니다.
+    start/end는 ISO 8601 또는 epoch 초이며, start가 없으면 end 기준 최근 days일입니다.
+    bucket이 raw이면 기록을 그대로(건별 보관 기간이 지난 구간은 1시간 요약), hour/day/week이면
+    구간별 최대/평균 위험도, 평균 신뢰도, 건수와 일당 추세(trend_per_day)를 반환합니다.
+    """
+    history = safety_analyzer.risk_history
+    if history is None:
+        raise HTTPException(status_code=404, detail="위험도 이력이 비활성화되어 있습니다 (HISTORY_ENABLED=true로 활성화)")
+    if bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket은 {', '.join(HISTORY_BUCKETS)} 중 하나여야 합니다")
+    end_ts = _parse_query_timestamp(end) if end is not None else time.time()
+    start_ts = _parse_query_timestamp(start) if start is not None else (end_ts - days * 86400 if end_ts is not None else None)
+    if start_ts is None or end_ts is None:
+        raise HTTPException(status_code=400, detail="start/end는 ISO 8601 또는 epoch 초 형식이어야 합니다")
+    if start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다")
+    
+    try:
+        query_start = time.perf_counter()
+        result = await asyncio.to_thread(
+            history.query,
+            user_id,
+            start_ts,
+            end_ts,
+            bucket_seconds=HISTORY_BUCKETS[bucket],
+            tz_offset_seconds=int(settings.HISTORY_TZ_OFFSET_HOURS * 3600),
+            include_features=features,
+            max_points=settings.HISTORY_MAX_POINTS
+        )
+        result["bucket"] = bucket
+        result["query_ms"] = round((time.perf_counter() - query_start) * 1000, 3)
+        return result
+        
+    except Exception as e:
+        logger.error(f"❌ 위험도 이력 조회 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"위험도 이력 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 위험도 이력 저장소 상태 엔드포인트
+@app.get("/metrics/history")
+async def get_history_status():
+    """
+    위험도 이력 저장소 현황(기록 대기 행, 단계별 세그먼트 수)을 조회합니다.
+    """
+    if safety_analyzer.risk_history is None:
+        raise HTTPException(status_code=404, detail="위험도 이력이 비활성화되어 있습니다 (HISTORY_ENABLED=true로 활성화)")
+    return await asyncio.to_thread(safety_analyzer.risk_history.get_stats)
+
+# 샤드 간 사용자 상태 이관 수신 엔드포인트
+@app.post("/shard/handoff")
+async def receive_shard_handoff(payload: Dict[str, Any]):
+    """
+    구성 변경으로 담당이 이 샤드로 바뀐 사용자의 상태를 이전 담당 샤드로부터 받습니다 (샤드 간 내부 호출).
+    """
+    if shard_membership is None:
+        raise HTTPException(status_code=404, detail="샤드 모드가 아닙니다 (SHARD_ID로 활성화)")
+    
+    try:
+        imported = shard_membership.receive(payload)
+        logger.info(f"📥 사용자 상태 이관 수신: {payload.get('from')} -> {settings.SHARD_ID}, {imported}명")
+        return {"imported": imported, "shard_id": settings.SHARD_ID}
+        
+    except Exception as e:
+        logger.error(f"❌ 사용자 상태 이관 수신 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"사용자 상태 이관 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 샤드 상태 엔드포인트
+@app.get("/shard/status")
+async def get_shard_status():
+    """
+    이 샤드의 구성 버전, 담당 비율, 메모리 상태를 가진 사용자 수, 이관 현황을 조회합니다.
+    """
+    if shard_membership is None:
+        raise HTTPException(status_code=404, detail="샤드 모드가 아닙니다 (SHARD_ID로 활성화)")
+    return shard_membership.get_stats()
+
 # 예측 성능 지표 엔드포인트
 @app.get("/metrics/performance")
 async def get_performance_metrics():
@@ -150,6 +724,8 @@ async def get_performance_metrics():
     """
     try:
         metrics = await safety_analyzer.get_performance_metrics()
+        metrics.streaming = telemetry_ingestor.get_stats()
+        metrics.admission = admission.get_stats() if admission is not None else None
         return metrics
         
     except Exception as e:
@@ -159,9 +735,70 @@ async def get_performance_metrics():
             detail=f"성능 지표 조회 중 오류가 발생했습니다: {str(e)}"
         )
 
+# Prometheus 형식 성능 지표 엔드포인트
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """
+    성능 지표를 Prometheus 텍스트 형식으로 노출합니다.
+    """
+    try:
+        metrics = await safety_analyzer.get_prometheus_metrics()
+        if admission is not None:
+            # 부하 제어 지표는 응답한 워커 기준
+            lines = render_prometheus_gauges(
+                "safety_admission", admission.get_stats(), counters=("degraded", "rejected")
+            )
+            metrics += "\n".join(lines) + "\n"
+        return PlainTextResponse(metrics, media_type="text/plain; version=0.0.4")
+        
+    except Exception as e:
+        logger.error(f"❌ Prometheus 지표 조회 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prometheus 지표 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+# 샘플링 프로파일러 엔드포인트
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def profile_server(seconds: float = 10.0, interval_ms: float = 5.0, idle: bool = False):
+    """
+    이 워커 프로세스의 모든 스레드를 seconds초 동안 샘플링하여 collapsed stack 형식으로 반환합니다.
+    idle=true이면 작업을 기다리는 스레드(이벤트 루프 대기, 스레드 풀 대기)의 스택도 포함합니다.
+    flamegraph.pl이나 speedscope로 열 수 있습니다. PROFILER_ENABLED=true일 때만 사용할 수 있으며,
+    멀티 워커 실행 시에는 요청을 받은 워커만 프로파일합니다.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="프로파일러가 비활성화되어 있습니다 (PROFILER_ENABLED=true로 활성화)")
+    if not 0 < seconds <= settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds는 0보다 크고 {settings.PROFILER_MAX_SECONDS:g} 이하여야 합니다"
+        )
+    
+    try:
+        logger.info(f"🔬 프로파일 시작: {seconds:g}초, 간격 {interval_ms:g}ms")
+        # 샘플링은 별도 스레드에서 실행하여 이벤트 루프는 계속 요청을 처리 (이벤트 루프 스택도 수집됨)
+        stacks = await asyncio.to_thread(profiler.profile, seconds, max(interval_ms, 1.0) / 1000, idle)
+        
+    except Exception as e:
+        logger.error(f"❌ 프로파일 실패: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"프로파일 중 오류가 발생했습니다: {str(e)}"
+        )
+    
+    if stacks is None:
+        raise HTTPException(status_code=409, detail="다른 프로파일이 실행 중입니다")
+    
+    filename = f"profile-{os.getpid()}-{datetime.now().strftime('%Y%m%d%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        collapse_stacks(stacks),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # 테스트 엔드포인트
 @app.post("/test/analyze")
-async def test_analysis():
+async def test_analysis(http_request: Request):
     """
     테스트용 분석 엔드포인트
     """
@@ -182,17 +819,39 @@ async def test_analysis():
         last_checkin=datetime.now().isoformat()
     )
     
-    return await analyze_safety(test_request)
+    return await analyze_safety(test_request, http_request, verbose=True)
+
+def preload_production():
+    """production 모드: 워커 fork 전에 부모 프로세스에서 한 번 실행"""
+    if settings.METRICS_SHARED_DIR:
+        SharedMetricsDirectory.reset(settings.METRICS_SHARED_DIR)
+    safety_analyzer.load_model()
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     
     logger.info(f"🚀 AI 서버 시작 중... 포트: {port}")
     
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
+    if settings.SERVER_MODE == "production":
+        if settings.SHARD_ID and settings.SERVER_WORKERS != 1:
+            logger.warning(f"⚠️ 샤드 모드는 워커 1개로 실행합니다 (SERVER_WORKERS={settings.SERVER_WORKERS} 무시)")
+        # 모델을 한 번 로드한 뒤 워커를 fork하여 메모리를 공유, reload 없음
+        from src.server.prefork import run_prefork
+        
+        run_prefork(
+            app,
+            host="0.0.0.0",
+            port=port,
+            workers=server_workers,
+            preload=preload_production,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            reload=True,
+            log_level="info",
+            log_config=None
+        )
@@ -0,0 +1,104 @@
+"""
+축적된 실제 데이터로 모델 재학습 도구
+
+서버가 쌓은 레이블 데이터(TRAINING_DATA_DIR)를 chunk 단위로 읽어 사용자 기준으로
+학습/평가 데이터를 나누고, 후보 모델을 학습합니다. 같은 평가 데이터에서 현재 모델보다
+macro F1이 나을 때만 새 아티팩트로 저장하고 LATEST를 갱신하며, 서버 워커는 LATEST 감시로
+새 모델로 교체합니다. 서빙과 CPU를 나눠 쓰도록 nice 값, CPU 시간 상한, 학습 코어 수를
+지정할 수 있습니다. 서버의 POST /model/retrain이나 cron으로 주기 실행합니다.
+
+마지막 줄에 결과 JSON을 출력하며, 종료 코드는 0 (배포), 2 (개선 없음/데이터 부족),
+3 (다른 재학습 실행 중), 1 (오류)입니다.
+
+사용 예:
+    python retrain.py
+    python retrain.py --version 2.0.0 --n-jobs 2 --nice 15 --no-warm-start
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from src.config import settings
+from src.services.retraining import EXIT_BUSY, EXIT_FAILED, EXIT_NOT_PUBLISHED, EXIT_PUBLISHED, run_retraining
+from src.services.safety_analyzer import FEATURE_COLUMNS
+from src.services.training_data import OutcomeDataset
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("retrain")
+
+LOCK_FILE = ".retrain.lock"
+
+
+def _limit_resources(nice: int, cpu_seconds: int):
+    """이 프로세스(및 학습 자식 프로세스)의 CPU 우선순위와 CPU 시간 상한 설정"""
+    if nice > 0:
+        os.nice(nice)
+    if cpu_seconds > 0:
+        import resource
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="축적된 레이블 데이터로 모델 재학습 및 조건부 배포")
+    parser.add_argument("--version", default=None, help="새 아티팩트 버전 (기본: retrain-YYYYMMDD-HHMMSS)")
+    parser.add_argument("--data", default=settings.TRAINING_DATA_DIR, help="레이블 데이터 디렉터리")
+    parser.add_argument("--output", default=settings.MODEL_ARTIFACT_DIR, help="아티팩트 루트 디렉터리")
+    parser.add_argument("--n-jobs", type=int, default=settings.RETRAIN_N_JOBS, help="학습에 사용할 CPU 코어 수")
+    parser.add_argument("--nice", type=int, default=settings.RETRAIN_NICE, help="프로세스 nice 값 증가분")
+    parser.add_argument("--cpu-seconds", type=int, default=settings.RETRAIN_CPU_SECONDS, help="CPU 시간 상한 (0이면 제한 없음)")
+    parser.add_argument("--max-rows", type=int, default=settings.RETRAIN_MAX_ROWS, help="학습/평가에 사용할 최대 행 수")
+    parser.add_argument("--chunk-size", type=int, default=settings.RETRAIN_CHUNK_SIZE, help="한 번에 읽는 행 수")
+    parser.add_argument("--holdout", type=float, default=settings.RETRAIN_HOLDOUT_FRACTION, help="평가용 사용자 비율")
+    parser.add_argument("--min-rows", type=int, default=settings.RETRAIN_MIN_ROWS, help="필요한 최소 학습 행 수")
+    parser.add_argument("--min-improvement", type=float, default=settings.RETRAIN_MIN_IMPROVEMENT, help="배포에 필요한 macro F1 개선 폭")
+    parser.add_argument("--no-warm-start", action="store_true", help="현재 모델을 이어서 학습하지 않고 처음부터 학습")
+    args = parser.parse_args()
+
+    _limit_resources(args.nice, args.cpu_seconds)
+    version = args.version or f"retrain-{datetime.now():%Y%m%d-%H%M%S}"
+
+    import fcntl
+
+    os.makedirs(args.data, exist_ok=True)
+    lock = open(os.path.join(args.data, LOCK_FILE), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        logger.error("❌ 다른 재학습이 실행 중입니다")
+        print(json.dumps({"status": "busy", "version": version}))
+        return EXIT_BUSY
+
+    try:
+        result = run_retraining(
+            OutcomeDataset(args.data, FEATURE_COLUMNS),
+            args.output,
+            version,
+            max_rows=args.max_rows,
+            chunk_size=args.chunk_size,
+            holdout_fraction=args.holdout,
+            min_rows=args.min_rows,
+            min_improvement=args.min_improvement,
+            n_jobs=args.n_jobs,
+            warm_start=settings.RETRAIN_WARM_START and not args.no_warm_start,
+            warm_start_trees=settings.RETRAIN_WARM_START_TREES,
+            max_trees=settings.RETRAIN_MAX_TREES
+        )
+    except Exception as e:
+        logger.exception(f"❌ 재학습 실패: {str(e)}")
+        print(json.dumps({"status": "failed", "version": version, "error": str(e)}, ensure_ascii=False))
+        return EXIT_FAILED
+    finally:
+        lock.close()
+
+    print(json.dumps(result, ensure_ascii=False))
+    return EXIT_PUBLISHED if result["status"] == "published" else EXIT_NOT_PUBLISHED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
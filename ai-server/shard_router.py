@@ -0,0 +1,148 @@
+"""
+샤드 모드 라우터와 구성 도구
+
+user_id consistent hash로 사용자별 상태를 여러 AI 서버(샤드)에 나누어 두는 배포를 위한 도구입니다.
+각 샤드는 SHARD_ID와 SHARD_TOPOLOGY_FILE로 실행하며, 라우터는 같은 구성 파일을 읽어 요청을
+담당 샤드로 전달하고 배치 요청은 샤드별로 나눠 보냅니다. 백엔드는 AI_SERVICE_URL을 라우터
+주소로 지정하면 됩니다. 구성 파일의 노드를 바꾸면(버전 증가) 라우터는 새 구성으로 전달하고,
+샤드는 담당이 바뀐 사용자의 메모리 상태를 새 담당 샤드로 이관합니다.
+
+명령:
+    serve     라우터 실행
+    topology  구성 파일의 노드 목록 교체 (버전 증가)
+    local     한 머신에서 샤드 여러 개와 라우터를 함께 실행 (로컬 테스트용)
+
+사용 예:
+    python shard_router.py local --shards 3 --standby 1
+    python shard_router.py topology --node shard-1=http://127.0.0.1:8101 --node shard-2=http://127.0.0.1:8102
+    SHARD_ID=shard-1 PORT=8101 SERVER_MODE=production SERVER_WORKERS=1 python main.py
+    python shard_router.py serve --port 8000
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import uvicorn
+
+from src.config import settings
+from src.server.shard_router import ShardRouter, create_router_app
+from src.server.sharding import DEFAULT_VNODES, load_topology, write_topology
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("shard_router")
+
+
+def _parse_nodes(values: List[str]) -> Dict[str, str]:
+    nodes = {}
+    for value in values:
+        name, separator, url = value.partition("=")
+        if not separator or not name or not url:
+            raise ValueError(f"노드는 이름=URL 형식이어야 합니다: {value}")
+        nodes[name] = url.rstrip("/")
+    return nodes
+
+
+def serve(args) -> int:
+    router = ShardRouter(
+        args.topology,
+        watch_interval_seconds=settings.SHARD_WATCH_INTERVAL_SECONDS,
+        timeout_seconds=settings.ROUTER_TIMEOUT_SECONDS,
+        max_connections=settings.ROUTER_MAX_CONNECTIONS
+    )
+    uvicorn.run(create_router_app(router), host=args.host, port=args.port, log_level="info", log_config=None)
+    return 0
+
+
+def update_topology(args) -> int:
+    topology = write_topology(args.topology, _parse_nodes(args.node), args.vnodes)
+    logger.info(f"🧭 샤드 구성 v{topology.version} 기록: {', '.join(topology.nodes)}")
+    for node, share in topology.ring.ownership().items():
+        logger.info(f"   {node}: {topology.url(node)} (담당 {share:.1%})")
+    return 0
+
+
+def run_local(args) -> int:
+    """샤드 프로세스 여러 개(main.py)와 라우터를 띄우고, 종료 신호를 받으면 모두 종료"""
+    names = [f"shard-{index + 1}" for index in range(args.shards + args.standby)]
+    urls = {name: f"http://127.0.0.1:{args.base_port + index}" for index, name in enumerate(names)}
+    # 대기 샤드는 구성에 넣지 않고 실행만 함 (topology 명령으로 추가하면 사용자 상태를 이관받음)
+    topology = write_topology(args.topology, {name: urls[name] for name in names[:args.shards]}, args.vnodes)
+    logger.info(f"🧭 샤드 구성 v{topology.version}: {', '.join(topology.nodes)}")
+
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(args.topology)), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    children = []
+    for index, name in enumerate(names):
+        env = dict(
+            os.environ,
+            SHARD_ID=name,
+            SHARD_TOPOLOGY_FILE=os.path.abspath(args.topology),
+            PORT=str(args.base_port + index),
+            SERVER_MODE="production",
+            SERVER_WORKERS="1",
+            # 워커 지표 디렉터리는 샤드마다 따로 (파일 저장소는 같은 경로를 공유)
+            METRICS_SHARED_DIR=os.path.join("data", "metrics", name)
+        )
+        log_file = open(os.path.join(log_dir, f"{name}.log"), "ab")
+        children.append(subprocess.Popen([sys.executable, main_path], env=env, stdout=log_file, stderr=subprocess.STDOUT))
+        logger.info(f"👷 {name} 시작: {urls[name]} (pid {children[-1].pid}, 로그 {log_file.name})")
+
+    try:
+        serve(args)
+    finally:
+        for child in children:
+            child.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        for child in children:
+            try:
+                child.wait(timeout=max(deadline - time.monotonic(), 0.1))
+            except subprocess.TimeoutExpired:
+                child.kill()
+        logger.info("🛑 샤드 종료 완료")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="샤드 모드 라우터와 구성 도구")
+    parser.add_argument("--topology", default=settings.SHARD_TOPOLOGY_FILE, help="샤드 구성 파일")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="라우터 실행")
+    serve_parser.add_argument("--host", default="0.0.0.0", help="바인드 주소")
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)), help="라우터 포트")
+
+    topology_parser = commands.add_parser("topology", help="구성 파일의 노드 목록 교체")
+    topology_parser.add_argument("--node", action="append", default=[], help="이름=URL (반복 지정, 생략하면 현재 구성 출력)")
+    topology_parser.add_argument("--vnodes", type=int, default=DEFAULT_VNODES, help="노드당 가상 노드 수")
+
+    local_parser = commands.add_parser("local", help="한 머신에서 샤드와 라우터 함께 실행")
+    local_parser.add_argument("--shards", type=int, default=3, help="구성에 포함할 샤드 수")
+    local_parser.add_argument("--standby", type=int, default=0, help="실행만 하고 구성에 넣지 않는 대기 샤드 수")
+    local_parser.add_argument("--base-port", type=int, default=8101, help="첫 샤드 포트 (이후 1씩 증가)")
+    local_parser.add_argument("--host", default="127.0.0.1", help="라우터 바인드 주소")
+    local_parser.add_argument("--port", type=int, default=8000, help="라우터 포트")
+    local_parser.add_argument("--vnodes", type=int, default=DEFAULT_VNODES, help="노드당 가상 노드 수")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve(args)
+    if args.command == "topology":
+        if not args.node:
+            topology = load_topology(args.topology)
+            print(f"v{topology.version}: {topology.nodes} (담당 비율 {topology.ring.ownership()})")
+            return 0
+        return update_topology(args)
+    return run_local(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
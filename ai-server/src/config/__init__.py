@@ -0,0 +1 @@
+# 설정 패키지
\ No newline at end of file
@@ -0,0 +1,221 @@
+import os
+
+# 추론 워커 풀 설정
+# INFERENCE_WORKERS: 모델 추론을 수행할 스레드 수 (이벤트 루프와 분리)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+
+# 마이크로 배칭 설정
+# 동시에 들어온 단건 예측을 모아 한 번의 행렬 연산으로 처리
+MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+# 추론 엔진 설정
+# INFERENCE_ENGINE: "sklearn" (기본) 또는 "compiled" (배열 기반 포레스트 평가기)
+# COMPILED_FOREST_MAX_ROWS: 이 행 수 이하일 때만 컴파일 엔진 사용 (큰 배치는 sklearn이 더 빠름)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn").lower()
+COMPILED_FOREST_MAX_ROWS = int(os.getenv("COMPILED_FOREST_MAX_ROWS", "256"))
+
+# 사용자 기준 패턴 설정
+# PATTERN_EWMA_ALPHA: 표본이 충분히 쌓인 뒤 최근 이벤트에 주는 최소 가중치
+# PATTERN_MIN_SAMPLES: 편차 특성을 계산하기 위한 최소 표본 수
+PATTERN_EWMA_ALPHA = float(os.getenv("PATTERN_EWMA_ALPHA", "0.05"))
+PATTERN_MIN_SAMPLES = int(os.getenv("PATTERN_MIN_SAMPLES", "5"))
+
+# 사용자 기준 패턴 저장소 설정
+# BASELINE_STORAGE: "mmap" (파일 공유/영속, 기본) 또는 "memory" (프로세스 메모리)
+# BASELINE_STORAGE_CAPACITY: mmap 저장소 슬롯 수 (예상 사용자 수 / 0.7 이상이면 운영 중 확장 없음, 작은 기존 파일은 시작 시 확장)
+# BASELINE_FLUSH_INTERVAL_SECONDS: 디스크 동기화 및 압축 검사 주기
+BASELINE_STORAGE = os.getenv("BASELINE_STORAGE", "mmap").lower()
+BASELINE_STORAGE_PATH = os.getenv("BASELINE_STORAGE_PATH", "data/user_baselines.bin")
+BASELINE_STORAGE_CAPACITY = int(os.getenv("BASELINE_STORAGE_CAPACITY", "131072"))
+BASELINE_FLUSH_INTERVAL_SECONDS = float(os.getenv("BASELINE_FLUSH_INTERVAL_SECONDS", "30"))
+
+# 위치 이력 설정
+# LOCATION_HISTORY_SIZE: 사용자별로 보관하는 최근 위치 수 (링 버퍼)
+# LOCATION_WINDOW_HOURS: 위치 특성 계산에 사용하는 최근 시간 범위
+LOCATION_HISTORY_SIZE = int(os.getenv("LOCATION_HISTORY_SIZE", "16"))
+LOCATION_WINDOW_HOURS = float(os.getenv("LOCATION_WINDOW_HOURS", "24"))
+
+# 분석 결과 캐시 설정
+# RESULT_CACHE_SIZE: 캐시에 보관할 최대 결과 수 (0이면 비활성화)
+# RESULT_CACHE_TTL_SECONDS: 결과 재사용 시간
+# RESULT_CACHE_SCREEN_TIME_STEP: 화면 사용 시간 양자화 단위 (분, 규칙 임계값 30/60의 약수)
+# RESULT_CACHE_CHECKIN_STEP_HOURS: 체크인 경과 시간 양자화 단위 (시간, 규칙 임계값 12/24/48의 약수)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+RESULT_CACHE_SCREEN_TIME_STEP = int(os.getenv("RESULT_CACHE_SCREEN_TIME_STEP", "5"))
+RESULT_CACHE_CHECKIN_STEP_HOURS = float(os.getenv("RESULT_CACHE_CHECKIN_STEP_HOURS", "0.25"))
+
+# 모델 아티팩트 설정
+# MODEL_ARTIFACT_DIR: build_model.py로 만든 버전별 아티팩트 루트 (있으면 가장 먼저 사용)
+# MODEL_ARTIFACT_VERSION: 사용할 아티팩트 버전 (비우면 LATEST 파일의 버전)
+# MODEL_TRAIN_ON_STARTUP: 아티팩트와 저장된 모델이 모두 없을 때 기동 중 기본 모델을 학습할지 여부
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "models/artifacts")
+MODEL_ARTIFACT_VERSION = os.getenv("MODEL_ARTIFACT_VERSION", "")
+MODEL_TRAIN_ON_STARTUP = os.getenv("MODEL_TRAIN_ON_STARTUP", "true").lower() == "true"
+
+# 서버 실행 설정
+# SERVER_MODE: "development" (단일 프로세스, 코드 변경 시 자동 재시작) 또는 "production" (멀티 워커, reload 없음)
+# SERVER_WORKERS: production 모드 워커 프로세스 수 (0이면 CPU 코어 수)
+SERVER_MODE = os.getenv("SERVER_MODE", "development").lower()
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+
+# 워커 간 지표 집계 설정
+# METRICS_SHARED_DIR: 워커별 지표 상태를 모으는 디렉터리 (비우면 프로세스별 지표, production 기본값 data/metrics)
+# METRICS_PUBLISH_INTERVAL_SECONDS: 워커가 자기 지표 상태를 기록하는 주기
+METRICS_SHARED_DIR = os.getenv("METRICS_SHARED_DIR", "data/metrics" if SERVER_MODE == "production" else "")
+METRICS_PUBLISH_INTERVAL_SECONDS = float(os.getenv("METRICS_PUBLISH_INTERVAL_SECONDS", "1"))
+
+# 모델 교체 설정
+# MODEL_WATCH_INTERVAL_SECONDS: 아티팩트 LATEST 파일 확인 주기 (0이면 감시하지 않음, production 기본값 10)
+# SHADOW_SAMPLE_RATE: 섀도 모델로 함께 채점할 추론 배치 비율 (0~1)
+MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", "10" if SERVER_MODE == "production" else "0"))
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "1.0"))
+
+# 전체 사용자 일괄 분석 설정 (sweep.py)
+# SWEEP_CHUNK_SIZE: 한 번에 읽어 채점하는 행 수 (메모리 사용량 상한)
+# SWEEP_RISK_THRESHOLD: 결과로 내보낼 최소 위험도 (0-10)
+SWEEP_CHUNK_SIZE = int(os.getenv("SWEEP_CHUNK_SIZE", "100000"))
+SWEEP_RISK_THRESHOLD = float(os.getenv("SWEEP_RISK_THRESHOLD", "5"))
+
+# 단계별 처리 시간 및 프로파일러 설정
+# STAGE_TIMING_ENABLED: 요청 처리 단계(파싱, 특성, 추론, 규칙, 직렬화 등)별 소요 시간 집계
+# PROFILER_ENABLED: /debug/profile 샘플링 프로파일러 엔드포인트 허용 여부 (기본 비활성화)
+# PROFILER_MAX_SECONDS: 프로파일 1회 최대 실행 시간
+STAGE_TIMING_ENABLED = os.getenv("STAGE_TIMING_ENABLED", "true").lower() == "true"
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+# 로깅 설정
+# LOG_LEVEL: 루트 로거 수준
+# LOG_FORMAT: "json" (한 줄에 하나의 JSON 객체, 기본) 또는 "text" (개발용)
+# LOG_ASYNC: 큐에 넣고 백그라운드 스레드에서 포맷/기록 (false면 호출한 스레드에서 바로 기록)
+# LOG_QUEUE_SIZE: 기록 대기 큐 크기 (가득 차면 버리고 버린 건수를 다음 로그에 표시)
+# LOG_ROUTE_RATE_PER_SECOND: route별 초당 최대 INFO 로그 수 (요청별 성공 로그, 접근 로그 / 0이면 제한 없음)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_ROUTE_RATE_PER_SECOND = float(os.getenv("LOG_ROUTE_RATE_PER_SECOND", "5"))
+
+# 스트리밍 원격 측정 수집 설정 (/stream/telemetry)
+# STREAM_FLUSH_INTERVAL_MS: 값이 바뀐 사용자를 모아 한 번에 재채점하는 간격
+# STREAM_ALERT_THRESHOLD: 위험도 변화를 연결로 보내는 기준 (이전 또는 새 위험도가 이 값 이상일 때)
+# STREAM_MAX_USERS: 워커별로 상태를 보관하는 최대 사용자 수 (오래 이벤트가 없던 사용자부터 제거)
+# STREAM_OUTBOX_SIZE: WebSocket 연결별 미전송 메시지 최대 수 (넘으면 오래된 메시지부터 버림)
+# STREAM_MAX_LINE_BYTES: NDJSON 이벤트 한 줄의 최대 크기
+STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "50"))
+STREAM_ALERT_THRESHOLD = int(os.getenv("STREAM_ALERT_THRESHOLD", "5"))
+STREAM_MAX_USERS = int(os.getenv("STREAM_MAX_USERS", "100000"))
+STREAM_OUTBOX_SIZE = int(os.getenv("STREAM_OUTBOX_SIZE", "1000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+# 비활동 감시 설정 (체크인 공백 12/24/48시간 경보, 규칙 엔진 체크인 점수 구간과 동일)
+# WATCHDOG_ENABLED: 요청/스트리밍/패턴 학습으로 들어온 체크인 시각을 기준으로 경보 예약
+#   (체크인 시각은 기준 패턴 저장소에도 기록되어 워커 간에 공유되며, 재시작 시 이 시각으로 예약을 복원)
+# WATCHDOG_TICK_SECONDS: 타이밍 휠 한 칸의 시간 (경보 시각 해상도)
+# WATCHDOG_SINK: "log" (경보를 로그로만 기록, 기본), "webhook" 또는 "패키지.모듈:클래스"
+# WATCHDOG_WEBHOOK_URL: webhook sink가 경보 목록을 POST할 주소
+WATCHDOG_ENABLED = os.getenv("WATCHDOG_ENABLED", "true").lower() == "true"
+WATCHDOG_TICK_SECONDS = float(os.getenv("WATCHDOG_TICK_SECONDS", "30"))
+WATCHDOG_SINK = os.getenv("WATCHDOG_SINK", "log")
+WATCHDOG_WEBHOOK_URL = os.getenv("WATCHDOG_WEBHOOK_URL", "")
+
+# 재학습 설정 (레이블이 붙은 분석 결과를 쌓아 별도 프로세스에서 재학습, retrain.py)
+# TRAINING_DATA_DIR: 레이블 데이터(일 단위 CSV 세그먼트)를 쌓는 디렉터리
+# OUTCOME_RECENT_USERS: 레이블만 보낸 경우 사용할 사용자별 최근 모델 입력을 보관하는 최대 사용자 수 (워커별)
+# RETRAIN_N_JOBS: 학습에 사용할 CPU 코어 수 (서빙 워커와 코어를 나눠 쓰도록 작게 유지)
+# RETRAIN_NICE: 서버가 시작한 재학습 프로세스의 nice 값 (높을수록 서빙에 CPU를 양보)
+# RETRAIN_CPU_SECONDS: 재학습 프로세스의 CPU 시간 상한 (RLIMIT_CPU, 0이면 제한 없음)
+# RETRAIN_MAX_ROWS: 학습/평가에 사용할 최대 행 수 (넘으면 균등 표본 추출, 메모리 상한)
+# RETRAIN_CHUNK_SIZE: 데이터셋을 한 번에 읽는 행 수
+# RETRAIN_HOLDOUT_FRACTION: 평가용으로 떼어 두는 사용자 비율 (같은 사용자가 학습/평가에 섞이지 않음)
+# RETRAIN_MIN_ROWS: 재학습에 필요한 최소 학습 행 수
+# RETRAIN_MIN_IMPROVEMENT: 배포 조건 (후보 macro F1 - 현재 모델 macro F1 > 이 값)
+# RETRAIN_WARM_START: 현재 모델의 트리를 유지하고 RETRAIN_WARM_START_TREES개만 추가 학습
+# RETRAIN_MAX_TREES: 웜 스타트로 늘어날 수 있는 최대 트리 수 (넘으면 처음부터 학습)
+TRAINING_DATA_DIR = os.getenv("TRAINING_DATA_DIR", "data/training")
+OUTCOME_RECENT_USERS = int(os.getenv("OUTCOME_RECENT_USERS", "100000"))
+RETRAIN_N_JOBS = int(os.getenv("RETRAIN_N_JOBS", "1"))
+RETRAIN_NICE = int(os.getenv("RETRAIN_NICE", "10"))
+RETRAIN_CPU_SECONDS = int(os.getenv("RETRAIN_CPU_SECONDS", "1800"))
+RETRAIN_MAX_ROWS = int(os.getenv("RETRAIN_MAX_ROWS", "1000000"))
+RETRAIN_CHUNK_SIZE = int(os.getenv("RETRAIN_CHUNK_SIZE", "100000"))
+RETRAIN_HOLDOUT_FRACTION = float(os.getenv("RETRAIN_HOLDOUT_FRACTION", "0.2"))
+RETRAIN_MIN_ROWS = int(os.getenv("RETRAIN_MIN_ROWS", "200"))
+RETRAIN_MIN_IMPROVEMENT = float(os.getenv("RETRAIN_MIN_IMPROVEMENT", "0.0"))
+RETRAIN_WARM_START = os.getenv("RETRAIN_WARM_START", "true").lower() == "true"
+RETRAIN_WARM_START_TREES = int(os.getenv("RETRAIN_WARM_START_TREES", "50"))
+RETRAIN_MAX_TREES = int(os.getenv("RETRAIN_MAX_TREES", "300"))
+
+# 위치 공간 색인 설정 (/spatial/nearby 주변 사용자 조회)
+# SPATIAL_INDEX_ENABLED: 분석 요청의 위치로 사용자별 마지막 위치를 격자 셀에 색인
+# SPATIAL_CELL_METERS: 격자 셀 크기 (자주 쓰는 조회 반경의 1/2~1/4 정도가 적당)
+# SPATIAL_MAX_RADIUS_METERS: 조회 반경 상한 (최근접 조회도 이 반경까지만 넓힘)
+# SPATIAL_MAX_RESULTS: 한 번에 반환하는 최대 이웃 수
+SPATIAL_INDEX_ENABLED = os.getenv("SPATIAL_INDEX_ENABLED", "true").lower() == "true"
+SPATIAL_CELL_METERS = float(os.getenv("SPATIAL_CELL_METERS", "500"))
+SPATIAL_MAX_RADIUS_METERS = float(os.getenv("SPATIAL_MAX_RADIUS_METERS", "5000"))
+SPATIAL_MAX_RESULTS = int(os.getenv("SPATIAL_MAX_RESULTS", "500"))
+
+# 부하 제어 설정 (워커별 처리 중 요청 수와 이벤트 루프 지연 기준)
+# ADMISSION_ENABLED: 부하 단계에 따라 분석을 규칙 기반으로 전환하고 낮은 우선순위 요청을 거절
+# ADMISSION_DEGRADE_IN_FLIGHT / ADMISSION_DEGRADE_LAG_MS: 넘으면 분석 요청을 모델 대신 규칙 기반으로 채점
+# ADMISSION_REJECT_IN_FLIGHT / ADMISSION_REJECT_LAG_MS: 넘으면 낮은 우선순위 요청을 503 + Retry-After로 거절
+# ADMISSION_LAG_INTERVAL_MS: 이벤트 루프 지연 측정 주기
+# ADMISSION_RETRY_AFTER_SECONDS: 거절 응답의 Retry-After 값
+# ADMISSION_LOW_PRIORITY_PATHS: 거절 대상 경로 (쉼표 구분, 분석 요청은 거절하지 않음)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_DEGRADE_IN_FLIGHT = int(os.getenv("ADMISSION_DEGRADE_IN_FLIGHT", "200"))
+ADMISSION_REJECT_IN_FLIGHT = int(os.getenv("ADMISSION_REJECT_IN_FLIGHT", "500"))
+ADMISSION_DEGRADE_LAG_MS = float(os.getenv("ADMISSION_DEGRADE_LAG_MS", "100"))
+ADMISSION_REJECT_LAG_MS = float(os.getenv("ADMISSION_REJECT_LAG_MS", "500"))
+ADMISSION_LAG_INTERVAL_MS = float(os.getenv("ADMISSION_LAG_INTERVAL_MS", "50"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+ADMISSION_LOW_PRIORITY_PATHS = [
+    path.strip()
+    for path in os.getenv(
+        "ADMISSION_LOW_PRIORITY_PATHS",
+        "/learn/pattern,/training/outcomes,/model/retrain,/debug/profile"
+    ).split(",")
+    if path.strip()
+]
+
+# 사용자 위험도 이력 설정 (/history/{user_id} 추세 조회)
+# HISTORY_ENABLED: 분석 결과(시각, 위험도, 신뢰도, 모델 입력 특성)를 사용자별 이력으로 기록
+# HISTORY_DIR: 열 단위 세그먼트 디렉터리 (멀티 워커는 같은 디렉터리 공유)
+# HISTORY_FLUSH_INTERVAL_SECONDS / HISTORY_MEMTABLE_ROWS: 메모리 버퍼를 세그먼트로 기록하는 주기 / 행 수
+# HISTORY_RAW_RETENTION_DAYS: 건별 기록 보관 기간 (지나면 사용자별 1시간 요약으로 롤업)
+# HISTORY_RETENTION_DAYS: 이력 보관 기간
+# HISTORY_MAINTENANCE_INTERVAL_SECONDS: 세그먼트 병합/롤업/삭제 주기
+# HISTORY_MAX_POINTS: 건별 조회 시 반환하는 최대 기록 수 (최신 기록 우선)
+# HISTORY_TZ_OFFSET_HOURS: 일/주 단위 구간 경계의 UTC 오프셋 (기본 KST)
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+HISTORY_DIR = os.getenv("HISTORY_DIR", "data/history")
+HISTORY_FLUSH_INTERVAL_SECONDS = float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "60"))
+HISTORY_MEMTABLE_ROWS = int(os.getenv("HISTORY_MEMTABLE_ROWS", "100000"))
+HISTORY_RAW_RETENTION_DAYS = float(os.getenv("HISTORY_RAW_RETENTION_DAYS", "7"))
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "365"))
+HISTORY_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("HISTORY_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "10000"))
+HISTORY_TZ_OFFSET_HOURS = float(os.getenv("HISTORY_TZ_OFFSET_HOURS", "9"))
+
+# 샤드 모드 설정 (user_id consistent hash로 사용자별 상태를 여러 서버에 분산)
+# SHARD_ID: 이 서버의 샤드 이름 (구성 파일의 노드 이름, 비어 있으면 샤드 모드 비활성화)
+# SHARD_TOPOLOGY_FILE: 샤드 구성 파일 ({"version", "nodes": {이름: URL}, "vnodes"}, 라우터와 공유)
+# SHARD_WATCH_INTERVAL_SECONDS: 구성 파일 확인 주기 (버전이 바뀌면 담당이 바뀐 사용자 상태를 이관)
+# SHARD_HANDOFF_BATCH_USERS: 이관 요청 한 번에 보내는 사용자 수
+# SHARD_HANDOFF_TIMEOUT_SECONDS: 이관 요청 제한 시간
+# 샤드 모드는 사용자별 메모리 상태를 샤드마다 한 벌로 유지하기 위해 SERVER_WORKERS와 관계없이 워커 1개로 실행함
+SHARD_ID = os.getenv("SHARD_ID", "")
+SHARD_TOPOLOGY_FILE = os.getenv("SHARD_TOPOLOGY_FILE", "data/shards/topology.json")
+SHARD_WATCH_INTERVAL_SECONDS = float(os.getenv("SHARD_WATCH_INTERVAL_SECONDS", "2"))
+SHARD_HANDOFF_BATCH_USERS = int(os.getenv("SHARD_HANDOFF_BATCH_USERS", "1000"))
+SHARD_HANDOFF_TIMEOUT_SECONDS = float(os.getenv("SHARD_HANDOFF_TIMEOUT_SECONDS", "10"))
+
+# 샤드 라우터 설정 (shard_router.py)
+# ROUTER_TIMEOUT_SECONDS: 샤드로 전달한 요청의 제한 시간
+# ROUTER_MAX_CONNECTIONS: 샤드 전체에 대해 유지하는 최대 연결 수
+ROUTER_TIMEOUT_SECONDS = float(os.getenv("ROUTER_TIMEOUT_SECONDS", "10"))
+ROUTER_MAX_CONNECTIONS = int(os.getenv("ROUTER_MAX_CONNECTIONS", "200"))
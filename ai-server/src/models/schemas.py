@@ -1,23 +1,38 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
 class AppUsageData(BaseModel):
     screen_time: int = Field(..., description="화면 사용 시간 (분)")
     app_open_count: int = Field(..., description="앱 실행 횟수")
-    last_activity: str = Field(..., description="마지막 활동 시간 (ISO format)")
+    last_activity: Optional[str] = Field(None, description="마지막 활동 시간 (ISO format)")
+    last_activity_ts: Optional[float] = Field(None, description="마지막 활동 시간 (epoch 초, 지정 시 ISO 값보다 우선)")
+
+    @model_validator(mode="after")
+    def check_last_activity(self):
+        if self.last_activity is None and self.last_activity_ts is None:
+            raise ValueError("last_activity 또는 last_activity_ts 중 하나는 필요합니다")
+        return self
 
 class LocationData(BaseModel):
     latitude: float = Field(..., description="위도")
     longitude: float = Field(..., description="경도")
     accuracy: float = Field(..., description="위치 정확도 (미터)")
-    timestamp: str = Field(..., description="위치 기록 시간 (ISO format)")
+    timestamp: Optional[str] = Field(None, description="위치 기록 시간 (ISO format)")
+    timestamp_ts: Optional[float] = Field(None, description="위치 기록 시간 (epoch 초, 지정 시 ISO 값보다 우선)")
+
+    @model_validator(mode="after")
+    def check_timestamp(self):
+        if self.timestamp is None and self.timestamp_ts is None:
+            raise ValueError("timestamp 또는 timestamp_ts 중 하나는 필요합니다")
+        return self
 
 class SafetyAnalysisRequest(BaseModel):
     user_id: str = Field(..., description="사용자 ID")
     app_usage: AppUsageData = Field(..., description="앱 사용 데이터")
     location: Optional[LocationData] = Field(None, description="위치 데이터")
     last_checkin: Optional[str] = Field(None, description="마지막 체크인 시간 (ISO format)")
+    last_checkin_ts: Optional[float] = Field(None, description="마지막 체크인 시간 (epoch 초, 지정 시 ISO 값보다 우선)")
     additional_data: Optional[Dict[str, Any]] = Field(None, description="추가 데이터")
 
 class SafetyAnalysisResponse(BaseModel):
@@ -29,12 +44,34 @@ class SafetyAnalysisResponse(BaseModel):
     model_version: str = Field(..., description="사용된 모델 버전")
     analysis_details: Optional[Dict[str, Any]] = Field(None, description="분석 상세 정보")
 
+class SafetyBatchAnalysisRequest(BaseModel):
+    requests: List[SafetyAnalysisRequest] = Field(
+        ..., description="분석할 요청 목록", min_length=1, max_length=1000
+    )
+
+class SafetyBatchAnalysisResponse(BaseModel):
+    results: List[SafetyAnalysisResponse] = Field(..., description="요청 순서와 동일한 분석 결과")
+    total: int = Field(..., description="분석된 요청 수")
+    response_time_ms: int = Field(..., description="배치 전체 처리 시간 (밀리초)")
+
 class UserPatternData(BaseModel):
     user_id: str = Field(..., description="사용자 ID")
     activity_pattern: Dict[str, Any] = Field(..., description="활동 패턴 데이터")
     behavioral_data: Dict[str, Any] = Field(..., description="행동 데이터")
     timestamp: str = Field(..., description="데이터 수집 시간")
 
+class OutcomeRecord(BaseModel):
+    user_id: str = Field(..., description="사용자 ID")
+    label: Union[int, str] = Field(..., description="확인된 결과: 0/1/2 또는 safe/caution/danger")
+    features: Optional[Dict[str, float]] = Field(
+        None, description="분석 당시 모델 입력 특성 (없으면 이 워커가 최근 분석한 해당 사용자의 특성 사용)"
+    )
+
+class OutcomeBatchRequest(BaseModel):
+    outcomes: List[OutcomeRecord] = Field(
+        ..., description="재학습 데이터로 추가할 결과 목록", min_length=1, max_length=1000
+    )
+
 class ModelStatus(BaseModel):
     model_name: str = Field(..., description="모델 이름")
     version: str = Field(..., description="모델 버전")
@@ -42,12 +79,25 @@ class ModelStatus(BaseModel):
     last_trained: Optional[str] = Field(None, description="마지막 학습 시간")
     accuracy: Optional[float] = Field(None, description="모델 정확도")
     total_predictions: int = Field(0, description="총 예측 횟수")
+    inference_engine: Optional[str] = Field(None, description="사용 중인 추론 엔진 (sklearn/compiled)")
+    loaded_at: Optional[str] = Field(None, description="현재 모델을 로드한 시간")
+    shadow: Optional[Dict[str, Any]] = Field(None, description="섀도 채점 중인 후보 모델과 활성 모델 비교 통계")
+    result_cache: Optional[Dict[str, Any]] = Field(None, description="분석 결과 캐시 통계 (적중/미스/제거)")
 
 class PerformanceMetrics(BaseModel):
-    accuracy: float = Field(..., description="정확도")
-    precision: float = Field(..., description="정밀도")
-    recall: float = Field(..., description="재현율")
-    f1_score: float = Field(..., description="F1 점수")
+    accuracy: Optional[float] = Field(None, description="정확도 (재학습 holdout 평가, 평가하지 않은 모델은 None)")
+    precision: Optional[float] = Field(None, description="정밀도 (클래스 평균)")
+    recall: Optional[float] = Field(None, description="재현율 (클래스 평균)")
+    f1_score: Optional[float] = Field(None, description="F1 점수 (클래스 평균)")
+    evaluation: Optional[Dict[str, Any]] = Field(None, description="활성 모델의 holdout 평가 정보 (평가 행 수, 이전 모델 지표, 학습 시간)")
     total_predictions: int = Field(..., description="총 예측 횟수")
     avg_response_time: float = Field(..., description="평균 응답 시간 (초)")
     last_updated: str = Field(..., description="마지막 업데이트 시간")
+    latency: Optional[Dict[str, Any]] = Field(None, description="분석 방법별 지연 시간 분위수 (ms)")
+    throughput: Optional[Dict[str, Any]] = Field(None, description="분석 방법별 초당 처리량")
+    inference_pool: Optional[Dict[str, Any]] = Field(None, description="추론 워커 풀 대기열/대기 시간 통계")
+    micro_batching: Optional[Dict[str, Any]] = Field(None, description="마이크로 배칭 배치 크기 통계")
+    workers: Optional[Dict[str, Any]] = Field(None, description="멀티 워커 실행 시 워커별 예측 횟수 (지연 시간/처리량은 전체 합산)")
+    stages: Optional[Dict[str, Any]] = Field(None, description="요청 처리 단계별 소요 시간 분위수 (ms, batch.* 와 model.* 은 호출당)")
+    streaming: Optional[Dict[str, Any]] = Field(None, description="이 워커의 스트리밍 원격 측정 수집 통계 (연결, 사용자, 재채점, 전송 수)")
+    admission: Optional[Dict[str, Any]] = Field(None, description="이 워커의 부하 단계, 처리 중 요청 수, 이벤트 루프 지연, 규칙 기반 전환/거절 수")
@@ -0,0 +1 @@
+# 서버 실행 패키지
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# 부하 단계
+LEVEL_NORMAL = "normal"
+LEVEL_DEGRADED = "degraded"
+LEVEL_SHEDDING = "shedding"
+
+# 이벤트 루프 지연 추정치가 샘플마다 줄어드는 비율 (급증은 바로 반영, 회복은 천천히)
+LAG_DECAY = 0.8
+
+
+class AdmissionController:
+    """처리 중인 요청 수와 이벤트 루프 지연으로 부하 단계를 판정
+
+    - degraded: 처리 중 요청이 degrade_in_flight 이상이거나 루프 지연이 degrade_lag_ms 이상.
+      분석 요청은 모델 대신 규칙 기반으로 채점한다.
+    - shedding: reject_in_flight 또는 reject_lag_ms 이상. 낮은 우선순위 요청을 503으로 거절한다
+      (분석 요청은 거절하지 않고 계속 규칙 기반으로 처리).
+
+    루프 지연은 lag_interval마다 sleep이 늦게 깨어난 시간으로 측정하며, 급증은 바로 반영하고
+    감소는 샘플마다 LAG_DECAY 비율로 천천히 반영하여 단계가 빠르게 오가지 않게 한다.
+    워커 프로세스마다 따로 판정한다.
+    """
+
+    def __init__(
+        self,
+        degrade_in_flight: int = 200,
+        reject_in_flight: int = 500,
+        degrade_lag_ms: float = 100.0,
+        reject_lag_ms: float = 500.0,
+        lag_interval: float = 0.05,
+        retry_after_seconds: int = 1
+    ):
+        self.degrade_in_flight = degrade_in_flight
+        self.reject_in_flight = reject_in_flight
+        self.degrade_lag_ms = degrade_lag_ms
+        self.reject_lag_ms = reject_lag_ms
+        self.lag_interval = lag_interval
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.loop_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._last_level = LEVEL_NORMAL
+        self.total_degraded = 0
+        self.total_rejected = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._lag_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _lag_loop(self):
+        while True:
+            expected = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag_ms = max(time.perf_counter() - expected, 0.0) * 1000
+            self.loop_lag_ms = max(lag_ms, self.loop_lag_ms * LAG_DECAY)
+            self._log_transition()
+
+    @property
+    def level(self) -> str:
+        if self.in_flight >= self.reject_in_flight or self.loop_lag_ms >= self.reject_lag_ms:
+            return LEVEL_SHEDDING
+        if self.in_flight >= self.degrade_in_flight or self.loop_lag_ms >= self.degrade_lag_ms:
+            return LEVEL_DEGRADED
+        return LEVEL_NORMAL
+
+    def should_degrade(self) -> bool:
+        """분석 요청을 규칙 기반으로 처리해야 하는지 (호출하면 부하 경감 건수에 집계)"""
+        if self.level == LEVEL_NORMAL:
+            return False
+        self.total_degraded += 1
+        return True
+
+    def _log_transition(self):
+        level = self.level
+        if level == self._last_level:
+            return
+        log = logger.info if level == LEVEL_NORMAL else logger.warning
+        log(
+            f"🚦 부하 단계 변경: {self._last_level} -> {level} "
+            f"(처리 중 {self.in_flight}건, 루프 지연 {self.loop_lag_ms:.0f}ms)"
+        )
+        self._last_level = level
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
+            "degraded": self.total_degraded,
+            "rejected": self.total_rejected,
+            "thresholds": {
+                "degrade_in_flight": self.degrade_in_flight,
+                "reject_in_flight": self.reject_in_flight,
+                "degrade_lag_ms": self.degrade_lag_ms,
+                "reject_lag_ms": self.reject_lag_ms
+            }
+        }
+
+
+class AdmissionControlMiddleware:
+    """HTTP 요청의 처리 중 건수를 세고, shedding 단계에서 낮은 우선순위 경로를 503으로 거절하는 ASGI 미들웨어
+
+    untracked_prefixes 경로(장시간 열려 있는 스트리밍 요청 등)는 처리 중 건수에서 제외한다.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        low_priority_paths: Iterable[str] = (),
+        untracked_prefixes: Iterable[str] = ()
+    ):
+        self.app = app
+        self.controller = controller
+        self.low_priority_paths = frozenset(low_priority_paths)
+        self.untracked_prefixes = tuple(untracked_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.untracked_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if scope["path"] in self.low_priority_paths and controller.level == LEVEL_SHEDDING:
+            controller.total_rejected += 1
+            response = JSONResponse(
+                {"detail": "서버 부하가 높아 요청을 처리할 수 없습니다. 잠시 후 다시 시도해주세요."},
+                status_code=503,
+                headers={"Retry-After": str(controller.retry_after_seconds)}
+            )
+            await response(scope, receive, send)
+            return
+
+        controller.in_flight += 1
+        if controller.in_flight > controller.max_in_flight:
+            controller.max_in_flight = controller.in_flight
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
@@ -0,0 +1,20 @@
+import time
+
+# 요청 수신 시각(perf_counter_ns)을 담는 request.state 속성 이름
+RECEIVED_NS_STATE = "received_ns"
+
+
+class RequestTimingMiddleware:
+    """요청 수신 시각을 request.state에 기록하는 ASGI 미들웨어
+
+    엔드포인트는 이 값으로 본문 읽기/검증(파싱) 단계 시간을 계산한다. BaseHTTPMiddleware와
+    달리 요청/응답을 감싸지 않으므로 요청당 비용은 시각 기록 한 번뿐이다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})[RECEIVED_NS_STATE] = time.perf_counter_ns()
+        await self.app(scope, receive, send)
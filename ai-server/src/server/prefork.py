@@ -0,0 +1,106 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Optional, Set
+
+import uvicorn
+
+from src.utils.structured_logging import stop_logging
+
+logger = logging.getLogger(__name__)
+
+# 워커가 비정상 종료했을 때 다시 띄우기 전 대기 시간 (연속 크래시 시 CPU 점유 방지)
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+def run_prefork(
+    app,
+    host: str,
+    port: int,
+    workers: int,
+    preload: Optional[Callable[[], None]] = None,
+    log_level: str = "info"
+):
+    """모델을 한 번 로드한 뒤 fork한 여러 uvicorn 워커로 같은 소켓을 서비스 (Linux/macOS 전용)
+
+    - preload()는 부모 프로세스에서 한 번 실행된다. 여기서 로드한 모델 배열은 fork 후
+      copy-on-write로 모든 워커가 공유하고, mmap 아티팩트는 페이지 캐시 한 사본을 공유한다.
+    - gc.freeze()로 로드된 객체를 GC 추적 대상에서 빼서, 워커의 GC가 공유 페이지를
+      건드려 복사가 일어나는 것을 줄인다.
+    - 부모는 요청을 처리하지 않고 워커를 감시하며, 비정상 종료한 워커는 다시 띄운다.
+      SIGTERM/SIGINT를 받으면 모든 워커에 SIGTERM을 보내고 종료를 기다린다.
+    - 코드 변경 감지(reload)는 사용하지 않는다.
+    """
+    if preload is not None:
+        preload()
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Set[int] = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # 워커: 부모의 시그널 처리기를 되돌리고 공유 소켓으로 서버 실행
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                # uvicorn 로거도 루트 로거(큐 기반 핸들러)로 전달
+                server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, log_config=None))
+                server.run(sockets=[sock])
+            except BaseException as e:
+                logger.error(f"❌ 워커 {os.getpid()} 실행 실패: {str(e)}")
+                exit_code = 1
+            finally:
+                # os._exit는 atexit을 건너뛰므로 남은 로그를 직접 기록
+                stop_logging()
+                os._exit(exit_code)
+        children.add(pid)
+        logger.info(f"👷 워커 시작: pid {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logger.info(f"🛑 종료 신호 수신, 워커 {len(children)}개 종료 중...")
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"🚀 production 모드 시작: {host}:{port}, 워커 {workers}개 (pid {os.getpid()})")
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+
+        if stopping:
+            continue
+        logger.warning(f"⚠️ 워커 {pid} 종료 (상태 {status}), 다시 시작합니다")
+        time.sleep(RESPAWN_DELAY_SECONDS)
+        if not stopping:
+            spawn()
+
+    sock.close()
+    logger.info("✅ 모든 워커 종료 완료")
@@ -0,0 +1,350 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+from ..config import settings
+from .sharding import Topology, TopologyWatcher
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    import json
+    json_loads = json.loads
+    json_dumps = lambda value: json.dumps(value, ensure_ascii=False).encode()
+
+# 샤드로 그대로 전달하는 요청 헤더
+FORWARDED_HEADERS = ("content-type", "accept", "x-request-id")
+
+
+class ShardRouter:
+    """user_id 담당 샤드로 요청을 전달하고, 여러 사용자가 섞인 요청은 샤드별로 나눠 보낸 뒤 합침
+
+    구성 파일(샤드 서버와 같은 파일)의 버전이 바뀌면 다음 요청부터 새 구성으로 전달한다.
+    샤드 연결은 하나의 커넥션 풀을 재사용한다.
+    """
+
+    def __init__(
+        self,
+        topology_path: str,
+        watch_interval_seconds: float = 2.0,
+        timeout_seconds: float = 10.0,
+        max_connections: int = 200
+    ):
+        self.watcher = TopologyWatcher(topology_path, watch_interval_seconds)
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self.forwarded: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+
+    @property
+    def topology(self) -> Topology:
+        topology = self.watcher.topology
+        if topology is None or not topology.nodes:
+            raise HTTPException(status_code=503, detail="샤드 구성이 없습니다")
+        return topology
+
+    def start(self):
+        self.watcher.refresh()
+        if self.watcher.topology is None:
+            logger.warning(f"⚠️ 샤드 구성 파일이 없습니다: {self.watcher.path}")
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        )
+        self.watcher.start()
+
+    async def stop(self):
+        self.watcher.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def owner(self, user_id: str) -> str:
+        return self.topology.owner(user_id)
+
+    async def send(
+        self,
+        node: str,
+        method: str,
+        path: str,
+        content: Optional[bytes] = None,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """샤드 하나로 요청 전송 (연결 실패/시간 초과는 502)"""
+        url = f"{self.topology.url(node)}{path}"
+        try:
+            response = await self._client.request(method, url, content=content, params=params, headers=headers)
+        except httpx.HTTPError as e:
+            self.failures[node] = self.failures.get(node, 0) + 1
+            logger.error(f"❌ 샤드 {node} 요청 실패: {method} {path}: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"샤드 {node}에 연결할 수 없습니다: {str(e)}")
+        self.forwarded[node] = self.forwarded.get(node, 0) + 1
+        return response
+
+    async def forward(self, node: str, request: Request, body: Optional[bytes] = None) -> Response:
+        """받은 요청을 경로/쿼리/본문 그대로 샤드로 전달하고 응답을 그대로 반환"""
+        if body is None:
+            body = await request.body()
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        response = await self.send(
+            node, request.method, request.url.path, content=body, params=request.query_params, headers=headers
+        )
+        return Response(
+            response.content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type")
+        )
+
+    async def scatter(self, groups: Dict[str, bytes], path: str, params: Any = None, content_type: str = "application/json") -> Dict[str, Any]:
+        """샤드별 본문을 동시에 전송하고 샤드별 응답 반환 (한 샤드라도 실패하면 요청 전체 실패)"""
+        nodes = list(groups)
+        responses = await asyncio.gather(*(
+            self.send(node, "POST", path, content=groups[node], params=params, headers={"content-type": content_type})
+            for node in nodes
+        ))
+        for node, response in zip(nodes, responses):
+            if response.status_code >= 400:
+                raise HTTPException(
+                    status_code=response.status_code if response.status_code < 500 else 502,
+                    detail=f"샤드 {node} 처리 실패: {response.text}"
+                )
+        return dict(zip(nodes, responses))
+
+    async def shard_status(self) -> Dict[str, Any]:
+        """샤드별 /shard/status (응답하지 않는 샤드는 오류 표시)"""
+        topology = self.topology
+
+        async def fetch(node: str):
+            try:
+                response = await self._client.get(f"{topology.url(node)}/shard/status", timeout=2.0)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                return {"error": str(e)}
+
+        results = await asyncio.gather(*(fetch(node) for node in topology.nodes))
+        return dict(zip(topology.nodes, results))
+
+
+def _split_by_owner(router: ShardRouter, items: List[Any]) -> Dict[str, List[int]]:
+    """user_id로 항목 위치를 담당 샤드별로 나눔 (user_id가 없는 항목은 첫 샤드가 검증하여 오류 반환)"""
+    topology = router.topology
+    fallback = topology.ring.nodes[0]
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        user_id = item.get("user_id") if isinstance(item, dict) else None
+        node = topology.owner(user_id) if isinstance(user_id, str) else fallback
+        groups.setdefault(node, []).append(index)
+    return groups
+
+
+def _parse_json(body: bytes) -> Any:
+    try:
+        return json_loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="JSON 형식이 아닙니다")
+
+
+def _json_response(value: Any) -> Response:
+    return Response(json_dumps(value), media_type="application/json")
+
+
+def create_router_app(router: ShardRouter) -> FastAPI:
+    """샤드 라우터 ASGI 앱 (분석 서버와 같은 경로를 제공하므로 클라이언트는 주소만 바꾸면 됨)
+
+    - 단일 사용자 요청(/analyze/safety, /learn/pattern, /history/{user_id})은 담당 샤드로 그대로 전달
+    - 배치 요청(/analyze/safety/batch, /training/outcomes, NDJSON /stream/telemetry)은 샤드별로 나눠
+      동시에 보내고 입력 순서대로 합침
+    - /spatial/nearby는 모든 샤드에 조회하여 거리순으로 합침
+    - WebSocket 스트리밍은 전달하지 않으므로 /router/owner/{user_id}로 담당 샤드를 찾아 직접 연결
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        router.start()
+        logger.info(f"🧭 샤드 라우터 시작 (구성 v{router.watcher.topology.version if router.watcher.topology else '-'})")
+        yield
+        await router.stop()
+
+    app = FastAPI(title="함께살이 AI 샤드 라우터", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health_check():
+        topology = router.watcher.topology
+        return {
+            "status": "healthy" if topology is not None and topology.nodes else "no_topology",
+            "topology_version": topology.version if topology is not None else None,
+            "shards": len(topology.nodes) if topology is not None else 0
+        }
+
+    @app.get("/router/owner/{user_id}")
+    async def get_owner(user_id: str):
+        topology = router.topology
+        node = topology.owner(user_id)
+        return {"user_id": user_id, "shard": node, "url": topology.url(node), "topology_version": topology.version}
+
+    @app.get("/router/status")
+    async def get_router_status():
+        topology = router.topology
+        return {
+            "topology": topology.to_dict(),
+            "ownership": topology.ring.ownership(),
+            "forwarded": router.forwarded,
+            "failures": router.failures,
+            "shards": await router.shard_status()
+        }
+
+    @app.post("/analyze/safety")
+    async def analyze_safety(request: Request):
+        body = await request.body()
+        payload = _parse_json(body)
+        user_id = payload.get("user_id") if isinstance(payload, dict) else None
+        if not isinstance(user_id, str):
+            raise HTTPException(status_code=422, detail="user_id가 필요합니다")
+        return await router.forward(router.owner(user_id), request, body)
+
+    @app.post("/analyze/safety/batch")
+    async def analyze_safety_batch(request: Request):
+        start = time.perf_counter()
+        payload = _parse_json(await request.body())
+        requests = payload.get("requests") if isinstance(payload, dict) else None
+        if not isinstance(requests, list) or not requests:
+            raise HTTPException(status_code=422, detail="requests 목록이 필요합니다")
+
+        groups = _split_by_owner(router, requests)
+        responses = await router.scatter(
+            {node: json_dumps({"requests": [requests[i] for i in indices]}) for node, indices in groups.items()},
+            "/analyze/safety/batch",
+            params=request.query_params
+        )
+        results: List[Any] = [None] * len(requests)
+        for node, indices in groups.items():
+            for index, result in zip(indices, json_loads(responses[node].content)["results"]):
+                results[index] = result
+        return _json_response({
+            "results": results,
+            "total": len(results),
+            "response_time_ms": int((time.perf_counter() - start) * 1000)
+        })
+
+    @app.post("/learn/pattern")
+    async def learn_user_pattern(request: Request, user_id: str):
+        return await router.forward(router.owner(user_id), request)
+
+    @app.post("/training/outcomes")
+    async def record_training_outcomes(request: Request):
+        payload = _parse_json(await request.body())
+        outcomes = payload.get("outcomes") if isinstance(payload, dict) else None
+        if not isinstance(outcomes, list) or not outcomes:
+            raise HTTPException(status_code=422, detail="outcomes 목록이 필요합니다")
+
+        groups = _split_by_owner(router, outcomes)
+        responses = await router.scatter(
+            {node: json_dumps({"outcomes": [outcomes[i] for i in indices]}) for node, indices in groups.items()},
+            "/training/outcomes"
+        )
+        recorded = 0
+        rejected = []
+        for node, indices in groups.items():
+            result = json_loads(responses[node].content)
+            recorded += result["recorded"]
+            # 샤드 응답의 위치를 원래 요청의 위치로 변환
+            rejected.extend({**item, "index": indices[item["index"]]} for item in result["rejected"])
+        rejected.sort(key=lambda item: item["index"])
+        return _json_response({"recorded": recorded, "rejected": rejected})
+
+    @app.post("/stream/telemetry")
+    async def stream_telemetry_ndjson(request: Request):
+        # 본문을 모두 받은 뒤 이벤트를 담당 샤드별 NDJSON으로 나눔 (해석할 수 없는 줄은 첫 샤드가 오류 처리)
+        events: List[Tuple[Optional[str], bytes]] = []
+        for line in (await request.body()).splitlines():
+            if not line.strip():
+                continue
+            try:
+                payload = json_loads(line)
+            except ValueError:
+                events.append((None, line))
+                continue
+            for event in payload if isinstance(payload, list) else [payload]:
+                user_id = event.get("user_id") if isinstance(event, dict) else None
+                events.append((user_id if isinstance(user_id, str) else None, json_dumps(event)))
+        if not events:
+            return Response(json_dumps({"type": "summary", "events": 0, "errors": 0}) + b"\n", media_type="application/x-ndjson")
+
+        topology = router.topology
+        fallback = topology.ring.nodes[0]
+        groups: Dict[str, List[bytes]] = {}
+        for user_id, line in events:
+            groups.setdefault(topology.owner(user_id) if user_id is not None else fallback, []).append(line)
+        responses = await router.scatter(
+            {node: b"\n".join(lines) + b"\n" for node, lines in groups.items()},
+            "/stream/telemetry",
+            content_type="application/x-ndjson"
+        )
+
+        messages = []
+        summary = {"type": "summary", "events": 0, "errors": 0}
+        for response in responses.values():
+            for line in response.content.splitlines():
+                message = json_loads(line)
+                if message.get("type") == "summary":
+                    summary["events"] += message["events"]
+                    summary["errors"] += message["errors"]
+                else:
+                    messages.append(line)
+        messages.append(json_dumps(summary))
+        return Response(b"\n".join(messages) + b"\n", media_type="application/x-ndjson")
+
+    @app.get("/history/{user_id}")
+    async def get_risk_history(request: Request, user_id: str):
+        return await router.forward(router.owner(user_id), request)
+
+    @app.get("/spatial/nearby")
+    async def find_nearby_users(
+        request: Request,
+        user_id: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        k: int = 20
+    ):
+        # 사용자 기준 조회는 담당 샤드에서 중심 위치를 얻은 뒤 모든 샤드에 좌표로 조회
+        params = dict(request.query_params)
+        if user_id is not None:
+            response = await router.send(router.owner(user_id), "GET", "/spatial/nearby", params={**params, "k": 1})
+            if response.status_code >= 400:
+                return Response(response.content, status_code=response.status_code, media_type="application/json")
+            center = json_loads(response.content)["center"]
+            params.pop("user_id")
+            params["latitude"], params["longitude"] = center["latitude"], center["longitude"]
+            # 좌표 조회 결과에는 기준 사용자 자신도 포함되므로 한 명 더 조회 (샤드의 k 상한 이내)
+            params["k"] = min(k + 1, settings.SPATIAL_MAX_RESULTS)
+        elif latitude is None or longitude is None:
+            raise HTTPException(status_code=400, detail="user_id 또는 latitude/longitude가 필요합니다")
+        else:
+            center = {"latitude": latitude, "longitude": longitude}
+
+        nodes = list(router.topology.nodes)
+        responses = await asyncio.gather(*(router.send(node, "GET", "/spatial/nearby", params=params) for node in nodes))
+        neighbors = []
+        scanned = 0
+        for node, response in zip(nodes, responses):
+            if response.status_code >= 400:
+                return Response(response.content, status_code=response.status_code, media_type="application/json")
+            result = json_loads(response.content)
+            neighbors.extend(neighbor for neighbor in result["neighbors"] if neighbor["user_id"] != user_id)
+            scanned += result["scanned"]
+        neighbors.sort(key=lambda neighbor: neighbor["distance_m"])
+        return _json_response({"neighbors": neighbors[:k], "scanned": scanned, "center": center, "shards": len(nodes)})
+
+    return app
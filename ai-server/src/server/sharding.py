@@ -0,0 +1,316 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 노드마다 링에 배치하는 가상 노드 수 (많을수록 노드별 담당 비율이 고르게 됨)
+DEFAULT_VNODES = 128
+
+
+def ring_hash(value: str) -> int:
+    """링 위치용 64비트 해시 (프로세스/호스트와 무관하게 같은 값)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """user_id를 담당 노드로 보내는 consistent hash 링
+
+    노드마다 vnodes개의 점을 링에 배치하고, user_id 해시에서 시계 방향으로 처음 만나는 점의
+    노드가 담당한다. 노드가 추가/제거되면 그 노드의 점과 인접한 구간의 사용자만 담당이 바뀐다.
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = DEFAULT_VNODES):
+        self.nodes = sorted(set(nodes))
+        self.vnodes = vnodes
+        points = sorted(
+            (ring_hash(f"{node}#{index}"), node)
+            for node in self.nodes
+            for index in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def owner(self, user_id: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect_right(self._points, ring_hash(user_id))
+        return self._owners[index % len(self._points)]
+
+    def split(self, user_ids: Iterable[str]) -> Dict[str, List[int]]:
+        """담당 노드별 입력 위치 목록 (배치 요청을 노드별로 나눌 때 사용)"""
+        groups: Dict[str, List[int]] = {}
+        for index, user_id in enumerate(user_ids):
+            groups.setdefault(self.owner(user_id), []).append(index)
+        return groups
+
+    def ownership(self) -> Dict[str, float]:
+        """노드별 담당 해시 공간 비율"""
+        if not self._points:
+            return {}
+        share = dict.fromkeys(self.nodes, 0.0)
+        previous = self._points[-1] - 2 ** 64
+        for point, node in zip(self._points, self._owners):
+            share[node] += (point - previous) / 2 ** 64
+            previous = point
+        return {node: round(value, 4) for node, value in share.items()}
+
+
+class Topology:
+    """샤드 구성: 버전, 노드 이름 -> 기본 URL, 링"""
+
+    def __init__(self, version: int, nodes: Dict[str, str], vnodes: int = DEFAULT_VNODES):
+        self.version = version
+        self.nodes = dict(nodes)
+        self.vnodes = vnodes
+        self.ring = HashRing(self.nodes, vnodes)
+
+    def owner(self, user_id: str) -> Optional[str]:
+        return self.ring.owner(user_id)
+
+    def url(self, node: str) -> str:
+        return self.nodes[node]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": self.version, "nodes": self.nodes, "vnodes": self.vnodes}
+
+
+def load_topology(path: str) -> Topology:
+    """구성 파일 읽기: {"version": 정수, "nodes": {이름: URL}, "vnodes": 정수}"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return Topology(int(data["version"]), data["nodes"], int(data.get("vnodes", DEFAULT_VNODES)))
+
+
+def write_topology(path: str, nodes: Dict[str, str], vnodes: int = DEFAULT_VNODES) -> Topology:
+    """구성 파일을 버전을 올려 원자적으로 교체 (라우터와 샤드는 버전 변경으로 새 구성을 감지)"""
+    try:
+        version = load_topology(path).version + 1
+    except FileNotFoundError:
+        version = 1
+    topology = Topology(version, nodes, vnodes)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".topology.", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(topology.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return topology
+
+
+class TopologyWatcher:
+    """구성 파일을 주기적으로 확인하여 버전이 바뀌면 on_change(이전 구성, 새 구성) 호출"""
+
+    def __init__(self, path: str, interval_seconds: float = 2.0, on_change=None):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.on_change = on_change
+        self.topology: Optional[Topology] = None
+        self._mtime = None
+        self._task = None
+
+    def refresh(self) -> bool:
+        """파일이 바뀌었으면 다시 읽음 (새 버전이면 True)"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        topology = load_topology(self.path)
+        if self.topology is not None and topology.version == self.topology.version:
+            return False
+        self.topology = topology
+        return True
+
+    def start(self):
+        self._task = asyncio.create_task(self._watch_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch_loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                previous = self.topology
+                if self.refresh():
+                    logger.info(
+                        f"🧭 샤드 구성 변경: v{previous.version if previous else '-'} -> "
+                        f"v{self.topology.version} (노드 {len(self.topology.nodes)}개)"
+                    )
+                    if self.on_change is not None:
+                        await self.on_change(previous, self.topology)
+            except Exception as e:
+                logger.error(f"❌ 샤드 구성 확인 실패: {str(e)}")
+
+
+class ShardMembership:
+    """이 서버(샤드)의 담당 범위 관리와 구성 변경 시 사용자 상태 이관
+
+    구성 버전이 바뀌면 이 샤드가 메모리에 가진 사용자 중 담당이 다른 노드로 바뀐 사용자의 상태
+    (위치 이력, 마지막 위치, 체크인 경보 예약, 최근 모델 입력, 기준 패턴)를 새 담당 노드의
+    /shard/handoff로 batch_users명씩 보내고, 전송에 성공한 사용자는 메모리에서 지운다. 실패한
+    이관은 다음 확인 주기에 다시 시도한다. 위험도 이력은 버퍼를 세그먼트로 기록해 두며,
+    파일 저장소(기준 패턴, 위험도 이력, 재학습 데이터)는 샤드 간에 공유할 수 있다.
+    """
+
+    def __init__(
+        self,
+        shard_id: str,
+        topology_path: str,
+        analyzer,
+        interval_seconds: float = 2.0,
+        batch_users: int = 1000,
+        timeout_seconds: float = 10.0
+    ):
+        self.shard_id = shard_id
+        self.analyzer = analyzer
+        self.batch_users = batch_users
+        self.timeout_seconds = timeout_seconds
+        self.interval_seconds = interval_seconds
+        self.watcher = TopologyWatcher(topology_path, interval_seconds)
+        self._pending_handoff = False
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task = None
+        self.total_sent = 0
+        self.total_received = 0
+        self.total_failures = 0
+        self.last_handoff: Optional[Dict[str, Any]] = None
+
+    @property
+    def topology(self) -> Optional[Topology]:
+        return self.watcher.topology
+
+    def owns(self, user_id: str) -> bool:
+        topology = self.topology
+        return topology is None or topology.owner(user_id) == self.shard_id
+
+    def start(self):
+        self.watcher.refresh()
+        if self.topology is not None and self.shard_id not in self.topology.nodes:
+            logger.warning(f"⚠️ 샤드 {self.shard_id}가 구성 v{self.topology.version}에 없습니다")
+        self._client = httpx.AsyncClient(timeout=self.timeout_seconds)
+        self._task = asyncio.create_task(self._membership_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _membership_loop(self):
+        """구성 변경 확인, 이관 (실패한 이관은 다음 주기에 재시도)"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                previous = self.topology
+                if self.watcher.refresh():
+                    logger.info(
+                        f"🧭 샤드 구성 변경: v{previous.version if previous else '-'} -> "
+                        f"v{self.topology.version} (노드 {len(self.topology.nodes)}개)"
+                    )
+                    self._pending_handoff = True
+                if self._pending_handoff:
+                    await self.handoff()
+            except Exception as e:
+                logger.error(f"❌ 샤드 구성 확인 실패: {str(e)}")
+
+    async def handoff(self) -> Dict[str, Any]:
+        """담당이 바뀐 사용자 상태를 새 담당 노드로 전송"""
+        topology = self.topology
+        if topology is None or not self._pending_handoff:
+            return {"sent": 0}
+        start = time.perf_counter()
+        # 아직 기록되지 않은 위험도 이력을 세그먼트로 남김 (공유 저장소면 새 담당 노드가 바로 조회 가능)
+        # 버퍼 분리는 이력을 추가하는 이벤트 루프에서, 파일 기록만 스레드에서 실행
+        history = self.analyzer.risk_history
+        if history is not None:
+            memtable = history.detach_memtable()
+            if memtable is not None:
+                await asyncio.to_thread(history.flush_memtable, memtable)
+
+        moved: Dict[str, List[str]] = {}
+        for user_id in self.analyzer.known_users():
+            owner = topology.owner(user_id)
+            if owner is not None and owner != self.shard_id:
+                moved.setdefault(owner, []).append(user_id)
+
+        sent = 0
+        failed = 0
+        for owner, user_ids in moved.items():
+            for offset in range(0, len(user_ids), self.batch_users):
+                chunk = user_ids[offset:offset + self.batch_users]
+                payload = {
+                    "from": self.shard_id,
+                    "version": topology.version,
+                    "users": self.analyzer.export_user_state(chunk)
+                }
+                try:
+                    response = await self._client.post(f"{topology.url(owner)}/shard/handoff", json=payload)
+                    response.raise_for_status()
+                except Exception as e:
+                    failed += len(chunk)
+                    logger.error(f"❌ 사용자 상태 이관 실패 ({self.shard_id} -> {owner}, {len(chunk)}명): {str(e)}")
+                    continue
+                self.analyzer.forget_users(chunk)
+                sent += len(chunk)
+
+        self.total_sent += sent
+        self.total_failures += failed
+        self._pending_handoff = failed > 0
+        self.last_handoff = {
+            "version": topology.version,
+            "sent": sent,
+            "failed": failed,
+            "targets": {owner: len(user_ids) for owner, user_ids in moved.items()},
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "at": time.time()
+        }
+        if moved:
+            logger.info(f"📦 사용자 상태 이관: {sent}명 전송, {failed}명 실패 (구성 v{topology.version})")
+        return self.last_handoff
+
+    def receive(self, payload: Dict[str, Any]) -> int:
+        """다른 샤드가 보낸 사용자 상태 반영"""
+        imported = self.analyzer.import_user_state(payload.get("users", {}))
+        self.total_received += imported
+        return imported
+
+    def get_stats(self) -> Dict[str, Any]:
+        topology = self.topology
+        known_users = self.analyzer.known_users()
+        return {
+            "shard_id": self.shard_id,
+            "topology_version": topology.version if topology is not None else None,
+            "nodes": topology.nodes if topology is not None else {},
+            "ownership": topology.ring.ownership().get(self.shard_id) if topology is not None else None,
+            "known_users": len(known_users),
+            # 담당이 아닌데 메모리에 남아 있는 사용자 (이관 대기 또는 잘못 전달된 요청)
+            "foreign_users": sum(1 for user_id in known_users if not self.owns(user_id)),
+            "handoff_pending": self._pending_handoff,
+            "sent": self.total_sent,
+            "received": self.total_received,
+            "failures": self.total_failures,
+            "last_handoff": self.last_handoff
+        }
@@ -0,0 +1,438 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 파일 헤더 (64바이트 고정)
+STORAGE_MAGIC = b"TLBASE01"
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("record_size", np.uint32),
+    ("key_size", np.uint32),
+    ("capacity", np.uint64),
+    ("count", np.uint64),
+    ("tombstones", np.uint64),
+    # 파일이 재구성(확장/압축)되어 교체되면 1로 표시 -> 다른 프로세스가 다시 매핑
+    ("retired", np.uint8),
+    ("_reserved", "V23"),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+# 슬롯 상태
+SLOT_EMPTY = 0
+SLOT_USED = 1
+SLOT_DELETED = 2
+
+# 확장 기준 적재율 (사용 + 삭제 표시 슬롯 기준)
+MAX_LOAD_FACTOR = 0.7
+
+# seqlock 읽기 재시도 한도
+MAX_READ_RETRIES = 1000
+
+
+def encode_key(user_id: str, key_size: int) -> bytes:
+    """user_id를 고정 길이 키로 변환 (너무 길면 해시로 대체)"""
+    key = user_id.encode("utf-8")
+    if len(key) > key_size:
+        key = b"#" + hashlib.blake2b(key, digest_size=(key_size - 1) // 2).hexdigest().encode()
+    return key
+
+
+def decode_key(key: bytes) -> Optional[str]:
+    """고정 길이 키를 user_id로 복원 (해시로 대체된 긴 user_id는 복원할 수 없어 None)"""
+    if key.startswith(b"#"):
+        return None
+    return key.decode("utf-8")
+
+
+class InMemoryRecordStorage:
+    """프로세스 메모리에 레코드를 보관하는 저장소 (재시작 시 소실)"""
+
+    def __init__(self, record_dtype: np.dtype, initial_capacity: int = 1024):
+        self.record_dtype = record_dtype
+        self._records = np.zeros(initial_capacity, dtype=record_dtype)
+        self._index: Dict[str, int] = {}
+        self._free = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def nbytes(self) -> int:
+        return self._records.nbytes
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """읽기-수정-쓰기를 원자적으로 수행하기 위한 쓰기 잠금"""
+        with self._lock:
+            yield
+
+    def slot_for(self, user_id: str, create: bool = False) -> Optional[int]:
+        slot = self._index.get(user_id)
+        if slot is not None or not create:
+            return slot
+
+        with self._lock:
+            slot = self._index.get(user_id)
+            if slot is not None:
+                return slot
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._index)
+                if slot >= len(self._records):
+                    # 용량 두 배 확장 (분할 상환 O(1))
+                    grown = np.zeros(len(self._records) * 2, dtype=self.record_dtype)
+                    grown[:len(self._records)] = self._records
+                    self._records = grown
+            self._records[slot] = np.zeros(1, dtype=self.record_dtype)[0]
+            self._index[user_id] = slot
+        return slot
+
+    def read(self, slot: int) -> tuple:
+        return self._records[slot].item()
+
+    def write(self, slot: int, values: tuple):
+        self._records[slot] = values
+
+    def column(self, name: str) -> Tuple[List[str], np.ndarray]:
+        """저장된 모든 사용자의 (user_id 목록, 필드 값 배열)"""
+        with self._lock:
+            user_ids = list(self._index)
+            values = self._records[name][list(self._index.values())]
+        return user_ids, values
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            slot = self._index.pop(user_id, None)
+            if slot is None:
+                return False
+            self._free.append(slot)
+            return True
+
+    def flush(self):
+        pass
+
+    def maintenance(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MmapRecordStorage:
+    """메모리 매핑 파일 기반 고정 길이 레코드 저장소
+
+    파일 자체가 user_id -> 슬롯 오픈 어드레싱 해시 테이블(선형 탐사)이므로 시작 시
+    재생(replay)이나 인덱스 재구성이 필요 없다. 여러 워커 프로세스가 같은 파일을
+    MAP_SHARED로 매핑해 공유한다.
+
+    - 쓰기: 스레드 잠금 + flock(별도 .lock 파일)으로 프로세스 간 직렬화
+    - 읽기: 잠금 없이 슬롯별 시퀀스 번호(seqlock)로 찢어진 읽기를 감지해 재시도
+    - 확장/압축: 새 파일에 재삽입 후 os.replace로 원자적 교체, 기존 파일에는
+      retired 표시를 남겨 다른 프로세스가 다시 매핑하도록 함. 재삽입 위치는 배열 연산으로
+      한 번에 계산하며, 확장은 쓰기 중에 일어나므로 initial_capacity를 예상 사용자 수에 맞춰 둔다
+    """
+
+    def __init__(
+        self,
+        path: str,
+        record_dtype: np.dtype,
+        initial_capacity: int = 1024,
+        key_size: int = 48
+    ):
+        self.path = path
+        self.record_dtype = record_dtype
+        self.key_size = key_size
+        self.slot_dtype = np.dtype([
+            ("key", f"S{key_size}"),
+            ("state", np.uint8),
+            ("seq", np.uint32),
+            ("record", record_dtype),
+        ])
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._mm: Optional[mmap.mmap] = None
+        # 프로세스 로컬 슬롯 캐시 (같은 파일 세대 안에서는 슬롯 위치가 바뀌지 않음)
+        self._slot_cache: Dict[str, int] = {}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+        with self.locked():
+            if not os.path.exists(path):
+                self._create_file(path, self._round_capacity(initial_capacity))
+            self._map()
+            # 기존 파일이 지정 용량보다 작으면 시작 시 미리 확장 (운영 중 확장 방지)
+            if self.capacity < self._round_capacity(initial_capacity):
+                self._rebuild(initial_capacity)
+
+        logger.info(f"💾 기준 패턴 저장소 열기: {path} (사용자 {len(self)}명, 용량 {self.capacity})")
+
+    # ------------------------------------------------------------------
+    # 파일 관리
+
+    @staticmethod
+    def _round_capacity(capacity: int) -> int:
+        return 1 << max(4, int(capacity - 1).bit_length())
+
+    def _create_file(self, path: str, capacity: int):
+        size = HEADER_SIZE + capacity * self.slot_dtype.itemsize
+        with open(path, "wb") as f:
+            f.truncate(size)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = STORAGE_MAGIC
+            header["record_size"] = self.record_dtype.itemsize
+            header["key_size"] = self.key_size
+            header["capacity"] = capacity
+            f.write(header.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _map(self):
+        self._unmap()
+        with open(self.path, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), 0)
+
+        self._header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self._mm)
+        if (
+            self._header["magic"][0] != STORAGE_MAGIC
+            or self._header["record_size"][0] != self.record_dtype.itemsize
+            or self._header["key_size"][0] != self.key_size
+        ):
+            self._unmap()
+            raise ValueError(f"기준 패턴 저장소 형식이 맞지 않습니다: {self.path}")
+
+        capacity = int(self._header["capacity"][0])
+        slots = np.ndarray((capacity,), dtype=self.slot_dtype, buffer=self._mm, offset=HEADER_SIZE)
+        self._keys = slots["key"]
+        self._states = slots["state"]
+        self._seqs = slots["seq"]
+        self._records = slots["record"]
+        self._mask = capacity - 1
+        self._slot_cache = {}
+
+    def _unmap(self):
+        if self._mm is None:
+            return
+        # NumPy 뷰를 먼저 해제해야 mmap을 닫을 수 있음
+        self._header = self._keys = self._states = self._seqs = self._records = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # 외부에 남은 뷰가 있으면 GC에 맡김
+            pass
+        self._mm = None
+
+    def _check_retired(self):
+        if self._header["retired"][0]:
+            self._map()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """스레드 + 프로세스 간 쓰기 잠금 (재진입 가능)"""
+        with self._thread_lock:
+            self._lock_depth += 1
+            if self._lock_depth == 1:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                if self._mm is not None:
+                    self._check_retired()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # 조회/갱신
+
+    def __len__(self) -> int:
+        return int(self._header["count"][0])
+
+    @property
+    def capacity(self) -> int:
+        return int(self._header["capacity"][0])
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm) if self._mm is not None else 0
+
+    def _probe(self, key: bytes) -> Tuple[Optional[int], Optional[int]]:
+        """(키가 있는 슬롯, 삽입 가능한 첫 슬롯) 탐색"""
+        index = zlib.crc32(key) & self._mask
+        insert_at = None
+        for _ in range(self._mask + 1):
+            state = self._states[index]
+            if state == SLOT_EMPTY:
+                return None, insert_at if insert_at is not None else index
+            if state == SLOT_DELETED:
+                if insert_at is None:
+                    insert_at = index
+            elif self._keys[index] == key:
+                return index, None
+            index = (index + 1) & self._mask
+        return None, insert_at
+
+    def slot_for(self, user_id: str, create: bool = False) -> Optional[int]:
+        self._check_retired()
+        key = encode_key(user_id, self.key_size)
+
+        slot = self._slot_cache.get(user_id)
+        # 다른 프로세스가 삭제했을 수 있으므로 캐시된 슬롯을 확인
+        if slot is not None and self._states[slot] == SLOT_USED and self._keys[slot] == key:
+            return slot
+
+        slot, insert_at = self._probe(key)
+        if slot is None and create:
+            with self.locked():
+                slot, insert_at = self._probe(key)
+                if slot is None:
+                    slot = self._insert(key, insert_at)
+        if slot is not None:
+            self._slot_cache[user_id] = slot
+        return slot
+
+    def _insert(self, key: bytes, insert_at: int) -> int:
+        header = self._header
+        reused = self._states[insert_at] == SLOT_DELETED
+        if (int(header["count"][0]) + int(header["tombstones"][0]) + 1) > self.capacity * MAX_LOAD_FACTOR and not reused:
+            self._rebuild(self.capacity * 2)
+            _, insert_at = self._probe(key)
+            reused = False
+
+        self._seqs[insert_at] += 1
+        self._records[insert_at] = np.zeros(1, dtype=self.record_dtype)[0]
+        self._keys[insert_at] = key
+        self._states[insert_at] = SLOT_USED
+        self._seqs[insert_at] += 1
+
+        self._header["count"] += 1
+        if reused:
+            self._header["tombstones"] -= 1
+        return insert_at
+
+    def read(self, slot: int) -> tuple:
+        """레코드를 잠금 없이 일관되게 읽음 (쓰기 중이면 재시도)"""
+        for _ in range(MAX_READ_RETRIES):
+            seq = self._seqs[slot]
+            if seq & 1:
+                continue
+            values = self._records[slot].item()
+            if self._seqs[slot] == seq:
+                return values
+        # 쓰던 프로세스가 중단되어 시퀀스가 홀수로 남은 경우에도 읽기는 진행
+        return self._records[slot].item()
+
+    def write(self, slot: int, values: tuple):
+        """레코드 기록 (locked() 안에서 호출)"""
+        self._seqs[slot] += 1
+        self._records[slot] = values
+        self._seqs[slot] += 1
+
+    def column(self, name: str) -> Tuple[List[str], np.ndarray]:
+        """저장된 모든 사용자의 (user_id 목록, 필드 값 배열), 키가 해시로 대체된 사용자는 제외"""
+        with self.locked():
+            live = np.flatnonzero(self._states == SLOT_USED)
+            keys = self._keys[live]
+            values = self._records[name][live]
+        user_ids = [decode_key(key) for key in keys.tolist()]
+        restorable = [i for i, user_id in enumerate(user_ids) if user_id is not None]
+        if len(restorable) < len(user_ids):
+            user_ids = [user_ids[i] for i in restorable]
+            values = values[restorable]
+        return user_ids, values
+
+    def delete(self, user_id: str) -> bool:
+        with self.locked():
+            slot, _ = self._probe(encode_key(user_id, self.key_size))
+            if slot is None:
+                return False
+            self._states[slot] = SLOT_DELETED
+            self._header["count"] -= 1
+            self._header["tombstones"] += 1
+            self._slot_cache.pop(user_id, None)
+            return True
+
+    # ------------------------------------------------------------------
+    # 유지 관리
+
+    @staticmethod
+    def _place(keys: np.ndarray, capacity: int) -> np.ndarray:
+        """빈 테이블에 키를 선형 탐사로 넣었을 때의 슬롯 위치 (배열 연산)
+
+        키를 시작 슬롯 순으로 정렬하면 각 키의 위치는 max(시작 슬롯, 앞 키의 위치 + 1)이므로
+        누적 최댓값으로 한 번에 구한다. 테이블 끝을 넘은 키만 앞쪽 빈 슬롯에 차례로 넣는다.
+        """
+        mask = capacity - 1
+        home = np.fromiter((zlib.crc32(key) for key in keys.tolist()), dtype=np.int64, count=len(keys)) & mask
+        order = np.argsort(home, kind="stable")
+        offsets = np.arange(len(keys), dtype=np.int64)
+        placed = np.maximum.accumulate(home[order] - offsets) + offsets
+        overflow = np.flatnonzero(placed > mask)
+        if len(overflow):
+            # 끝을 넘은 키는 0번 슬롯부터 이어지는 빈 슬롯에 배치 (적재율 제한으로 소수)
+            used = np.zeros(capacity, dtype=bool)
+            used[placed[placed <= mask]] = True
+            free = np.flatnonzero(~used)[:len(overflow)]
+            placed[overflow] = free
+        positions = np.empty(len(keys), dtype=np.int64)
+        positions[order] = placed
+        return positions
+
+    def _rebuild(self, capacity: int):
+        """살아있는 레코드만 새 파일로 옮겨 원자적으로 교체 (확장/압축)"""
+        capacity = self._round_capacity(max(capacity, int(len(self) / MAX_LOAD_FACTOR) + 1))
+        tmp_path = self.path + ".tmp"
+        self._create_file(tmp_path, capacity)
+
+        live = np.flatnonzero(self._states == SLOT_USED)
+        keys = self._keys[live]
+        positions = self._place(keys, capacity)
+        with open(tmp_path, "r+b") as f:
+            new_mm = mmap.mmap(f.fileno(), 0)
+        new_slots = np.ndarray((capacity,), dtype=self.slot_dtype, buffer=new_mm, offset=HEADER_SIZE)
+        new_slots["key"][positions] = keys
+        new_slots["state"][positions] = SLOT_USED
+        new_slots["record"][positions] = self._records[live]
+
+        new_header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=new_mm)
+        new_header["count"] = len(live)
+        new_mm.flush()
+        del new_slots, new_header
+        new_mm.close()
+
+        os.replace(tmp_path, self.path)
+        # 기존 파일을 매핑한 다른 프로세스가 새 파일로 다시 매핑하도록 표시
+        self._header["retired"] = 1
+        self._mm.flush()
+        self._map()
+        logger.info(f"💾 기준 패턴 저장소 재구성: 사용자 {len(live)}명, 용량 {capacity}")
+
+    def flush(self):
+        """변경 내용을 디스크에 동기화 (msync)"""
+        if self._mm is not None:
+            self._mm.flush()
+
+    def maintenance(self):
+        """주기 작업: 삭제 표시가 많으면 압축한 뒤 디스크 동기화"""
+        with self.locked():
+            if int(self._header["tombstones"][0]) > self.capacity // 4:
+                self._rebuild(self.capacity)
+            self.flush()
+
+    def close(self):
+        self.flush()
+        self._unmap()
+        os.close(self._lock_fd)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 배치 크기 분포 집계 구간 (상한 기준)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatchScheduler:
+    """동시에 들어온 단건 예측 요청을 모아 하나의 행렬로 실행하는 스케줄러
+
+    요청은 대기열에 쌓였다가 max_wait_ms가 지나거나 max_batch_size에 도달하면
+    한 번에 predict_fn으로 전달되고, 결과는 각 요청의 future로 개별 반환된다.
+    predict_fn은 입력 행마다 한 행씩 대응하는 배열들의 튜플을 반환해야 한다.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], Awaitable[Tuple[np.ndarray, ...]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # 배치 크기 통계
+        self._batch_count = 0
+        self._row_count = 0
+        self._max_batch_seen = 0
+        self._size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def submit(self, row: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """1 x n 특성 행을 대기열에 넣고 predict_fn 결과 중 해당 행을 기다림"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        self._record_batch(len(batch))
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        try:
+            matrix = np.vstack([row for row, _ in batch])
+            outputs = await self.predict_fn(matrix)
+        except Exception as e:
+            logger.error(f"❌ 마이크로 배치 예측 실패: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for i, (_, future) in enumerate(batch):
+            # 호출 측에서 이미 취소된 요청은 건너뜀
+            if not future.done():
+                future.set_result(tuple(output[i:i + 1] for output in outputs))
+
+    def _record_batch(self, size: int):
+        self._batch_count += 1
+        self._row_count += size
+        self._max_batch_seen = max(self._max_batch_seen, size)
+        
+        for i, upper in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= upper:
+                self._size_histogram[i] += 1
+                return
+        self._size_histogram[-1] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """달성한 배치 크기 통계"""
+        labels = [f"<={upper}" for upper in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batches": self._batch_count,
+            "rows": self._row_count,
+            "avg_batch_size": (self._row_count / self._batch_count) if self._batch_count else 0.0,
+            "max_batch_seen": self._max_batch_seen,
+            "batch_size_histogram": dict(zip(labels, self._size_histogram))
+        }
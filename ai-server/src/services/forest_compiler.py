@@ -0,0 +1,179 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# scikit-learn 트리에서 리프 노드를 나타내는 자식 인덱스
+TREE_LEAF = -1
+
+# 한 번에 분기 비교를 계산할 최대 행 수
+ROW_BLOCK_SIZE = 256
+
+
+class CompiledForest:
+    """RandomForestClassifier + StandardScaler를 연속된 NumPy 배열로 펼친 추론 엔진
+
+    모든 트리의 노드를 하나의 배열(feature, threshold, children, leaf_proba)로
+    이어 붙이고, 리프는 자기 자신을 가리키게 만들어 최대 깊이만큼 고정 횟수로
+    전체 트리를 동시에 순회한다. 한 번의 순회로 클래스와 확률을 함께 계산한다.
+
+    scikit-learn과 비트 단위로 같은 결과를 내기 위해 다음 순서를 그대로 따른다.
+    - 스케일링은 float64로 계산한 뒤 float32로 변환 (트리 입력 dtype)
+    - 트리별 확률을 트리 순서대로 누적한 뒤 트리 수로 나눔 (n_jobs=None 기준)
+    스케일러를 임계값에 접어 넣으면 float32 변환 시점이 달라져 경계값에서 결과가
+    어긋나므로, 스케일링은 4개 특성에 대한 별도 연산으로 유지한다.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        leaf_proba: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        mean: Optional[np.ndarray],
+        scale: Optional[np.ndarray]
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes = classes
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_sklearn(cls, model, scaler) -> "CompiledForest":
+        """학습된 RandomForestClassifier와 StandardScaler에서 배열 생성"""
+        features, thresholds, children, probas, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        n_classes = len(model.classes_)
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.intp) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # 리프는 자기 자신을 가리키도록 하여 고정 횟수 순회가 가능하게 함
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            # children[2 * node] = 왼쪽, children[2 * node + 1] = 오른쪽
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+            children.append(np.column_stack([left, right]).ravel())
+
+            # DecisionTreeClassifier.predict_proba와 동일한 정규화
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(value / normalizer)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        mean = scaler.mean_.astype(np.float64) if scaler.with_mean else None
+        scale = scaler.scale_.astype(np.float64) if scaler.with_std else None
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children).astype(np.intp),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas)),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=model.classes_,
+            mean=mean,
+            scale=scale
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def predict_proba(self, feature_matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """원본(스케일링 전) 특성 행렬에서 (예측 클래스, 클래스 확률) 계산"""
+        X = np.array(feature_matrix, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"2차원 특성 행렬이 필요합니다: {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("특성 행렬에 NaN 또는 무한대 값이 있습니다")
+
+        # StandardScaler.transform과 동일한 연산 후 트리 입력 dtype(float32)으로 변환
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        X = X.astype(np.float32)
+
+        # 행 블록 단위로 처리하여 비교 결과 행렬이 캐시에 머물도록 함
+        probabilities = np.empty((X.shape[0], len(self.classes)), dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_BLOCK_SIZE):
+            block = X[start:start + ROW_BLOCK_SIZE]
+            probabilities[start:start + len(block)] = self._predict_block(block)
+
+        predictions = self.classes.take(np.argmax(probabilities, axis=1), axis=0)
+
+        return predictions, probabilities
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+
+        # 모든 노드의 분기 방향을 한 번에 계산: (행, 노드) -> 오른쪽이면 True
+        go_right = (X[:, self.feature] > self.threshold).ravel()
+
+        nodes = np.repeat(self.roots[np.newaxis, :], n_rows, axis=0)
+        row_offsets = None
+        if n_rows > 1:
+            row_offsets = (np.arange(n_rows, dtype=np.intp) * self.n_nodes)[:, np.newaxis]
+
+        # 모든 행 x 모든 트리를 동시에 한 단계씩 내려감 (리프는 제자리 유지)
+        for _ in range(self.max_depth):
+            direction = go_right.take(nodes if row_offsets is None else nodes + row_offsets)
+            nodes = self.children.take(2 * nodes + direction)
+
+        # (트리, 행, 클래스) 순서로 모아 트리 순서대로 누적 후 평균
+        probabilities = self.leaf_proba[nodes.T].sum(axis=0)
+        probabilities /= self.n_estimators
+        return probabilities
+
+
+def verify_parity(compiled: CompiledForest, model, scaler, feature_matrix: np.ndarray) -> bool:
+    """컴파일된 포레스트가 scikit-learn과 비트 단위로 같은 결과를 내는지 검증
+
+    주어진 샘플과 함께 각 분기 임계값을 원본 단위로 되돌린 경계값 주변도 검사한다.
+    """
+    probes = [np.asarray(feature_matrix, dtype=np.float64)]
+
+    # 분기 임계값을 원본 특성 단위로 변환한 경계값 샘플
+    internal = compiled.children[0::2] != np.arange(compiled.n_nodes)
+    boundary_features = compiled.feature[internal]
+    boundary_values = compiled.threshold[internal].copy()
+    if compiled.scale is not None:
+        boundary_values *= compiled.scale[boundary_features]
+    if compiled.mean is not None:
+        boundary_values += compiled.mean[boundary_features]
+
+    base = np.median(probes[0], axis=0)
+    for delta in (0.0, 1e-9, -1e-9):
+        boundary_rows = np.repeat(base[np.newaxis, :], len(boundary_values), axis=0)
+        boundary_rows[np.arange(len(boundary_values)), boundary_features] = boundary_values * (1 + delta)
+        probes.append(boundary_rows)
+
+    X = np.vstack(probes)
+    expected_proba = model.predict_proba(scaler.transform(X))
+    expected_pred = model.classes_.take(np.argmax(expected_proba, axis=1), axis=0)
+    actual_pred, actual_proba = compiled.predict_proba(X)
+
+    return bool(np.array_equal(expected_proba, actual_proba) and np.array_equal(expected_pred, actual_pred))
@@ -0,0 +1,267 @@
+import asyncio
+import importlib
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .rule_engine import RISK_SCORE_RULES
+
+logger = logging.getLogger(__name__)
+
+# 경보 단계: 체크인 공백 점수 규칙의 구간 경계(시간)와 해당 구간 점수 (12h +1, 24h +3, 48h +4)
+CHECKIN_RULE = next(rule for rule in RISK_SCORE_RULES if rule.feature == "hours_since_checkin")
+ESCALATION_HOURS: Tuple[float, ...] = tuple(float(hours) for hours in CHECKIN_RULE.bins)
+ESCALATION_POINTS: Tuple[int, ...] = CHECKIN_RULE.points[1:]
+
+# 재시도 대기 중인 경보의 최대 수 (sink가 계속 실패하면 오래된 경보부터 버림)
+MAX_PENDING_ESCALATIONS = 10000
+
+
+class LogEscalationSink:
+    """경보를 WARNING 로그(구조화 필드)로만 남기는 기본 sink (로컬 개발/테스트용)"""
+
+    async def emit(self, escalations: List[Dict[str, Any]]):
+        for escalation in escalations:
+            logger.warning("⏰ 체크인 공백 경보", extra=escalation)
+
+
+class WebhookEscalationSink:
+    """경보 목록을 JSON 배열로 HTTP POST (백엔드 알림 서비스 연동용)"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        import httpx
+        self.url = url
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def emit(self, escalations: List[Dict[str, Any]]):
+        response = await self.client.post(self.url, json=escalations)
+        response.raise_for_status()
+
+
+def create_escalation_sink(name: str, webhook_url: str = ""):
+    """설정 값으로 sink 생성: "log", "webhook" 또는 "패키지.모듈:클래스" (인자 없이 생성)"""
+    if name == "log":
+        return LogEscalationSink()
+    if name == "webhook":
+        if not webhook_url:
+            raise ValueError("webhook sink에는 WATCHDOG_WEBHOOK_URL이 필요합니다")
+        return WebhookEscalationSink(webhook_url)
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"알 수 없는 경보 sink: {name}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class InactivityWatchdog:
+    """사용자별 다음 체크인 공백 경보 시각을 해시 타이밍 휠로 관리
+
+    - 사용자마다 마지막 체크인 시각과 다음 경보 단계를 보관하고, 다음 경보 시각의 틱에
+      해당하는 휠 슬롯(집합)에 넣는다. 새 체크인이 들어오면 기존 슬롯에서 빼고 새 슬롯에
+      넣으므로 재설정은 O(1)이며, 같은 체크인 시각이 반복되면 아무것도 하지 않는다.
+    - advance()는 지난 틱의 슬롯만 확인하므로 사용자 수와 무관하게 틱당 비용은 만기된 타이머 수에 비례한다.
+      휠은 가장 긴 경보 시간보다 길어 모든 타이머가 한 바퀴 안에 만기된다.
+    - 만기 시 checkin_lookup(user_id)로 다른 경로(다른 워커 포함)에서 기록된 더 최근 체크인이
+      있는지 확인하고, 있으면 경보 대신 다시 예약한다.
+    - 타이머는 프로세스 메모리에 있으므로 재시작 후에는 restore()로 저장된 마지막 체크인 시각에서
+      다시 예약한다. 마지막 단계 경보 시각이 restore_window_seconds보다 오래 지난 체크인은 이미
+      경보되었다고 보고 복원하지 않는다.
+    - 이미 여러 단계를 지난 체크인은 지난 단계 중 가장 높은 단계 하나만 경보한다.
+      마지막 단계 경보 후에는 새 체크인이 들어올 때까지 다시 경보하지 않는다.
+    - 경보의 event_id(user_id:체크인 시각:단계)는 여러 워커가 같은 경보를 보낼 때 수신 측에서 중복 제거에 사용한다.
+    """
+
+    def __init__(
+        self,
+        sink,
+        tick_seconds: float = 30.0,
+        escalation_hours: Tuple[float, ...] = ESCALATION_HOURS,
+        checkin_lookup: Optional[Callable[[str], Optional[float]]] = None,
+        now_ts: Optional[float] = None
+    ):
+        self.sink = sink
+        self.tick_seconds = tick_seconds
+        self.escalation_seconds = tuple(hours * 3600 for hours in escalation_hours)
+        self.checkin_lookup = checkin_lookup
+        self.wheel_size = math.ceil(self.escalation_seconds[-1] / tick_seconds) + 2
+        self.restore_window_seconds = 2 * self.escalation_seconds[-1]
+        self._wheel: List[Optional[set]] = [None] * self.wheel_size
+        # user_id -> (마지막 체크인 시각, 다음 경보 단계 인덱스, 예약된 틱 또는 None)
+        self._timers: Dict[str, Tuple[float, int, Optional[int]]] = {}
+        # 처리를 마친 마지막 틱
+        self._current_tick = math.floor((now_ts if now_ts is not None else time.time()) / tick_seconds)
+        self._pending: List[Dict[str, Any]] = []
+        self._task = None
+        self.scheduled = 0
+        self.total_escalations = [0] * len(self.escalation_seconds)
+        self.total_rescheduled = 0
+        self.sink_failures = 0
+
+    def _tick_of(self, ts: float) -> int:
+        return math.ceil(ts / self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def observe_checkin(self, user_id: str, checkin_ts: float, now_ts: Optional[float] = None):
+        """체크인 시각 반영 (이전 체크인보다 최근일 때만 다음 경보 시각을 다시 예약)"""
+        timer = self._timers.get(user_id)
+        if timer is not None and checkin_ts <= timer[0]:
+            return
+        if timer is not None:
+            self._unschedule(user_id, timer[2])
+        self._schedule(user_id, checkin_ts, 0, now_ts if now_ts is not None else time.time())
+
+    def restore(self, checkins: Iterable[Tuple[str, float]], now_ts: Optional[float] = None) -> int:
+        """저장된 (user_id, 마지막 체크인 시각)으로 예약 복원, 복원한 사용자 수 반환"""
+        now_ts = now_ts if now_ts is not None else time.time()
+        since = now_ts - self.restore_window_seconds
+        restored = 0
+        for user_id, checkin_ts in checkins:
+            if checkin_ts > since:
+                self.observe_checkin(user_id, checkin_ts, now_ts)
+                restored += 1
+        return restored
+
+    def users(self) -> List[str]:
+        return list(self._timers)
+
+    def export_user(self, user_id: str) -> Optional[List[float]]:
+        """[마지막 체크인 시각, 다음 경보 단계] (다른 샤드로 이관할 때 사용)"""
+        timer = self._timers.get(user_id)
+        return [timer[0], timer[1]] if timer is not None else None
+
+    def import_user(self, user_id: str, checkin_ts: float, level: int, now_ts: Optional[float] = None):
+        """이관받은 예약 반영 (이미 더 최근 체크인이 있으면 무시, 이미 보낸 단계는 다시 경보하지 않음)"""
+        timer = self._timers.get(user_id)
+        if timer is not None:
+            if checkin_ts < timer[0] or (checkin_ts == timer[0] and level <= timer[1]):
+                return
+            self._unschedule(user_id, timer[2])
+        self._schedule(user_id, checkin_ts, int(level), now_ts if now_ts is not None else time.time())
+
+    def forget(self, user_id: str):
+        timer = self._timers.pop(user_id, None)
+        if timer is not None:
+            self._unschedule(user_id, timer[2])
+
+    def _schedule(self, user_id: str, checkin_ts: float, level: int, now_ts: float):
+        if level >= len(self.escalation_seconds):
+            self._timers[user_id] = (checkin_ts, level, None)
+            return
+        # 이미 지난 경보 시각은 다음 틱에 처리
+        tick = max(self._tick_of(checkin_ts + self.escalation_seconds[level]), self._current_tick + 1)
+        slot = tick % self.wheel_size
+        bucket = self._wheel[slot]
+        if bucket is None:
+            bucket = self._wheel[slot] = set()
+        bucket.add(user_id)
+        self._timers[user_id] = (checkin_ts, level, tick)
+        self.scheduled += 1
+
+    def _unschedule(self, user_id: str, tick: Optional[int]):
+        if tick is None:
+            return
+        bucket = self._wheel[tick % self.wheel_size]
+        if bucket is not None and user_id in bucket:
+            bucket.discard(user_id)
+            self.scheduled -= 1
+
+    def advance(self, now_ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """now_ts까지 지난 틱의 만기 타이머를 처리하고 발생한 경보 목록 반환"""
+        now_ts = now_ts if now_ts is not None else time.time()
+        now_tick = math.floor(now_ts / self.tick_seconds)
+        if now_tick <= self._current_tick:
+            return []
+        # 오래 멈춰 있었으면 휠 전체를 한 번만 확인
+        first_tick = max(self._current_tick + 1, now_tick - self.wheel_size + 1)
+        self._current_tick = now_tick
+
+        escalations = []
+        for tick in range(first_tick, now_tick + 1):
+            bucket = self._wheel[tick % self.wheel_size]
+            if not bucket:
+                continue
+            due = [user_id for user_id in bucket if self._timers[user_id][2] <= now_tick]
+            for user_id in due:
+                bucket.discard(user_id)
+                self.scheduled -= 1
+                escalation = self._expire(user_id, now_ts)
+                if escalation is not None:
+                    escalations.append(escalation)
+        return escalations
+
+    def _expire(self, user_id: str, now_ts: float) -> Optional[Dict[str, Any]]:
+        checkin_ts, level, _ = self._timers[user_id]
+        if self.checkin_lookup is not None:
+            latest = self.checkin_lookup(user_id)
+            if latest is not None and latest > checkin_ts:
+                self.total_rescheduled += 1
+                self._schedule(user_id, latest, 0, now_ts)
+                return None
+
+        # 지난 단계 중 가장 높은 단계로 경보
+        elapsed = now_ts - checkin_ts
+        while level + 1 < len(self.escalation_seconds) and elapsed >= self.escalation_seconds[level + 1]:
+            level += 1
+        self._schedule(user_id, checkin_ts, level + 1, now_ts)
+        self.total_escalations[level] += 1
+
+        overdue_since = checkin_ts + self.escalation_seconds[level]
+        return {
+            "event_id": f"{user_id}:{checkin_ts:.0f}:{level + 1}",
+            "user_id": user_id,
+            "escalation_level": level + 1,
+            "threshold_hours": self.escalation_seconds[level] / 3600,
+            "risk_points": ESCALATION_POINTS[level] if level < len(ESCALATION_POINTS) else None,
+            "last_checkin": datetime.fromtimestamp(checkin_ts).isoformat(),
+            "hours_since_checkin": round(elapsed / 3600, 2),
+            "overdue_since": datetime.fromtimestamp(overdue_since).isoformat()
+        }
+
+    def start(self):
+        self._task = asyncio.create_task(self._tick_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"❌ 비활동 감시 실패: {str(e)}")
+
+    async def tick(self, now_ts: Optional[float] = None):
+        """만기 타이머 처리 후 경보를 sink로 전달 (실패한 경보는 다음 틱에 다시 전달)"""
+        self._pending.extend(self.advance(now_ts))
+        if not self._pending:
+            return
+        if len(self._pending) > MAX_PENDING_ESCALATIONS:
+            logger.error(f"❌ 전달하지 못한 경보 {len(self._pending) - MAX_PENDING_ESCALATIONS}건 폐기")
+            self._pending = self._pending[-MAX_PENDING_ESCALATIONS:]
+        pending, self._pending = self._pending, []
+        try:
+            await self.sink.emit(pending)
+        except Exception as e:
+            self.sink_failures += 1
+            self._pending = pending + self._pending
+            logger.error(f"❌ 경보 전달 실패 ({len(pending)}건, 다음 틱에 재시도): {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_users": len(self._timers),
+            "scheduled": self.scheduled,
+            "tick_seconds": self.tick_seconds,
+            "escalation_hours": [seconds / 3600 for seconds in self.escalation_seconds],
+            "escalations": {
+                f"level_{level + 1}": count for level, count in enumerate(self.total_escalations)
+            },
+            "rescheduled": self.total_rescheduled,
+            "pending": len(self._pending),
+            "sink_failures": self.sink_failures
+        }
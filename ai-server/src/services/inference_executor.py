@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import WindowedHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """모델 추론 전용 워커 풀
+
+    scikit-learn 트리 예측은 대부분 GIL을 해제한 상태로 실행되므로 스레드 풀로도
+    이벤트 루프 블로킹을 피할 수 있고, 워커마다 모델을 복제할 필요가 없다.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+        # 풀 크기 산정을 위한 통계
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._wait_times = WindowedHistogram()
+        self._run_times = WindowedHistogram()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+            logger.info(f"🧵 추론 워커 풀 시작: {self.max_workers}개 스레드")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """fn(*args)를 워커 풀에서 실행하고 결과를 기다림"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+        
+        future = self._get_executor().submit(self._invoke, submitted_at, fn, args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 실행 전에 취소된 작업은 대기열 통계에서 제외
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def _invoke(self, submitted_at: float, fn: Callable[..., Any], args: tuple) -> Any:
+        started_at = time.perf_counter()
+        wait_time = started_at - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        self._wait_times.record(wait_time)
+        
+        try:
+            return fn(*args)
+        finally:
+            run_time = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+            self._run_times.record(run_time)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """대기열 깊이 및 최근 대기/실행 시간(ms) 분포"""
+        with self._lock:
+            stats = {
+                "workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed
+            }
+        stats["wait_ms"] = self._wait_times.snapshot()
+        stats["run_ms"] = self._run_times.snapshot()
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info("🧵 추론 워커 풀 종료")
@@ -0,0 +1,203 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_METERS = 6371008.8
+
+# 위치 정확도와 무관하게 이동으로 보기 위한 최소 거리 (미터)
+MIN_MOVE_METERS = 50.0
+
+
+def haversine_meters(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """위경도(도) 배열 간 대권 거리 (미터), 브로드캐스팅 지원"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def pairwise_haversine_meters(lat_rad: np.ndarray, lon_rad: np.ndarray) -> np.ndarray:
+    """라디안 위경도 벡터의 모든 쌍 대권 거리 행렬 (미터)
+
+    단위 구 위의 3차원 좌표 차이로 현(chord) 길이를 구한 뒤 호 길이로 변환한다.
+    haversine과 같은 값이며 n^2 원소에 대한 삼각함수 연산을 한 번으로 줄인다.
+    """
+    cos_lat = np.cos(lat_rad)
+    unit = np.column_stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)])
+    diff = unit[:, np.newaxis, :] - unit[np.newaxis, :, :]
+    half_chord = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff)) / 2
+    np.minimum(half_chord, 1.0, out=half_chord)
+    return (2 * EARTH_RADIUS_METERS) * np.arcsin(half_chord)
+
+
+class LocationTracker:
+    """사용자별 최근 위치 링 버퍼와 위치 특성 계산
+
+    사용자마다 고정 길이(history_size)의 (위도, 경도, 정확도) + 시각 링 버퍼를
+    연속 배열에 보관한다. 기록은 O(1), 특성 계산은 버퍼 크기에 대한
+    벡터 연산(최대 history_size^2 거리 행렬)으로 요청 경로에서 수 µs~수십 µs에 끝난다.
+
+    두 지점의 거리가 max(MIN_MOVE_METERS, 두 정확도의 합)을 넘을 때만 다른 장소로 본다.
+    """
+
+    def __init__(self, history_size: int = 16, window_hours: float = 24.0, initial_capacity: int = 1024):
+        self.history_size = history_size
+        self.window_seconds = window_hours * 3600
+        # (위도, 경도, 정확도)는 float32로 충분 (위도 37도에서 약 0.3m 해상도)
+        self._points = np.zeros((initial_capacity, history_size, 3), dtype=np.float32)
+        self._ts = np.zeros((initial_capacity, history_size), dtype=np.float64)
+        self._head = np.zeros(initial_capacity, dtype=np.uint16)
+        self._count = np.zeros(initial_capacity, dtype=np.uint16)
+        self._index: Dict[str, int] = {}
+        # 다른 샤드로 이관되어 비운 슬롯 (새 사용자에게 재사용)
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        # i > j 쌍을 고르는 하삼각 마스크 (특성 계산마다 재생성하지 않도록 캐시)
+        self._earlier_mask = np.tri(history_size, k=-1, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self._points, self._ts, self._head, self._count))
+
+    def _slot(self, user_id: str) -> int:
+        slot = self._index.get(user_id)
+        if slot is not None:
+            return slot
+
+        if self._free:
+            slot = self._free.pop()
+            self._index[user_id] = slot
+            return slot
+
+        slot = len(self._index)
+        if slot >= len(self._head):
+            # 용량 두 배 확장 (분할 상환 O(1))
+            for name in ("_points", "_ts", "_head", "_count"):
+                current = getattr(self, name)
+                grown = np.zeros((len(current) * 2,) + current.shape[1:], dtype=current.dtype)
+                grown[:len(current)] = current
+                setattr(self, name, grown)
+        self._index[user_id] = slot
+        return slot
+
+    def observe(self, user_id: str, latitude: float, longitude: float, accuracy: float, timestamp: float):
+        """위치 한 건 기록 (같은 시각 또는 과거 시각의 중복 위치는 무시)"""
+        with self._lock:
+            slot = self._slot(user_id)
+            count = int(self._count[slot])
+            head = int(self._head[slot])
+
+            if count:
+                last = (head - 1) % self.history_size
+                if timestamp <= self._ts[slot, last]:
+                    return
+
+            self._points[slot, head] = (latitude, longitude, max(accuracy, 0.0))
+            self._ts[slot, head] = timestamp
+            self._head[slot] = (head + 1) % self.history_size
+            self._count[slot] = min(count + 1, self.history_size)
+
+    def users(self) -> List[str]:
+        return list(self._index)
+
+    def export_user(self, user_id: str) -> Optional[List[List[float]]]:
+        """사용자의 위치 이력 [위도, 경도, 정확도, 시각] 목록 (시간 순, 다른 샤드로 이관할 때 사용)"""
+        with self._lock:
+            slot = self._index.get(user_id)
+            if slot is None:
+                return None
+            count = int(self._count[slot])
+            order = np.arange(int(self._head[slot]) - count, int(self._head[slot])) % self.history_size
+            points = self._points[slot].take(order, axis=0).astype(np.float64)
+            ts = self._ts[slot].take(order)
+        return [[*point, timestamp] for point, timestamp in zip(points.tolist(), ts.tolist())]
+
+    def forget(self, user_id: str):
+        """사용자 위치 이력 삭제 (슬롯은 재사용)"""
+        with self._lock:
+            slot = self._index.pop(user_id, None)
+            if slot is not None:
+                self._count[slot] = 0
+                self._head[slot] = 0
+                self._free.append(slot)
+
+    def _recent(self, slot: int, now: float):
+        """시간 순서로 정렬된 최근 window 내 위치: ((n, 3) 위치 배열, (n,) 시각)"""
+        count = int(self._count[slot])
+        head = int(self._head[slot])
+        order = np.arange(head - count, head) % self.history_size
+
+        ts = self._ts[slot].take(order)
+        in_window = ts >= now - self.window_seconds
+        order = order[in_window]
+        return self._points[slot].take(order, axis=0).astype(np.float64), ts[in_window]
+
+    def features(self, user_id: str, now: float) -> Dict[str, float]:
+        """최근 window의 위치 특성
+
+        - location_changes: 연속 위치 간 유의미한 이동 횟수
+        - distinct_places: 서로 다른 장소 수
+        - distance_moved_km: 유의미한 이동 거리 합 (km)
+        - time_at_home_ratio: 가장 자주 머문 장소(집으로 간주)에서 보낸 시간 비율
+        """
+        result = {
+            "location_changes": 0,
+            "distinct_places": 0,
+            "distance_moved_km": 0.0,
+            "time_at_home_ratio": 0.0,
+            "location_points": 0
+        }
+
+        slot = self._index.get(user_id)
+        if slot is None:
+            return result
+
+        with self._lock:
+            points, ts = self._recent(slot, now)
+
+        n = len(ts)
+        result["location_points"] = n
+        if n == 0:
+            return result
+        if n == 1:
+            result["distinct_places"] = 1
+            result["time_at_home_ratio"] = 1.0
+            return result
+
+        # 모든 지점 쌍의 거리와 정확도 기반 임계값
+        radians = np.radians(points[:, :2])
+        distances = pairwise_haversine_meters(radians[:, 0], radians[:, 1])
+        accuracy = points[:, 2]
+        same_place = distances <= np.maximum(MIN_MOVE_METERS, np.add.outer(accuracy, accuracy))
+
+        # 연속 지점 간 이동
+        step = np.arange(n - 1)
+        moved = ~same_place[step, step + 1]
+        result["location_changes"] = int(moved.sum())
+        result["distance_moved_km"] = float(distances[step, step + 1][moved].sum() / 1000)
+
+        # 앞선 어떤 지점과도 같은 장소가 아니면 새로운 장소
+        earlier_same = (same_place & self._earlier_mask[:n, :n]).any(axis=1)
+        result["distinct_places"] = int((~earlier_same).sum())
+
+        # 이웃이 가장 많은 지점을 집으로 보고, 각 지점의 체류 시간을 다음 기록까지로 계산
+        home = int(np.argmax(same_place.sum(axis=1)))
+        dwell = np.empty(n)
+        dwell[:-1] = ts[1:] - ts[:-1]
+        dwell[-1] = max(now - ts[-1], 0.0)
+        total = dwell.sum()
+        if total > 0:
+            result["time_at_home_ratio"] = float(dwell @ same_place[home] / total)
+        else:
+            result["time_at_home_ratio"] = 1.0
+
+        return result
@@ -0,0 +1,531 @@
+import bisect
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 지연 시간 히스토그램 범위 (초): 10µs ~ 약 2분, 옥타브당 8구간 (상대 오차 약 9%)
+HISTOGRAM_MIN_SECONDS = 1e-5
+HISTOGRAM_MAX_SECONDS = 120.0
+HISTOGRAM_BUCKETS_PER_OCTAVE = 8
+
+
+def _build_bounds(min_value: float, max_value: float, buckets_per_octave: int) -> List[float]:
+    n_buckets = int(math.ceil(math.log2(max_value / min_value) * buckets_per_octave))
+    return [min_value * 2 ** (i / buckets_per_octave) for i in range(n_buckets + 1)]
+
+
+class LatencyHistogram:
+    """고정 크기 로그 스케일 히스토그램
+
+    요청 수와 무관하게 메모리가 일정하며, 기록은 O(log 구간 수), 분위수 계산은
+    O(구간 수)로 처리된다. 분위수는 해당 구간의 상한값으로 근사한다.
+    """
+
+    def __init__(
+        self,
+        min_value: float = HISTOGRAM_MIN_SECONDS,
+        max_value: float = HISTOGRAM_MAX_SECONDS,
+        buckets_per_octave: int = HISTOGRAM_BUCKETS_PER_OCTAVE
+    ):
+        self.bounds = _build_bounds(min_value, max_value, buckets_per_octave)
+        self.buckets_per_octave = buckets_per_octave
+        # 마지막 칸은 최대 범위를 넘는 값
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value: float, count: int = 1):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += count
+            self.count += count
+            self.sum += value * count
+            if value > self.max:
+                self.max = value
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    def export_state(self) -> Dict[str, Any]:
+        """다른 프로세스에서 합칠 수 있는 원시 구간 값"""
+        with self._lock:
+            return {"counts": list(self.counts), "count": self.count, "sum": self.sum, "max": self.max}
+
+    def merge_state(self, state: Dict[str, Any]):
+        """export_state 결과를 누적 (구간 설정이 같은 히스토그램끼리만 유효)"""
+        with self._lock:
+            for i, c in enumerate(state["counts"]):
+                self.counts[i] += c
+            self.count += state["count"]
+            self.sum += state["sum"]
+            self.max = max(self.max, state["max"])
+
+    def merge(self, other: "LatencyHistogram"):
+        with self._lock:
+            for i, c in enumerate(other.counts):
+                self.counts[i] += c
+            self.count += other.count
+            self.sum += other.sum
+            self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            cumulative = 0
+            for i, c in enumerate(self.counts):
+                cumulative += c
+                if cumulative >= rank and c:
+                    return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+            return self.max
+
+    def snapshot(self, scale: float = 1000.0) -> Dict[str, Any]:
+        """요약 통계 (기본 단위: 밀리초)"""
+        return {
+            "count": self.count,
+            "mean": (self.sum / self.count * scale) if self.count else 0.0,
+            "max": self.max * scale,
+            "p50": self.quantile(0.50) * scale,
+            "p95": self.quantile(0.95) * scale,
+            "p99": self.quantile(0.99) * scale
+        }
+
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """Prometheus 노출용 누적 구간 (옥타브 경계만 사용해 구간 수를 줄임)"""
+        with self._lock:
+            result = []
+            cumulative = 0
+            for i, c in enumerate(self.counts[:-1]):
+                cumulative += c
+                if i % self.buckets_per_octave == 0:
+                    result.append((self.bounds[i], cumulative))
+            return result
+
+
+class WindowedHistogram:
+    """최근 window_seconds 동안의 분포를 보여주는 회전 히스토그램
+
+    현재/이전 두 구간만 유지하므로 메모리는 히스토그램 두 개 크기로 고정된다.
+    """
+
+    def __init__(self, window_seconds: float = 300.0):
+        self.window_seconds = window_seconds
+        self._current = LatencyHistogram()
+        self._previous = LatencyHistogram()
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _maybe_rotate(self):
+        now = time.monotonic()
+        elapsed = now - self._rotated_at
+        if elapsed < self.window_seconds:
+            return
+        with self._lock:
+            if now - self._rotated_at < self.window_seconds:
+                return
+            # 두 구간 이상 지났으면 이전 구간도 비어 있어야 함
+            self._previous = self._current if elapsed < 2 * self.window_seconds else LatencyHistogram()
+            self._current = LatencyHistogram()
+            self._rotated_at = now
+
+    def record(self, value: float, count: int = 1):
+        self._maybe_rotate()
+        self._current.record(value, count)
+
+    def merged(self) -> LatencyHistogram:
+        """이전 + 현재 구간을 합친 히스토그램"""
+        self._maybe_rotate()
+        merged = LatencyHistogram()
+        merged.merge(self._previous)
+        merged.merge(self._current)
+        return merged
+
+    def snapshot(self, scale: float = 1000.0) -> Dict[str, Any]:
+        return self.merged().snapshot(scale)
+
+
+class RateCounter:
+    """초 단위 슬롯 링 버퍼로 최근 구간의 처리율 계산"""
+
+    def __init__(self, window_seconds: int = 300):
+        self.window_seconds = window_seconds
+        self._slots = [0] * window_seconds
+        self._slot_seconds = [-1] * window_seconds
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def record(self, count: int = 1):
+        second = int(time.monotonic())
+        index = second % self.window_seconds
+        with self._lock:
+            if self._slot_seconds[index] != second:
+                self._slot_seconds[index] = second
+                self._slots[index] = 0
+            self._slots[index] += count
+            self.total += count
+
+    def recent_count(self, seconds: int) -> int:
+        """최근 seconds초 동안 기록된 건수"""
+        seconds = min(seconds, self.window_seconds)
+        now = int(time.monotonic())
+        with self._lock:
+            return sum(
+                c for c, s in zip(self._slots, self._slot_seconds)
+                if 0 <= now - s < seconds
+            )
+
+    def rate(self, seconds: int) -> float:
+        """최근 seconds초 동안의 초당 처리량"""
+        return self.recent_count(seconds) / min(seconds, self.window_seconds)
+
+
+class PerformanceMonitor:
+    """분석 방법별 지연 시간 분포와 처리율을 고정 메모리로 집계"""
+
+    def __init__(self, window_seconds: int = 300):
+        self.window_seconds = window_seconds
+        self._lifetime: Dict[str, LatencyHistogram] = {}
+        self._recent: Dict[str, WindowedHistogram] = {}
+        self._rates: Dict[str, RateCounter] = {}
+        self._lock = threading.Lock()
+
+    def _ensure(self, method: str):
+        if method not in self._lifetime:
+            with self._lock:
+                if method not in self._lifetime:
+                    self._recent[method] = WindowedHistogram(self.window_seconds)
+                    self._rates[method] = RateCounter(self.window_seconds)
+                    self._lifetime[method] = LatencyHistogram()
+
+    def record(self, method: str, seconds: float, count: int = 1):
+        """분석 count건의 건당 처리 시간(초) 기록"""
+        self._ensure(method)
+        self._lifetime[method].record(seconds, count)
+        self._recent[method].record(seconds, count)
+        self._rates[method].record(count)
+
+    @property
+    def total_count(self) -> int:
+        return sum(h.count for h in self._lifetime.values())
+
+    def average_seconds(self) -> float:
+        total = self.total_count
+        return (sum(h.sum for h in self._lifetime.values()) / total) if total else 0.0
+
+    def _method_views(self) -> Dict[str, tuple]:
+        """방법별 (전체 히스토그램, 최근 히스토그램, (1분 처리량, 5분 처리량, 누적 건수))"""
+        views = {}
+        for method in list(self._lifetime):
+            rates = self._rates[method]
+            views[method] = (
+                self._lifetime[method],
+                self._recent[method],
+                (rates.rate(60), rates.rate(300), rates.total)
+            )
+        return views
+
+    def snapshot(self) -> Dict[str, Any]:
+        """방법별 최근/전체 지연 시간(ms) 분위수와 초당 처리량"""
+        latency = {}
+        throughput = {}
+        for method, (lifetime, recent, (rate_1m, rate_5m, total)) in self._method_views().items():
+            latency[method] = {
+                "recent": recent.snapshot(),
+                "lifetime": lifetime.snapshot()
+            }
+            throughput[method] = {
+                "rate_1m": rate_1m,
+                "rate_5m": rate_5m,
+                "total": total
+            }
+        return {
+            "window_seconds": self.window_seconds,
+            "latency_ms": latency,
+            "throughput_per_sec": throughput
+        }
+
+    def render_prometheus(self, prefix: str = "safety_analysis") -> List[str]:
+        """Prometheus 텍스트 형식의 히스토그램 라인"""
+        lines = [
+            f"# HELP {prefix}_duration_seconds 안전 분석 건당 처리 시간",
+            f"# TYPE {prefix}_duration_seconds histogram"
+        ]
+        for method, (histogram, _, _) in self._method_views().items():
+            for upper, cumulative in histogram.cumulative_buckets():
+                lines.append(f'{prefix}_duration_seconds_bucket{{method="{method}",le="{upper:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_duration_seconds_bucket{{method="{method}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{prefix}_duration_seconds_sum{{method="{method}"}} {histogram.sum:.9g}')
+            lines.append(f'{prefix}_duration_seconds_count{{method="{method}"}} {histogram.count}')
+        return lines
+
+    def export_state(self) -> Dict[str, Any]:
+        """프로세스 간 집계용 원시 상태 (히스토그램 구간 값과 최근 건수)"""
+        state = {}
+        for method in list(self._lifetime):
+            rates = self._rates[method]
+            state[method] = {
+                "lifetime": self._lifetime[method].export_state(),
+                "recent": self._recent[method].merged().export_state(),
+                "count_1m": rates.recent_count(60),
+                "count_5m": rates.recent_count(300),
+                "total": rates.total
+            }
+        return state
+
+
+class MergedPerformanceMonitor(PerformanceMonitor):
+    """여러 워커 프로세스의 PerformanceMonitor.export_state를 합친 읽기 전용 집계
+
+    히스토그램은 구간 값을 더하므로 합친 분위수도 단일 프로세스와 같은 정확도를 갖는다.
+    states는 (export_state 결과, 최근 값 반영 여부) 목록이다. 오래된 상태(종료된 워커 등)는
+    누적 값만 반영하고 최근 분포/처리량에서는 제외한다.
+    """
+
+    def __init__(self, states: List[Tuple[Dict[str, Any], bool]], window_seconds: int = 300):
+        super().__init__(window_seconds)
+        self._merged_recent: Dict[str, LatencyHistogram] = {}
+        self._merged_counts: Dict[str, List[int]] = {}
+
+        for state, is_fresh in states:
+            for method, method_state in state.items():
+                if method not in self._lifetime:
+                    self._lifetime[method] = LatencyHistogram()
+                    self._merged_recent[method] = LatencyHistogram()
+                    self._merged_counts[method] = [0, 0, 0]
+                self._lifetime[method].merge_state(method_state["lifetime"])
+                counts = self._merged_counts[method]
+                counts[2] += method_state["total"]
+                if is_fresh:
+                    self._merged_recent[method].merge_state(method_state["recent"])
+                    counts[0] += method_state["count_1m"]
+                    counts[1] += method_state["count_5m"]
+
+    def record(self, method: str, seconds: float, count: int = 1):
+        raise TypeError("집계된 지표에는 기록할 수 없습니다")
+
+    def _method_views(self) -> Dict[str, tuple]:
+        return {
+            method: (
+                self._lifetime[method],
+                self._merged_recent[method],
+                (counts[0] / min(60, self.window_seconds), counts[1] / min(300, self.window_seconds), counts[2])
+            )
+            for method, counts in self._merged_counts.items()
+        }
+
+
+# 단계별 시간 구간: 나노초 값의 비트 길이(옥타브)와 그 아래 3비트로 옥타브당 8구간
+STAGE_BUCKET_BITS = 3
+STAGE_BUCKETS_PER_OCTAVE = 1 << STAGE_BUCKET_BITS
+# 2^37ns (약 137초) 이상은 마지막 구간
+STAGE_MAX_OCTAVE = 37
+STAGE_BUCKET_COUNT = (STAGE_MAX_OCTAVE - STAGE_BUCKET_BITS) * STAGE_BUCKETS_PER_OCTAVE + STAGE_BUCKETS_PER_OCTAVE
+
+
+def _stage_bucket(elapsed_ns: int) -> int:
+    if elapsed_ns < STAGE_BUCKETS_PER_OCTAVE:
+        return max(elapsed_ns, 0)
+    shift = elapsed_ns.bit_length() - STAGE_BUCKET_BITS - 1
+    index = shift * STAGE_BUCKETS_PER_OCTAVE + (elapsed_ns >> shift)
+    return min(index, STAGE_BUCKET_COUNT - 1)
+
+
+def _stage_bucket_upper_ns(index: int) -> int:
+    """구간 상한 (나노초, 이 값 미만이 해당 구간)"""
+    if index < STAGE_BUCKETS_PER_OCTAVE:
+        return index + 1
+    shift, mantissa = divmod(index, STAGE_BUCKETS_PER_OCTAVE)
+    shift -= 1
+    return (STAGE_BUCKETS_PER_OCTAVE + mantissa + 1) << shift
+
+
+class _StageCounts:
+    __slots__ = ("lifetime", "current", "previous", "count", "sum_ns", "max_ns")
+
+    def __init__(self):
+        self.lifetime = [0] * STAGE_BUCKET_COUNT
+        self.current = [0] * STAGE_BUCKET_COUNT
+        self.previous = [0] * STAGE_BUCKET_COUNT
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+
+def _counts_quantile(counts: List[int], total: int, q: float, max_ns: int) -> int:
+    if total == 0:
+        return 0
+    rank = q * total
+    cumulative = 0
+    for i, c in enumerate(counts):
+        cumulative += c
+        if cumulative >= rank and c:
+            return min(_stage_bucket_upper_ns(i), max_ns) if max_ns else _stage_bucket_upper_ns(i)
+    return max_ns
+
+
+def _counts_snapshot(counts: List[int], sum_ns: Optional[int] = None, max_ns: int = 0) -> Dict[str, Any]:
+    """구간 카운트 요약 (밀리초)"""
+    total = sum(counts)
+    snapshot = {"count": total}
+    if sum_ns is not None:
+        snapshot["mean"] = (sum_ns / total / 1e6) if total else 0.0
+        snapshot["max"] = max_ns / 1e6
+    for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        snapshot[name] = _counts_quantile(counts, total, q, max_ns) / 1e6
+    return snapshot
+
+
+class StageTimings:
+    """요청 처리 단계별 소요 시간 (perf_counter_ns 차이) 집계
+
+    상시 켜 둘 수 있도록 기록 비용을 최소화했다. 구간 번호를 나노초 정수에서 비트 연산으로
+    바로 계산하고(옥타브당 8구간, 상대 오차 약 12%), 잠금 한 번에 전체/최근 구간 카운트를
+    함께 올린다. 최근 분포는 window_seconds 단위로 회전하는 현재/이전 두 구간의 합이다.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, enabled: bool = True):
+        self.window_seconds = window_seconds
+        self.enabled = enabled
+        self._stages: Dict[str, _StageCounts] = {}
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_ns(self, stage: str, elapsed_ns: int):
+        if not self.enabled:
+            return
+        # _stage_bucket을 호출 없이 계산 (기록 경로 비용 절감)
+        if elapsed_ns < STAGE_BUCKETS_PER_OCTAVE:
+            index = max(elapsed_ns, 0)
+        else:
+            shift = elapsed_ns.bit_length() - STAGE_BUCKET_BITS - 1
+            index = min(shift * STAGE_BUCKETS_PER_OCTAVE + (elapsed_ns >> shift), STAGE_BUCKET_COUNT - 1)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._rotated_at >= self.window_seconds:
+                self._rotate(now)
+            counts = self._stages.get(stage)
+            if counts is None:
+                counts = self._stages[stage] = _StageCounts()
+            counts.lifetime[index] += 1
+            counts.current[index] += 1
+            counts.count += 1
+            counts.sum_ns += elapsed_ns
+            if elapsed_ns > counts.max_ns:
+                counts.max_ns = elapsed_ns
+
+    def lap(self, stage: str, since_ns: int) -> int:
+        """since_ns부터 지금까지를 stage로 기록하고 현재 시각(ns) 반환 (다음 단계의 시작)"""
+        now_ns = time.perf_counter_ns()
+        self.record_ns(stage, now_ns - since_ns)
+        return now_ns
+
+    def _rotate(self, now: float):
+        # 두 구간 이상 지났으면 이전 구간도 비어 있어야 함
+        stale = now - self._rotated_at >= 2 * self.window_seconds
+        for counts in self._stages.values():
+            counts.previous = [0] * STAGE_BUCKET_COUNT if stale else counts.current
+            counts.current = [0] * STAGE_BUCKET_COUNT
+        self._rotated_at = now
+
+    def export_state(self) -> Dict[str, Any]:
+        """프로세스 간 집계용 원시 상태"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._rotated_at >= self.window_seconds:
+                self._rotate(now)
+            return {
+                stage: {
+                    "lifetime": list(counts.lifetime),
+                    "recent": [a + b for a, b in zip(counts.current, counts.previous)],
+                    "sum_ns": counts.sum_ns,
+                    "max_ns": counts.max_ns
+                }
+                for stage, counts in self._stages.items()
+            }
+
+    @staticmethod
+    def merge_states(states: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """여러 워커의 export_state를 단계별로 합침"""
+        merged: Dict[str, Any] = {}
+        for state in states:
+            for stage, stage_state in state.items():
+                target = merged.setdefault(stage, {
+                    "lifetime": [0] * STAGE_BUCKET_COUNT,
+                    "recent": [0] * STAGE_BUCKET_COUNT,
+                    "sum_ns": 0,
+                    "max_ns": 0
+                })
+                for key in ("lifetime", "recent"):
+                    target[key] = [a + b for a, b in zip(target[key], stage_state[key])]
+                target["sum_ns"] += stage_state["sum_ns"]
+                target["max_ns"] = max(target["max_ns"], stage_state["max_ns"])
+        return merged
+
+    @staticmethod
+    def snapshot_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """단계별 최근/전체 소요 시간(ms) 분위수"""
+        return {
+            stage: {
+                "recent": _counts_snapshot(stage_state["recent"], max_ns=stage_state["max_ns"]),
+                "lifetime": _counts_snapshot(stage_state["lifetime"], stage_state["sum_ns"], stage_state["max_ns"])
+            }
+            for stage, stage_state in sorted(state.items())
+        }
+
+    @staticmethod
+    def render_prometheus_state(state: Dict[str, Any], prefix: str = "safety_stage") -> List[str]:
+        """단계별 전체 분포를 Prometheus 히스토그램 라인으로 (옥타브 경계만 노출)"""
+        lines = [
+            f"# HELP {prefix}_duration_seconds 요청 처리 단계별 소요 시간",
+            f"# TYPE {prefix}_duration_seconds histogram"
+        ]
+        for stage, stage_state in sorted(state.items()):
+            counts = stage_state["lifetime"]
+            cumulative = 0
+            for i, c in enumerate(counts[:-1]):
+                cumulative += c
+                if (i + 1) % STAGE_BUCKETS_PER_OCTAVE == 0:
+                    upper = _stage_bucket_upper_ns(i) / 1e9
+                    lines.append(f'{prefix}_duration_seconds_bucket{{stage="{stage}",le="{upper:.6g}"}} {cumulative}')
+            total = cumulative + counts[-1]
+            lines.append(f'{prefix}_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {total}')
+            lines.append(f'{prefix}_duration_seconds_sum{{stage="{stage}"}} {stage_state["sum_ns"] / 1e9:.9g}')
+            lines.append(f'{prefix}_duration_seconds_count{{stage="{stage}"}} {total}')
+        return lines
+
+
+def render_prometheus_gauges(
+    prefix: str,
+    values: Dict[str, Any],
+    help_text: Optional[str] = None,
+    counters: Iterable[str] = ()
+) -> List[str]:
+    """숫자 값 딕셔너리를 Prometheus gauge 라인으로 변환 (숫자가 아닌 값은 건너뜀)
+
+    counters에 있는 키는 누적 값이므로 _total 접미사를 붙인 counter로 노출한다 (rate()/increase()용).
+    밀리초 값(_ms 키)은 Prometheus 기본 단위인 초(_seconds)로 바꿔 노출한다.
+    """
+    counters = set(counters)
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key.endswith("_ms"):
+            key, value = f"{key[:-3]}_seconds", value / 1000
+        if key in counters:
+            name, metric_type = f"{prefix}_{key}_total", "counter"
+        else:
+            name, metric_type = f"{prefix}_{key}", "gauge"
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value}")
+    return lines
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .forest_compiler import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+# 아티팩트 디렉터리 구조가 바뀌면 올림
+ARTIFACT_FORMAT = 1
+
+MANIFEST_FILE = "manifest.json"
+# 가장 최근에 빌드된 버전 이름을 담는 파일
+LATEST_FILE = "LATEST"
+
+# CompiledForest에서 .npy 파일로 저장하는 배열 (mean/scale은 스케일러 설정에 따라 없을 수 있음)
+ARRAY_FIELDS = ("feature", "threshold", "children", "leaf_proba", "roots", "classes", "mean", "scale")
+
+
+def save_artifact(
+    compiled: CompiledForest,
+    root: str,
+    version: str,
+    feature_columns: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    overwrite: bool = False,
+    write_extra: Optional[Callable[[str], None]] = None
+) -> str:
+    """컴파일된 포레스트를 root/<version>/ 아래 .npy 배열 + manifest.json으로 저장
+
+    임시 디렉터리에 모두 기록한 뒤 이름을 바꾸므로, 읽는 쪽은 완성된 아티팩트만 보게 된다.
+    write_extra(임시 디렉터리)로 추가 파일(재학습용 sklearn 모델 등)을 함께 기록할 수 있다.
+    저장 후 LATEST 파일을 새 버전으로 갱신한다.
+    """
+    target = os.path.join(root, version)
+    if os.path.exists(target) and not overwrite:
+        raise FileExistsError(f"이미 존재하는 모델 버전입니다: {target}")
+    os.makedirs(root, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=f".{version}.", dir=root)
+    try:
+        # mkdtemp는 소유자 전용 권한으로 만들므로 다른 서버 프로세스도 읽을 수 있게 조정
+        os.chmod(staging, 0o755)
+        arrays = {}
+        for name in ARRAY_FIELDS:
+            value = getattr(compiled, name)
+            if value is None:
+                continue
+            value = np.ascontiguousarray(value)
+            np.save(os.path.join(staging, f"{name}.npy"), value, allow_pickle=False)
+            arrays[name] = {"dtype": value.dtype.str, "shape": list(value.shape)}
+
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "feature_columns": list(feature_columns),
+            "n_estimators": compiled.n_estimators,
+            "n_nodes": compiled.n_nodes,
+            "max_depth": compiled.max_depth,
+            "arrays": arrays,
+            **(metadata or {})
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        if write_extra is not None:
+            write_extra(staging)
+
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_latest(root, version)
+    return target
+
+
+def _write_latest(root: str, version: str):
+    temp_path = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(temp_path, os.path.join(root, LATEST_FILE))
+
+
+def resolve_artifact_dir(root: str, version: Optional[str] = None) -> Optional[str]:
+    """지정한 버전(없으면 LATEST)의 아티팩트 디렉터리 경로 (없으면 None)"""
+    if not version:
+        try:
+            with open(os.path.join(root, LATEST_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    directory = os.path.join(root, version)
+    if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        return None
+    return directory
+
+
+def load_artifact(directory: str, feature_columns: Optional[List[str]] = None) -> Tuple[CompiledForest, Dict[str, Any]]:
+    """아티팩트를 메모리 매핑으로 열어 (CompiledForest, manifest) 반환
+
+    배열은 읽기 전용 mmap으로 열리므로 로드는 파일 크기와 무관하게 즉시 끝나고,
+    같은 파일을 여는 여러 프로세스가 페이지 캐시의 한 사본을 공유한다.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"지원하지 않는 아티팩트 형식입니다: {manifest.get('format')}")
+    if feature_columns is not None and manifest.get("feature_columns") != list(feature_columns):
+        raise ValueError(f"특성 구성이 다른 아티팩트입니다: {manifest.get('feature_columns')}")
+
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        mapped = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        if mapped.dtype.str != spec["dtype"] or list(mapped.shape) != spec["shape"]:
+            raise ValueError(f"아티팩트 배열이 manifest와 다릅니다: {name}")
+        # memmap 하위 클래스 오버헤드 없이 같은 메모리를 가리키는 일반 배열로 사용
+        arrays[name] = np.asarray(mapped)
+
+    compiled = CompiledForest(
+        feature=arrays["feature"],
+        threshold=arrays["threshold"],
+        children=arrays["children"],
+        leaf_proba=arrays["leaf_proba"],
+        roots=arrays["roots"],
+        max_depth=manifest["max_depth"],
+        classes=arrays["classes"],
+        mean=arrays.get("mean"),
+        scale=arrays.get("scale")
+    )
+    return compiled, manifest
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from .forest_compiler import CompiledForest, verify_parity
+from .metrics import LatencyHistogram, StageTimings
+from .model_artifact import LATEST_FILE, MANIFEST_FILE, load_artifact, resolve_artifact_dir
+from .model_training import generate_sample_data
+
+logger = logging.getLogger(__name__)
+
+# 버전 정보가 없는 저장 모델(models/*.joblib, 기동 중 학습)에 붙이는 버전
+DEFAULT_MODEL_VERSION = "1.0.0"
+
+
+class ModelBundle:
+    """한 버전의 모델 묶음 (sklearn 모델/스케일러 및 컴파일된 포레스트)
+
+    교체는 묶음 단위로만 일어나며 생성 후에는 바꾸지 않는다. 예측을 시작할 때 잡은
+    묶음으로 끝까지 계산하므로, 실행 중에 활성 모델이 바뀌어도 결과가 섞이지 않는다.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        model=None,
+        scaler=None,
+        compiled_forest: Optional[CompiledForest] = None,
+        source: str = "joblib",
+        created_at: Optional[str] = None,
+        evaluation: Optional[Dict[str, Any]] = None
+    ):
+        self.version = version
+        self.model = model
+        self.scaler = scaler
+        self.compiled_forest = compiled_forest
+        self.source = source
+        self.created_at = created_at
+        # 재학습 시 holdout 데이터로 평가한 지표 (평가하지 않은 모델은 None)
+        self.evaluation = evaluation
+        self.loaded_at = datetime.now().isoformat()
+
+    @classmethod
+    def from_sklearn(cls, version: str, model, scaler, compile_forest: bool = False, source: str = "joblib") -> "ModelBundle":
+        """sklearn 모델로 묶음 생성 (compile_forest이면 결과가 같은 경우에만 컴파일 엔진 추가)"""
+        compiled = None
+        if compile_forest:
+            try:
+                candidate = CompiledForest.from_sklearn(model, scaler)
+                X_sample, _ = generate_sample_data()
+                if verify_parity(candidate, model, scaler, X_sample):
+                    compiled = candidate
+                    logger.info(
+                        f"✅ 컴파일된 포레스트 엔진 활성화 "
+                        f"(트리 {candidate.n_estimators}개, 노드 {candidate.n_nodes}개)"
+                    )
+                else:
+                    logger.warning("⚠️ 컴파일된 포레스트 결과가 sklearn과 달라 기본 엔진을 사용합니다")
+            except Exception as e:
+                logger.error(f"❌ 포레스트 컴파일 실패: {str(e)}")
+
+        return cls(version, model=model, scaler=scaler, compiled_forest=compiled, source=source)
+
+    @property
+    def inference_engine(self) -> str:
+        return "compiled" if self.compiled_forest is not None else "sklearn"
+
+    def predict_proba(self, feature_matrix: np.ndarray, timings: Optional[StageTimings] = None) -> tuple:
+        """스케일링 후 클래스와 확률 계산 (워커 스레드에서 동기 실행, timings가 있으면 단계별 시간 기록)"""
+        start_ns = time.perf_counter_ns()
+        compiled = self.compiled_forest
+        # 아티팩트로 로드한 경우 sklearn 모델이 없으므로 모든 배치를 컴파일 엔진으로 처리
+        if compiled is not None and (self.model is None or len(feature_matrix) <= settings.COMPILED_FOREST_MAX_ROWS):
+            result = compiled.predict_proba(feature_matrix)
+            if timings is not None:
+                timings.lap("model.compiled_forest", start_ns)
+            return result
+
+        feature_scaled = self.scaler.transform(feature_matrix)
+        if timings is not None:
+            start_ns = timings.lap("model.scale", start_ns)
+
+        # predict()는 predict_proba()의 argmax이므로 확률 계산 한 번으로 처리
+        probabilities = self.model.predict_proba(feature_scaled)
+        predictions = self.model.classes_.take(np.argmax(probabilities, axis=1))
+        if timings is not None:
+            timings.lap("model.forest", start_ns)
+
+        return predictions, probabilities
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "inference_engine": self.inference_engine,
+            "created_at": self.created_at,
+            "loaded_at": self.loaded_at,
+            "evaluation": self.evaluation
+        }
+
+
+class ModelRegistry:
+    """build_model.py가 만든 버전별 아티팩트(root/<version>/) 조회 및 로드"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def latest_version(self) -> Optional[str]:
+        """LATEST 파일이 가리키는 버전 (없으면 None)"""
+        try:
+            with open(os.path.join(self.root, LATEST_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """등록된 모든 버전 (생성 시간 순)"""
+        if not os.path.isdir(self.root):
+            return []
+
+        latest = self.latest_version()
+        versions = []
+        for name in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, name, MANIFEST_FILE)
+            if name.startswith(".") or not os.path.exists(manifest_path):
+                continue
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 모델 manifest 읽기 실패: {name} ({str(e)})")
+                continue
+            versions.append({
+                "version": manifest.get("version", name),
+                "created_at": manifest.get("created_at"),
+                "source": manifest.get("source"),
+                "n_estimators": manifest.get("n_estimators"),
+                "evaluation": manifest.get("evaluation"),
+                "latest": name == latest
+            })
+        return sorted(versions, key=lambda v: v["created_at"] or "")
+
+    def load(self, version: Optional[str] = None, feature_columns: Optional[List[str]] = None) -> ModelBundle:
+        """지정한 버전(없으면 LATEST)을 메모리 매핑으로 로드"""
+        directory = resolve_artifact_dir(self.root, version)
+        if directory is None:
+            raise FileNotFoundError(f"모델 버전을 찾을 수 없습니다: {version or LATEST_FILE}")
+
+        compiled, manifest = load_artifact(directory, feature_columns)
+        return ModelBundle(
+            manifest["version"],
+            compiled_forest=compiled,
+            source="artifact",
+            created_at=manifest.get("created_at"),
+            evaluation=manifest.get("evaluation")
+        )
+
+
+class ShadowComparison:
+    """후보 모델을 실제 트래픽으로 함께 채점한 결과 비교 (응답에는 영향 없음)"""
+
+    def __init__(self, bundle: ModelBundle):
+        self.bundle = bundle
+        self.started_at = datetime.now().isoformat()
+        self.rows = 0
+        self.agreements = 0
+        self.higher_risk = 0
+        self.lower_risk = 0
+        self.confidence_diff_sum = 0.0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        predictions: np.ndarray,
+        probabilities: np.ndarray,
+        shadow_predictions: np.ndarray,
+        shadow_probabilities: np.ndarray,
+        seconds: float
+    ):
+        confidence_diff = np.abs(shadow_probabilities.max(axis=1) - probabilities.max(axis=1))
+        with self._lock:
+            self.rows += len(predictions)
+            self.agreements += int((shadow_predictions == predictions).sum())
+            self.higher_risk += int((shadow_predictions > predictions).sum())
+            self.lower_risk += int((shadow_predictions < predictions).sum())
+            self.confidence_diff_sum += float(confidence_diff.sum())
+        self.latency.record(seconds / max(len(predictions), 1), len(predictions))
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        rows = self.rows
+        return {
+            **self.bundle.describe(),
+            "started_at": self.started_at,
+            "rows": rows,
+            "agreement_rate": (self.agreements / rows) if rows else None,
+            "higher_risk_rows": self.higher_risk,
+            "lower_risk_rows": self.lower_risk,
+            "mean_confidence_diff": (self.confidence_diff_sum / rows) if rows else None,
+            "errors": self.errors,
+            "latency_ms": self.latency.snapshot()
+        }
@@ -0,0 +1,229 @@
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .baseline_storage import InMemoryRecordStorage
+
+logger = logging.getLogger(__name__)
+
+# 사용자별 기준 패턴 레코드 (고정 크기, 약 100바이트)
+# 각 지표는 (표본 수, 평균, 분산)을 온라인으로 갱신한다.
+PATTERN_RECORD_DTYPE = np.dtype([
+    ("events", np.uint32),
+    ("screen_n", np.uint32),
+    ("screen_mean", np.float32),
+    ("screen_var", np.float32),
+    ("opens_n", np.uint32),
+    ("opens_mean", np.float32),
+    ("opens_var", np.float32),
+    ("interval_n", np.uint32),
+    ("interval_mean", np.float32),
+    ("interval_var", np.float32),
+    ("last_checkin", np.float64),
+    ("last_event", np.float64),
+    # 시간대별 활동 횟수 (포화 시 전체를 절반으로 줄여 오래된 활동의 비중을 낮춤)
+    ("hour_hist", np.uint16, (24,)),
+])
+
+# 기준 패턴에 포함되는 지표: 필드 접두어
+PATTERN_METRICS = ("screen", "opens", "interval")
+
+HOUR_HIST_LIMIT = np.iinfo(np.uint16).max
+
+# 레코드 튜플 내 필드 위치
+_FIELD = {name: i for i, name in enumerate(PATTERN_RECORD_DTYPE.names)}
+_METRIC_FIELDS = {
+    prefix: (_FIELD[f"{prefix}_n"], _FIELD[f"{prefix}_mean"], _FIELD[f"{prefix}_var"])
+    for prefix in PATTERN_METRICS
+}
+
+
+class UserPatternStore:
+    """사용자별 행동 기준 패턴 저장소
+
+    모든 사용자의 기준 패턴을 고정 길이 레코드 저장소(메모리 또는 메모리 매핑 파일)에
+    보관하고, user_id -> 슬롯 인덱스로 접근한다. 갱신은 이벤트당 O(1)이며 평균/분산은 가중치
+    max(1/n, alpha)의 지수가중 방식으로 갱신한다. 초기에는 Welford 평균/분산과
+    같고, 표본이 쌓이면 최근 패턴을 더 반영하는 EWMA로 전환된다.
+    """
+
+    def __init__(self, storage=None, alpha: float = 0.05, min_samples: int = 5):
+        self.storage = storage if storage is not None else InMemoryRecordStorage(PATTERN_RECORD_DTYPE)
+        self.alpha = alpha
+        self.min_samples = min_samples
+
+    def __len__(self) -> int:
+        return len(self.storage)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.storage.nbytes
+
+    def _update_metric(self, values: list, prefix: str, value: float):
+        n_index, mean_index, var_index = _METRIC_FIELDS[prefix]
+        n = values[n_index] + 1
+        weight = max(1.0 / n, self.alpha)
+        diff = value - values[mean_index]
+        increment = weight * diff
+
+        values[n_index] = n
+        values[mean_index] += increment
+        values[var_index] = (1 - weight) * (values[var_index] + diff * increment)
+
+    def update(
+        self,
+        user_id: str,
+        screen_time: Optional[float] = None,
+        app_open_count: Optional[float] = None,
+        checkin_time: Optional[float] = None,
+        event_time: Optional[float] = None
+    ):
+        """이벤트 하나로 기준 패턴 갱신 (시간은 epoch 초)"""
+        with self.storage.locked():
+            slot = self.storage.slot_for(user_id, create=True)
+            # 레코드를 파이썬 값으로 한 번에 읽고 한 번에 기록 (필드별 NumPy 접근보다 빠름)
+            values = list(self.storage.read(slot))
+            values[_FIELD["events"]] += 1
+
+            if screen_time is not None:
+                self._update_metric(values, "screen", float(screen_time))
+            if app_open_count is not None:
+                self._update_metric(values, "opens", float(app_open_count))
+
+            if checkin_time is not None:
+                self._apply_checkin(values, checkin_time)
+
+            if event_time is not None:
+                hour = datetime.fromtimestamp(event_time).hour
+                hist = values[_FIELD["hour_hist"]]
+                if hist[hour] >= HOUR_HIST_LIMIT:
+                    hist >>= 1
+                hist[hour] += 1
+                values[_FIELD["last_event"]] = max(values[_FIELD["last_event"]], event_time)
+
+            self.storage.write(slot, tuple(values))
+
+    def _apply_checkin(self, values: list, checkin_time: float) -> bool:
+        """이전 체크인 이후의 간격(시간)을 학습하고 마지막 체크인 시각 갱신 (중복/역순 체크인은 무시)"""
+        last_checkin = values[_FIELD["last_checkin"]]
+        if checkin_time <= last_checkin:
+            return False
+        if last_checkin > 0:
+            self._update_metric(values, "interval", (checkin_time - last_checkin) / 3600)
+        values[_FIELD["last_checkin"]] = checkin_time
+        return True
+
+    def record_checkin(self, user_id: str, checkin_time: float) -> bool:
+        """분석 요청/스트리밍으로 들어온 체크인 시각 반영 (저장된 시각보다 최근일 때만 잠금을 잡고 기록)
+
+        저장소를 공유하는 다른 워커의 체크인 경보가 만기 시 이 시각을 확인하고, 재시작 후에는
+        이 시각으로 경보 예약을 복원한다.
+        """
+        last_checkin = self.last_checkin(user_id)
+        if last_checkin is not None and checkin_time <= last_checkin:
+            return False
+        with self.storage.locked():
+            slot = self.storage.slot_for(user_id, create=True)
+            values = list(self.storage.read(slot))
+            if not self._apply_checkin(values, checkin_time):
+                return False
+            self.storage.write(slot, tuple(values))
+        return True
+
+    def checkins(self, since: float = 0.0) -> List[Tuple[str, float]]:
+        """마지막 체크인 시각이 since 이후인 사용자의 (user_id, 체크인 시각) 목록"""
+        user_ids, last_checkin = self.storage.column("last_checkin")
+        return [(user_ids[i], float(last_checkin[i])) for i in np.flatnonzero(last_checkin > since)]
+
+    def get_baseline(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 기준 패턴 조회"""
+        slot = self.storage.slot_for(user_id)
+        if slot is None:
+            return None
+
+        values = self.storage.read(slot)
+        baseline = {"events": values[_FIELD["events"]]}
+        for prefix, (n_index, mean_index, var_index) in _METRIC_FIELDS.items():
+            baseline[prefix] = {
+                "samples": values[n_index],
+                "mean": values[mean_index],
+                "std": math.sqrt(max(values[var_index], 0.0))
+            }
+        baseline["last_checkin"] = values[_FIELD["last_checkin"]] or None
+        baseline["hour_histogram"] = values[_FIELD["hour_hist"]].tolist()
+        return baseline
+
+    def export_record(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """기준 패턴 레코드를 필드 이름 -> 값으로 (다른 샤드로 이관할 때 사용)"""
+        slot = self.storage.slot_for(user_id)
+        if slot is None:
+            return None
+        values = self.storage.read(slot)
+        return {
+            name: value.tolist() if isinstance(value, np.ndarray) else value
+            for name, value in zip(PATTERN_RECORD_DTYPE.names, values)
+        }
+
+    def import_record(self, user_id: str, record: Dict[str, Any]) -> bool:
+        """이관받은 레코드 반영 (이 저장소의 레코드가 같거나 더 많은 이벤트를 학습했으면 유지)
+
+        샤드들이 같은 저장소 파일을 공유하면 이미 같은 레코드이므로 아무것도 하지 않는다.
+        """
+        values = tuple(
+            np.asarray(record[name], dtype=PATTERN_RECORD_DTYPE.fields[name][0].base)
+            if PATTERN_RECORD_DTYPE.fields[name][0].shape else record[name]
+            for name in PATTERN_RECORD_DTYPE.names
+        )
+        with self.storage.locked():
+            slot = self.storage.slot_for(user_id, create=True)
+            if self.storage.read(slot)[_FIELD["events"]] >= values[_FIELD["events"]]:
+                return False
+            self.storage.write(slot, values)
+        return True
+
+    def last_checkin(self, user_id: str) -> Optional[float]:
+        """마지막으로 학습한 체크인 시각 (epoch 초, 없으면 None)"""
+        slot = self.storage.slot_for(user_id)
+        if slot is None:
+            return None
+        return self.storage.read(slot)[_FIELD["last_checkin"]] or None
+
+    def _zscore(self, values: tuple, prefix: str, value: float) -> float:
+        n_index, mean_index, var_index = _METRIC_FIELDS[prefix]
+        if values[n_index] < self.min_samples:
+            return 0.0
+        std = math.sqrt(max(values[var_index], 0.0))
+        if std == 0.0:
+            return 0.0
+        return (value - values[mean_index]) / std
+
+    def deviation_features(self, user_id: str, features: Dict[str, float], hour: int) -> Dict[str, float]:
+        """현재 특성의 기준 패턴 대비 편차 (기준이 부족하면 0)"""
+        deviations = {
+            "screen_time_deviation": 0.0,
+            "app_open_count_deviation": 0.0,
+            "checkin_interval_deviation": 0.0,
+            "hour_activity_share": 0.0,
+            "baseline_samples": 0
+        }
+
+        slot = self.storage.slot_for(user_id)
+        if slot is None:
+            return deviations
+
+        values = self.storage.read(slot)
+        deviations["screen_time_deviation"] = self._zscore(values, "screen", features["screen_time"])
+        deviations["app_open_count_deviation"] = self._zscore(values, "opens", features["app_open_count"])
+        deviations["checkin_interval_deviation"] = self._zscore(
+            values, "interval", features["hours_since_checkin"]
+        )
+
+        hist = values[_FIELD["hour_hist"]]
+        total = int(hist.sum())
+        if total:
+            deviations["hour_activity_share"] = int(hist[hour]) / total
+        deviations["baseline_samples"] = values[_FIELD["events"]]
+        return deviations
@@ -0,0 +1,189 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..utils.time_utils import parse_timestamp
+from .model_registry import ModelBundle
+from .rule_engine import RULE_ENGINE
+from .safety_analyzer import FEATURE_COLUMNS, RULE_BASED_CONFIDENCE, RULE_BASED_VERSION
+
+logger = logging.getLogger(__name__)
+
+# 입력 데이터 열 (user_id 외에는 없으면 요청 경로와 같은 기본값 사용)
+# last_activity / last_checkin: epoch 초(숫자) 또는 ISO 8601 문자열
+SWEEP_INPUT_COLUMNS = ["user_id", "screen_time", "app_open_count", "last_activity", "last_checkin", "location_changes"]
+
+# 출력 열 순서
+SWEEP_OUTPUT_COLUMNS = [
+    "user_id", "risk_level", "confidence", "model_version", "risk_factor_mask",
+    "screen_time", "app_open_count", "hours_since_checkin", "hours_since_activity", "location_changes"
+]
+
+# 값이 없을 때 사용하는 경과 시간 (요청 경로의 기본값과 동일)
+DEFAULT_HOURS_SINCE = 24.0
+
+
+def iter_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """CSV/Parquet/Arrow 파일을 chunk_size 행씩 읽기 (필요한 열만 읽어 메모리 사용량 제한)"""
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in (".csv", ".gz"):
+        header = pd.read_csv(path, nrows=0).columns
+        if "user_id" not in header:
+            raise ValueError(f"user_id 열이 없습니다: {path}")
+        usecols = [column for column in SWEEP_INPUT_COLUMNS if column in header]
+        yield from pd.read_csv(path, usecols=usecols, dtype={"user_id": str}, chunksize=chunk_size)
+        return
+
+    if extension in (".parquet", ".pq", ".arrow", ".feather", ".ipc"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet/Arrow 입력에는 pyarrow 패키지가 필요합니다") from e
+
+        if extension in (".parquet", ".pq"):
+            parquet_file = pq.ParquetFile(path)
+            columns = [column for column in SWEEP_INPUT_COLUMNS if column in parquet_file.schema_arrow.names]
+            batches = parquet_file.iter_batches(batch_size=chunk_size, columns=columns)
+        else:
+            # Arrow IPC 파일은 메모리 매핑으로 열어 레코드 배치 단위로 변환
+            reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+            columns = [column for column in SWEEP_INPUT_COLUMNS if column in reader.schema.names]
+            batches = (
+                reader.get_batch(i).select(columns).slice(offset, chunk_size)
+                for i in range(reader.num_record_batches)
+                for offset in range(0, reader.get_batch(i).num_rows, chunk_size)
+            )
+        if "user_id" not in columns:
+            raise ValueError(f"user_id 열이 없습니다: {path}")
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+
+    raise ValueError(f"지원하지 않는 입력 형식입니다: {path} (csv, parquet, arrow)")
+
+
+def _unique_epoch(value: Any) -> float:
+    if isinstance(value, pd.Timestamp):
+        # 시간대 없는 값은 to_pydatetime().timestamp()가 서버 로컬 시간으로 해석
+        return value.to_pydatetime().timestamp()
+    result = parse_timestamp(value)
+    return np.nan if result is None else result
+
+
+def _epoch_seconds(column: pd.Series) -> np.ndarray:
+    """epoch 초 또는 ISO 문자열 열을 epoch 초 배열로 변환 (해석할 수 없으면 NaN)
+
+    ISO 문자열은 요청 경로와 같은 규칙(시간대 없으면 서버 로컬 시간)으로 해석하며,
+    고유 값만 한 번씩 해석해 같은 시각이 반복되는 열을 빠르게 처리한다.
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    parsed = np.array([_unique_epoch(value) for value in uniques] + [np.nan], dtype=np.float64)
+    # 결측값(-1)은 마지막의 NaN을 가리키게 함
+    return parsed[codes]
+
+
+def compute_features(chunk: pd.DataFrame, now_ts: float) -> pd.DataFrame:
+    """_extract_features와 같은 특성을 열 단위 연산으로 계산"""
+    n_rows = len(chunk)
+
+    def numeric(name: str) -> np.ndarray:
+        if name not in chunk:
+            return np.zeros(n_rows)
+        return np.nan_to_num(chunk[name].to_numpy(dtype=np.float64, na_value=np.nan), nan=0.0)
+
+    def hours_since(name: str) -> np.ndarray:
+        if name not in chunk:
+            return np.full(n_rows, DEFAULT_HOURS_SINCE)
+        hours = (now_ts - _epoch_seconds(chunk[name])) / 3600
+        return np.where(np.isnan(hours), DEFAULT_HOURS_SINCE, hours)
+
+    return pd.DataFrame({
+        "screen_time": numeric("screen_time"),
+        "app_open_count": numeric("app_open_count"),
+        "hours_since_checkin": hours_since("last_checkin"),
+        "location_changes": numeric("location_changes"),
+        "hours_since_activity": hours_since("last_activity")
+    }, index=chunk.index)
+
+
+class PopulationSweep:
+    """전체 사용자 데이터를 청크 단위로 채점하고 위험 사용자만 내보내는 일괄 분석기
+
+    특성 계산과 규칙 평가는 모두 열 단위 NumPy 연산이며, 모델이 있으면 청크 전체를
+    한 번의 행렬 예측으로 채점한다. 한 번에 한 청크만 메모리에 올리므로 입력 크기와
+    무관하게 메모리 사용량이 chunk_size에 비례한다.
+    """
+
+    def __init__(
+        self,
+        bundle: Optional[ModelBundle] = None,
+        chunk_size: int = 100000,
+        risk_threshold: float = 5.0
+    ):
+        self.bundle = bundle
+        self.chunk_size = chunk_size
+        self.risk_threshold = risk_threshold
+        self.stats: Dict[str, Any] = {}
+
+    def score_chunk(self, chunk: pd.DataFrame, now_ts: float) -> pd.DataFrame:
+        """한 청크의 위험도/신뢰도/채점 방법/위험 요소 마스크 계산 (모델 실패 시 규칙 기반으로 대체)"""
+        features = compute_features(chunk, now_ts)
+        columns = {name: features[name].to_numpy() for name in features.columns}
+        scored = features.assign(user_id=chunk["user_id"].to_numpy())
+
+        bundle = self.bundle
+        if bundle is not None:
+            try:
+                predictions, probabilities = bundle.predict_proba(
+                    features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+                )
+                scored["risk_level"] = np.minimum(predictions * 3.33, 10).astype(np.int64)
+                scored["confidence"] = probabilities.max(axis=1)
+                scored["model_version"] = bundle.version
+                scored["risk_factor_mask"] = RULE_ENGINE.evaluate(columns).factor_mask
+                return scored
+            except Exception as e:
+                logger.error(f"❌ 일괄 분석 모델 예측 실패, 규칙 기반으로 대체: {str(e)}")
+
+        rules = RULE_ENGINE.evaluate(columns)
+        scored["risk_level"] = rules.risk_score
+        scored["confidence"] = RULE_BASED_CONFIDENCE
+        scored["model_version"] = RULE_BASED_VERSION
+        scored["risk_factor_mask"] = rules.factor_mask
+        return scored
+
+    def run(self, path: str, now_ts: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """입력 파일 전체를 채점하여 위험도가 임계값 이상인 사용자만 청크별로 반환
+
+        모든 사용자의 경과 시간은 같은 기준 시각(now_ts, 기본값은 시작 시각)으로 계산한다.
+        실행 통계는 반복이 끝난 뒤 self.stats에서 확인할 수 있다.
+        """
+        now_ts = time.time() if now_ts is None else now_ts
+        start_time = time.perf_counter()
+        self.stats = {"rows": 0, "flagged": 0, "chunks": 0, "seconds": 0.0}
+
+        for chunk in iter_chunks(path, self.chunk_size):
+            scored = self.score_chunk(chunk, now_ts)
+            flagged = scored[scored["risk_level"] >= self.risk_threshold]
+
+            self.stats["rows"] += len(chunk)
+            self.stats["flagged"] += len(flagged)
+            self.stats["chunks"] += 1
+            if len(flagged):
+                yield flagged
+
+        self.stats["seconds"] = time.perf_counter() - start_time
+        logger.info(
+            f"✅ 전체 사용자 일괄 분석 완료: {self.stats['rows']}명 중 {self.stats['flagged']}명 위험 "
+            f"({self.stats['seconds']:.1f}초)"
+        )
+
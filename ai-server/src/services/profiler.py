@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# 스택 최대 깊이 (재귀 등으로 깊어진 스택은 바깥쪽 프레임을 잘라냄)
+MAX_STACK_DEPTH = 128
+
+# 가장 안쪽 프레임이 이 (파일, 함수)이면 대기 중인 스레드로 보고 기본적으로 제외
+IDLE_FRAMES = {
+    ("thread.py", "_worker"),       # 작업을 기다리는 스레드 풀 워커
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),     # 이벤트를 기다리는 이벤트 루프
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """모든 스레드의 호출 스택을 주기적으로 수집하는 샘플링 프로파일러
+
+    sys._current_frames()로 실행 중인 스택을 읽기만 하므로 대상 코드에 계측을 넣지 않고,
+    프로파일 중에만 비용이 든다. 결과는 flamegraph.pl / speedscope 등에서 읽는
+    collapsed stack 형식("스레드;바깥 함수;...;안쪽 함수 샘플 수")으로 만든다.
+    한 프로세스에서 한 번에 하나의 프로파일만 실행한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> Optional[Dict[str, int]]:
+        """seconds 동안 interval 간격으로 샘플링한 스택별 횟수 (다른 프로파일이 실행 중이면 None)
+
+        이 함수를 실행하는 스레드 자신과, include_idle이 아니면 대기 중인 스레드는 샘플에서
+        제외한다. 이벤트 루프를 막지 않도록 별도 스레드(asyncio.to_thread 등)에서 호출해야 한다.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Dict[str, int]:
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+
+        return dict(stacks)
+
+
+def collapse_stacks(stacks: Dict[str, int]) -> str:
+    """스택별 횟수를 collapsed stack 텍스트로 변환 (샘플 수 내림차순)"""
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1])]
+    return "\n".join(lines) + ("\n" if lines else "")
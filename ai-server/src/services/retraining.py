@@ -0,0 +1,444 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .forest_compiler import CompiledForest, verify_parity
+from .model_artifact import resolve_artifact_dir, save_artifact
+from .model_registry import DEFAULT_MODEL_VERSION, ModelRegistry
+from .model_training import generate_sample_data, train_default_model
+from .training_data import OutcomeDataset
+
+logger = logging.getLogger(__name__)
+
+# 웜 스타트용으로 아티팩트에 함께 저장하는 sklearn 모델/스케일러
+SKLEARN_MODEL_FILE = "sklearn_model.joblib"
+SKLEARN_SCALER_FILE = "sklearn_scaler.joblib"
+
+# retrain.py 종료 코드
+EXIT_PUBLISHED = 0
+EXIT_FAILED = 1
+EXIT_NOT_PUBLISHED = 2
+EXIT_BUSY = 3
+
+# 기본 모델과 같은 하이퍼파라미터 (처음부터 학습할 때)
+N_ESTIMATORS = 100
+MAX_DEPTH = 10
+
+
+class _BottomKSample:
+    """무작위 키가 가장 작은 capacity개 행만 유지하는 균등 표본 (chunk 단위로 추가)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._keys: List[np.ndarray] = []
+        self._X: List[np.ndarray] = []
+        self._y: List[np.ndarray] = []
+        self._buffered = 0
+
+    def add(self, keys: np.ndarray, X: np.ndarray, y: np.ndarray):
+        if len(keys) == 0:
+            return
+        self._keys.append(keys)
+        self._X.append(X)
+        self._y.append(y)
+        self._buffered += len(keys)
+        # 상한의 두 배까지 모았다가 한 번에 줄여 chunk마다 전체를 복사하지 않음
+        if self._buffered >= 2 * self.capacity:
+            self._compact()
+
+    def _compact(self):
+        keys = np.concatenate(self._keys)
+        X = np.concatenate(self._X)
+        y = np.concatenate(self._y)
+        if len(keys) > self.capacity:
+            keep = np.argpartition(keys, self.capacity - 1)[:self.capacity]
+            keys, X, y = keys[keep], X[keep], y[keep]
+        self._keys, self._X, self._y = [keys], [X], [y]
+        self._buffered = len(keys)
+
+    def arrays(self, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self._keys:
+            return np.empty((0, n_features)), np.empty(0, dtype=np.int64)
+        self._compact()
+        return self._X[0], self._y[0]
+
+
+def load_sample(
+    dataset: OutcomeDataset,
+    max_rows: int,
+    holdout_fraction: float,
+    chunk_size: int = 100000,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """데이터셋을 chunk 단위로 읽어 사용자 기준 학습/평가 분할과 균등 표본 추출
+
+    평가 행은 user_id 해시로 정하므로 같은 사용자는 항상 같은 쪽에 속하고, 재학습마다
+    같은 사용자 집합으로 평가한다. 행 수가 max_rows를 넘으면 각 분할에서 균등 표본만 남겨
+    메모리 사용량은 데이터셋 크기가 아니라 max_rows에 비례한다.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    holdout_rows = int(max_rows * holdout_fraction)
+    train = _BottomKSample(max_rows - holdout_rows)
+    holdout = _BottomKSample(max(holdout_rows, 1))
+    n_features = len(dataset.feature_columns)
+    total_rows = 0
+
+    for chunk in dataset.iter_chunks(chunk_size):
+        chunk = chunk.dropna(subset=dataset.feature_columns + ["label"])
+        # 이미 기록된 무한대 특성 행도 제외 (dropna는 NaN만 제거)
+        finite = np.isfinite(chunk[dataset.feature_columns].to_numpy(dtype=np.float64)).all(axis=1)
+        if not finite.all():
+            chunk = chunk[finite]
+        if chunk.empty:
+            continue
+        total_rows += len(chunk)
+        user_hash = pd.util.hash_pandas_object(chunk["user_id"], index=False).to_numpy()
+        in_holdout = (user_hash % 10000) < holdout_fraction * 10000
+        X = chunk[dataset.feature_columns].to_numpy(dtype=np.float64)
+        y = chunk["label"].to_numpy(dtype=np.int64)
+        keys = rng.random(len(chunk))
+        train.add(keys[~in_holdout], X[~in_holdout], y[~in_holdout])
+        holdout.add(keys[in_holdout], X[in_holdout], y[in_holdout])
+
+    X_train, y_train = train.arrays(n_features)
+    X_holdout, y_holdout = holdout.arrays(n_features)
+    return {
+        "X_train": X_train,
+        "y_train": y_train,
+        "X_holdout": X_holdout,
+        "y_holdout": y_holdout,
+        "total_rows": total_rows
+    }
+
+
+def evaluate(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    """정확도와 클래스 평균(macro) 정밀도/재현율/F1"""
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, labels=[0, 1, 2], average="macro", zero_division=0
+    )
+    return {
+        "accuracy": round(float(accuracy_score(y_true, y_pred)), 4),
+        "precision": round(float(precision), 4),
+        "recall": round(float(recall), 4),
+        "f1_score": round(float(f1), 4)
+    }
+
+
+def load_current_model(artifact_root: str, feature_columns: List[str]) -> Dict[str, Any]:
+    """현재 서빙 중인 모델 (서버와 같은 순서: 아티팩트 LATEST > 저장된 모델 > 기본 모델)
+
+    반환: version, predict(X) -> 클래스, 웜 스타트용 sklearn model/scaler (없으면 None)
+    """
+    import joblib
+
+    directory = resolve_artifact_dir(artifact_root)
+    if directory is not None:
+        bundle = ModelRegistry(artifact_root).load(None, feature_columns)
+        model = scaler = None
+        model_path = os.path.join(directory, SKLEARN_MODEL_FILE)
+        scaler_path = os.path.join(directory, SKLEARN_SCALER_FILE)
+        if os.path.exists(model_path) and os.path.exists(scaler_path):
+            model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+        return {
+            "version": bundle.version,
+            "predict": lambda X: bundle.predict_proba(X)[0],
+            "model": model,
+            "scaler": scaler
+        }
+
+    if os.path.exists("models/safety_model.joblib") and os.path.exists("models/safety_scaler.joblib"):
+        model = joblib.load("models/safety_model.joblib")
+        scaler = joblib.load("models/safety_scaler.joblib")
+    else:
+        model, scaler = train_default_model()
+    return {
+        "version": DEFAULT_MODEL_VERSION,
+        "predict": lambda X: model.predict(scaler.transform(X)),
+        "model": model,
+        "scaler": scaler
+    }
+
+
+def fit_candidate(
+    X: np.ndarray,
+    y: np.ndarray,
+    n_jobs: int = 1,
+    base_model=None,
+    base_scaler=None,
+    warm_start_trees: int = 50,
+    max_trees: int = 300,
+    seed: int = 42
+) -> Tuple[Any, Any, bool]:
+    """후보 모델 학습: (모델, 스케일러, 웜 스타트 여부)
+
+    현재 모델이 주어지고 클래스 구성이 같으면 기존 트리와 스케일러를 그대로 두고
+    warm_start_trees개 트리만 새 데이터로 추가 학습한다 (트리가 max_trees를 넘게 되거나
+    이어서 학습할 수 없으면 처음부터 학습).
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    if (
+        base_model is not None
+        and base_scaler is not None
+        and warm_start_trees > 0
+        and base_model.n_estimators + warm_start_trees <= max_trees
+        and set(np.unique(y).tolist()) == set(base_model.classes_.tolist())
+    ):
+        try:
+            base_model.set_params(
+                warm_start=True,
+                n_estimators=base_model.n_estimators + warm_start_trees,
+                n_jobs=n_jobs
+            )
+            base_model.fit(base_scaler.transform(X), y)
+            return base_model, base_scaler, True
+        except Exception as e:
+            # 다른 scikit-learn 버전으로 저장된 모델 등은 이어서 학습할 수 없음
+            logger.warning(f"⚠️ 웜 스타트 실패, 처음부터 학습합니다: {str(e)}")
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = RandomForestClassifier(
+        n_estimators=N_ESTIMATORS,
+        max_depth=MAX_DEPTH,
+        random_state=seed,
+        n_jobs=n_jobs
+    )
+    model.fit(X_scaled, y)
+    return model, scaler, False
+
+
+def run_retraining(
+    dataset: OutcomeDataset,
+    artifact_root: str,
+    version: str,
+    max_rows: int = 1000000,
+    chunk_size: int = 100000,
+    holdout_fraction: float = 0.2,
+    min_rows: int = 200,
+    min_improvement: float = 0.0,
+    n_jobs: int = 1,
+    warm_start: bool = True,
+    warm_start_trees: int = 50,
+    max_trees: int = 300
+) -> Dict[str, Any]:
+    """축적된 데이터로 후보 모델을 학습하고, 같은 holdout에서 현재 모델보다 나을 때만 배포
+
+    결과 status: "published" (새 버전을 LATEST로 저장), "not_improved", "insufficient_data"
+    """
+    start = time.perf_counter()
+    sample = load_sample(dataset, max_rows, holdout_fraction, chunk_size)
+    X_train, y_train = sample["X_train"], sample["y_train"]
+    X_holdout, y_holdout = sample["X_holdout"], sample["y_holdout"]
+    result: Dict[str, Any] = {
+        "version": version,
+        "total_rows": sample["total_rows"],
+        "train_rows": len(y_train),
+        "holdout_rows": len(y_holdout)
+    }
+    logger.info(
+        f"📚 재학습 데이터 로드: 전체 {sample['total_rows']}행, "
+        f"학습 {len(y_train)}행, 평가 {len(y_holdout)}행"
+    )
+
+    if len(y_train) < min_rows or len(y_holdout) == 0 or len(np.unique(y_train)) < 2:
+        result["status"] = "insufficient_data"
+        result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    current = load_current_model(artifact_root, dataset.feature_columns)
+    current_metrics = evaluate(y_holdout, current["predict"](X_holdout))
+
+    model, scaler, warm_started = fit_candidate(
+        X_train,
+        y_train,
+        n_jobs=n_jobs,
+        base_model=current["model"] if warm_start else None,
+        base_scaler=current["scaler"] if warm_start else None,
+        warm_start_trees=warm_start_trees,
+        max_trees=max_trees
+    )
+    candidate_metrics = evaluate(y_holdout, model.predict(scaler.transform(X_holdout)))
+    result.update({
+        "base_version": current["version"],
+        "warm_start": warm_started,
+        "current": current_metrics,
+        "candidate": candidate_metrics
+    })
+
+    improvement = candidate_metrics["f1_score"] - current_metrics["f1_score"]
+    if improvement <= min_improvement:
+        logger.info(
+            f"⏸️ 후보 모델이 개선되지 않아 배포하지 않습니다 "
+            f"(F1 {current_metrics['f1_score']:.4f} -> {candidate_metrics['f1_score']:.4f})"
+        )
+        result["status"] = "not_improved"
+        result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    X_sample, _ = generate_sample_data()
+    if not verify_parity(compiled, model, scaler, np.vstack([X_sample, X_holdout[:1000]])):
+        raise RuntimeError("컴파일된 포레스트 결과가 scikit-learn과 달라 배포하지 않습니다")
+
+    def write_sklearn(directory: str):
+        import joblib
+        joblib.dump(model, os.path.join(directory, SKLEARN_MODEL_FILE))
+        joblib.dump(scaler, os.path.join(directory, SKLEARN_SCALER_FILE))
+
+    save_artifact(
+        compiled,
+        artifact_root,
+        version,
+        dataset.feature_columns,
+        metadata={
+            "source": "retrained",
+            "parity_verified": True,
+            "evaluation": {
+                "metrics": candidate_metrics,
+                "baseline_metrics": current_metrics,
+                "base_version": current["version"],
+                "warm_start": warm_started,
+                "train_rows": len(y_train),
+                "holdout_rows": len(y_holdout),
+                "trained_at": datetime.now().isoformat()
+            }
+        },
+        write_extra=write_sklearn
+    )
+    logger.info(
+        f"✅ 재학습 모델 배포: {version} "
+        f"(F1 {current_metrics['f1_score']:.4f} -> {candidate_metrics['f1_score']:.4f})"
+    )
+    result["status"] = "published"
+    result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class RetrainingJob:
+    """서버에서 retrain.py를 별도 프로세스로 실행하고 결과를 추적
+
+    학습은 자식 프로세스에서 낮은 우선순위(nice)와 CPU 시간 상한으로 실행되므로 서빙 이벤트
+    루프와 추론 워커 풀은 영향을 받지 않는다. 새 버전이 배포되면 on_published(version)을
+    호출한다 (다른 워커는 LATEST 파일 감시로 교체). 한 워커에서 한 번에 하나만 실행하며,
+    여러 워커/cron 사이의 동시 실행은 retrain.py의 파일 잠금으로 막는다.
+    """
+
+    def __init__(
+        self,
+        script_path: str,
+        n_jobs: int = 1,
+        nice: int = 10,
+        cpu_seconds: int = 0,
+        on_published: Optional[Callable[[str], Awaitable[Any]]] = None
+    ):
+        self.script_path = script_path
+        self.n_jobs = n_jobs
+        self.nice = nice
+        self.cpu_seconds = cpu_seconds
+        self.on_published = on_published
+        self._task: Optional[asyncio.Task] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self.state = "idle"
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.returncode: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """재학습 프로세스 시작 (이미 실행 중이면 RuntimeError)"""
+        if self.running:
+            raise RuntimeError("이미 재학습이 진행 중입니다")
+        version = version or f"retrain-{datetime.now():%Y%m%d-%H%M%S}"
+        self.state = "running"
+        self.started_at = datetime.now().isoformat()
+        self.finished_at = self.returncode = self.result = self.error = None
+        self._task = asyncio.create_task(self._run(version))
+        return self.get_status()
+
+    async def _run(self, version: str):
+        # 자식 프로세스의 수치 연산 스레드 수도 n_jobs로 제한
+        threads = str(max(self.n_jobs, 1))
+        env = {
+            **os.environ,
+            "OMP_NUM_THREADS": threads,
+            "OPENBLAS_NUM_THREADS": threads,
+            "MKL_NUM_THREADS": threads
+        }
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable, self.script_path,
+                "--version", version,
+                "--n-jobs", str(self.n_jobs),
+                "--nice", str(self.nice),
+                "--cpu-seconds", str(self.cpu_seconds),
+                stdout=asyncio.subprocess.PIPE,
+                env=env
+            )
+            logger.info(f"🏋️ 재학습 프로세스 시작: pid {self._process.pid}, 버전 {version}")
+            stdout, _ = await self._process.communicate()
+            self.returncode = self._process.returncode
+            lines = stdout.decode("utf-8", errors="replace").strip().splitlines()
+            if lines:
+                try:
+                    self.result = json.loads(lines[-1])
+                except ValueError:
+                    self.error = lines[-1]
+
+            if self.returncode == EXIT_PUBLISHED and self.result is not None:
+                self.state = "published"
+                if self.on_published is not None:
+                    await self.on_published(self.result["version"])
+            elif self.returncode == EXIT_NOT_PUBLISHED:
+                self.state = "not_published"
+            elif self.returncode == EXIT_BUSY:
+                self.state = "busy"
+            else:
+                self.state = "failed"
+                logger.error(f"❌ 재학습 실패: 종료 코드 {self.returncode}")
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"❌ 재학습 실행 실패: {str(e)}")
+        finally:
+            self._process = None
+            self.finished_at = datetime.now().isoformat()
+
+    def stop(self):
+        """실행 중인 재학습 프로세스 종료 (서버 종료 시)"""
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "pid": self._process.pid if self._process is not None else None,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "result": self.result,
+            "error": self.error
+        }
@@ -0,0 +1,535 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 세그먼트 단계: raw (메모리 버퍼를 그대로 기록), day (하루치 raw 병합), hourly (시간 단위 롤업)
+LEVEL_RAW = "raw"
+LEVEL_DAY = "day"
+LEVEL_HOURLY = "hourly"
+
+META_FILE = "meta.json"
+COMPACT_LOCK_FILE = ".compact.lock"
+
+# 세그먼트 열 (모든 단계 공통, raw 행은 count=1이고 risk_max == risk_mean)
+COLUMN_NAMES = ("key", "ts", "risk_max", "risk_mean", "confidence", "features", "count")
+
+# 오늘 날짜 raw 세그먼트가 이 개수 이상이면 하나로 병합 (조회 시 여는 세그먼트 수 제한)
+RAW_MERGE_SEGMENTS = 16
+
+DAY_SECONDS = 86400
+HOUR_SECONDS = 3600
+
+
+def user_key(user_id: str) -> int:
+    """세그먼트 정렬/검색용 사용자 키 (프로세스와 무관하게 같은 값인 64비트 해시)"""
+    return int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _empty_columns(n_features: int) -> Dict[str, np.ndarray]:
+    return {
+        "key": np.empty(0, dtype=np.uint64),
+        "ts": np.empty(0, dtype=np.float64),
+        "risk_max": np.empty(0, dtype=np.uint8),
+        "risk_mean": np.empty(0, dtype=np.float32),
+        "confidence": np.empty(0, dtype=np.float32),
+        "features": np.empty((0, n_features), dtype=np.float32),
+        "count": np.empty(0, dtype=np.uint32)
+    }
+
+
+class _Memtable:
+    """최근 기록을 담는 열 단위 메모리 버퍼 (사용자별 행 번호 목록으로 조회)"""
+
+    def __init__(self, capacity: int, n_features: int):
+        self.rows = 0
+        self.key = np.empty(capacity, dtype=np.uint64)
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.risk = np.empty(capacity, dtype=np.uint8)
+        self.confidence = np.empty(capacity, dtype=np.float32)
+        self.features = np.empty((capacity, n_features), dtype=np.float32)
+        # user_id -> (사용자 키, 행 번호 목록)
+        self.by_user: Dict[str, Tuple[int, List[int]]] = {}
+
+    def append(self, user_id: str, ts: float, risk_level: int, confidence: float, features: Sequence[float]):
+        entry = self.by_user.get(user_id)
+        if entry is None:
+            entry = self.by_user[user_id] = (user_key(user_id), [])
+        row = self.rows
+        if row == len(self.ts):
+            self._grow()
+        self.key[row] = entry[0]
+        self.ts[row] = ts
+        self.risk[row] = risk_level
+        self.confidence[row] = confidence
+        self.features[row] = features
+        entry[1].append(row)
+        self.rows = row + 1
+
+    def _grow(self):
+        for name in ("key", "ts", "risk", "confidence", "features"):
+            current = getattr(self, name)
+            grown = np.empty((len(current) * 2,) + current.shape[1:], dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def _columns(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        risk = self.risk.take(rows)
+        return {
+            "key": self.key.take(rows),
+            "ts": self.ts.take(rows),
+            "risk_max": risk,
+            "risk_mean": risk.astype(np.float32),
+            "confidence": self.confidence.take(rows),
+            "features": self.features.take(rows, axis=0),
+            "count": np.ones(len(rows), dtype=np.uint32)
+        }
+
+    def user_columns(self, user_id: str) -> Optional[Dict[str, np.ndarray]]:
+        entry = self.by_user.get(user_id)
+        if entry is None:
+            return None
+        return self._columns(np.array(entry[1], dtype=np.int64))
+
+    def sorted_columns(self) -> Dict[str, np.ndarray]:
+        """(사용자 키, 시각) 순으로 정렬한 전체 행"""
+        order = np.lexsort((self.ts[:self.rows], self.key[:self.rows]))
+        return self._columns(order)
+
+
+class _Segment:
+    """디스크 세그먼트 하나 (열별 .npy 파일을 읽기 전용 mmap으로 열어 둠)"""
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.meta = meta
+        self.t_start = meta["t_start"]
+        self.t_end = meta["t_end"]
+        self.level = meta["level"]
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            self._columns = {
+                name: np.asarray(np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r"))
+                for name in COLUMN_NAMES
+            }
+        return self._columns
+
+    def user_columns(self, key: int, start: float, end: float) -> Optional[Dict[str, np.ndarray]]:
+        """사용자 키 구간만 이진 검색으로 찾아 시간 범위로 거름 (다른 사용자의 행은 읽지 않음)"""
+        columns = self.columns
+        keys = columns["key"]
+        lo = int(np.searchsorted(keys, key, side="left"))
+        hi = int(np.searchsorted(keys, key, side="right"))
+        if lo == hi:
+            return None
+        ts = columns["ts"][lo:hi]
+        # 사용자 구간 안에서는 시각 순으로 정렬되어 있음
+        first = lo + int(np.searchsorted(ts, start, side="left"))
+        last = lo + int(np.searchsorted(ts, end, side="right"))
+        if first == last:
+            return None
+        return {name: np.array(column[first:last]) for name, column in columns.items() if name != "key"}
+
+
+def _write_segment(
+    directory: str,
+    level: str,
+    columns: Dict[str, np.ndarray],
+    replaces: Sequence[str] = (),
+    group: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    """정렬된 열을 새 세그먼트로 기록 (임시 디렉터리에 기록 후 이름 변경)
+
+    group: 병합 한 번이 여러 세그먼트를 만들 때의 {"id", "size"} (모두 기록되어야 replaces가 적용됨)
+    """
+    rows = len(columns["ts"])
+    if rows == 0:
+        return None
+    t_start = float(columns["ts"].min())
+    t_end = float(columns["ts"].max())
+    name = f"{level}-{int(t_start)}-{int(t_end)}-{os.getpid()}-{time.time_ns()}"
+    staging = tempfile.mkdtemp(prefix=f".{name}.", dir=directory)
+    try:
+        os.chmod(staging, 0o755)
+        for column_name in COLUMN_NAMES:
+            np.save(os.path.join(staging, f"{column_name}.npy"), np.ascontiguousarray(columns[column_name]), allow_pickle=False)
+        meta = {
+            "level": level,
+            "t_start": t_start,
+            "t_end": t_end,
+            "rows": rows,
+            "created_at": time.time(),
+            # 이 세그먼트가 대체한 세그먼트 (삭제 전에 목록을 읽은 쪽이 중복 집계하지 않도록)
+            "replaces": list(replaces),
+            "group": group
+        }
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        target = os.path.join(directory, name)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+def _concat(parts: List[Dict[str, np.ndarray]], n_features: int) -> Dict[str, np.ndarray]:
+    if not parts:
+        return _empty_columns(n_features)
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def rollup_hourly(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """(사용자 키, 시각) 순으로 정렬된 행을 사용자별 1시간 단위로 요약 (최대/가중 평균/건수)"""
+    if len(columns["ts"]) == 0:
+        return columns
+    hour = np.floor(columns["ts"] / HOUR_SECONDS).astype(np.int64)
+    keys = columns["key"]
+    boundary = np.ones(len(hour), dtype=bool)
+    boundary[1:] = (keys[1:] != keys[:-1]) | (hour[1:] != hour[:-1])
+    starts = np.flatnonzero(boundary)
+
+    count = columns["count"].astype(np.float64)
+    total = np.add.reduceat(count, starts)
+    weighted = lambda values: np.add.reduceat(values.astype(np.float64) * count, starts) / total
+    return {
+        "key": keys[starts],
+        "ts": (hour[starts] * HOUR_SECONDS).astype(np.float64),
+        "risk_max": np.maximum.reduceat(columns["risk_max"], starts),
+        "risk_mean": weighted(columns["risk_mean"]).astype(np.float32),
+        "confidence": weighted(columns["confidence"]).astype(np.float32),
+        "features": (
+            np.add.reduceat(columns["features"].astype(np.float64) * count[:, np.newaxis], starts)
+            / total[:, np.newaxis]
+        ).astype(np.float32),
+        "count": total.astype(np.uint32)
+    }
+
+
+class RiskHistoryStore:
+    """사용자별 위험도 이력 (시각, 위험도, 신뢰도, 모델 입력 특성)을 열 단위 세그먼트로 저장
+
+    - 기록은 메모리 버퍼(열 배열)에 한 행을 쓰는 것으로 끝나며 디스크 I/O가 없다.
+    - flush()는 버퍼를 (사용자 키, 시각) 순으로 정렬해 raw 세그먼트로 기록한다. 세그먼트는 열별
+      .npy 파일이며 읽을 때 mmap으로 열고, 사용자 구간을 이진 검색으로 찾으므로 조회 비용은
+      세그먼트 수와 해당 사용자의 행 수에만 비례한다.
+    - compact()는 지난 날짜의 raw 세그먼트를 하루 단위로 병합하고, raw_retention_days보다 오래된
+      데이터는 사용자별 1시간 롤업(최대/평균 위험도, 건수)으로 줄이며, retention_days가 지나면 삭제한다.
+    - 여러 워커가 같은 디렉터리에 세그먼트를 기록할 수 있고, 병합은 파일 잠금을 잡은 한 프로세스만 한다.
+      다른 워커의 아직 기록되지 않은 버퍼 내용은 조회에 포함되지 않는다.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        feature_columns: Sequence[str],
+        memtable_rows: int = 100000,
+        raw_retention_days: float = 7,
+        retention_days: float = 365
+    ):
+        self.directory = directory
+        self.feature_columns = list(feature_columns)
+        self.memtable_rows = memtable_rows
+        self.raw_retention_seconds = raw_retention_days * DAY_SECONDS
+        self.retention_seconds = retention_days * DAY_SECONDS
+        self._memtable = _Memtable(min(memtable_rows, 65536), len(self.feature_columns))
+        # flush 중인 버퍼 (기록이 끝날 때까지 조회에 포함)
+        self._flushing: Optional[_Memtable] = None
+        self._segments: Dict[str, _Segment] = {}
+        self._segments_lock = threading.Lock()
+        self.total_appended = 0
+        self.total_flushed = 0
+        self.last_flush_at = time.time()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def pending_rows(self) -> int:
+        return self._memtable.rows
+
+    def append(self, user_id: str, ts: float, risk_level: int, confidence: float, features: Dict[str, float]):
+        """분석 결과 한 건 기록 (메모리 버퍼에만 씀, 이벤트 루프 스레드에서 호출)"""
+        self._memtable.append(
+            user_id, ts, risk_level, confidence, [features[column] for column in self.feature_columns]
+        )
+        self.total_appended += 1
+
+    def flush_due(self, interval_seconds: float) -> bool:
+        return self._memtable.rows >= self.memtable_rows or (
+            self._memtable.rows > 0 and time.time() - self.last_flush_at >= interval_seconds
+        )
+
+    def detach_memtable(self) -> Optional[_Memtable]:
+        """현재 버퍼를 떼어 내고 새 버퍼로 교체 (기록하는 스레드에서 호출, 떼어 낸 버퍼는 flush_memtable로 기록)"""
+        if self._memtable.rows == 0:
+            return None
+        memtable = self._memtable
+        self._flushing = memtable
+        self._memtable = _Memtable(len(memtable.ts), len(self.feature_columns))
+        self.last_flush_at = time.time()
+        return memtable
+
+    def flush_memtable(self, memtable: _Memtable) -> Optional[str]:
+        """떼어 낸 버퍼를 raw 세그먼트로 기록 (워커 스레드에서 실행 가능)"""
+        try:
+            path = _write_segment(self.directory, LEVEL_RAW, memtable.sorted_columns())
+            self.total_flushed += memtable.rows
+            return path
+        finally:
+            if self._flushing is memtable:
+                self._flushing = None
+
+    def flush(self) -> Optional[str]:
+        memtable = self.detach_memtable()
+        return self.flush_memtable(memtable) if memtable is not None else None
+
+    def _scan_segments(self) -> List[_Segment]:
+        """디렉터리의 모든 세그먼트 (열린 세그먼트는 재사용)"""
+        found = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            found[entry.name] = entry.path
+
+        with self._segments_lock:
+            for name in list(self._segments):
+                if name not in found:
+                    del self._segments[name]
+            for name, path in found.items():
+                if name in self._segments:
+                    continue
+                try:
+                    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+                        self._segments[name] = _Segment(path, json.load(f))
+                except (OSError, ValueError):
+                    # 병합으로 막 삭제된 세그먼트
+                    continue
+            return list(self._segments.values())
+
+    @staticmethod
+    def _resolve(segments: List[_Segment]) -> Tuple[List[_Segment], List[_Segment]]:
+        """(현재 세그먼트, 기록이 끝나지 않은 병합 결과 세그먼트)
+
+        병합 결과는 같은 그룹의 세그먼트가 모두 기록된 뒤에만 보이며, 그때 대체한 세그먼트가 숨겨진다.
+        대체된 세그먼트는 결과가 모두 기록된 뒤에 삭제하므로, 대체된 세그먼트가 남아 있지 않은 그룹은
+        이후 병합/삭제로 일부가 없어졌더라도 완료된 그룹이다.
+        """
+        names = {segment.name for segment in segments}
+        groups: Dict[str, List[_Segment]] = {}
+        for segment in segments:
+            group = segment.meta.get("group")
+            if group:
+                groups.setdefault(group["id"], []).append(segment)
+        incomplete = [
+            segment
+            for members in groups.values()
+            if len(members) < members[0].meta["group"]["size"]
+            and any(name in names for name in members[0].meta["replaces"])
+            for segment in members
+        ]
+        hidden = {segment.name for segment in incomplete}
+        for segment in segments:
+            if segment.name not in hidden:
+                hidden.update(segment.meta.get("replaces", ()))
+        return [segment for segment in segments if segment.name not in hidden], incomplete
+
+    def _list_segments(self) -> List[_Segment]:
+        return self._resolve(self._scan_segments())[0]
+
+    def read(self, user_id: str, start: float, end: float) -> Dict[str, np.ndarray]:
+        """사용자의 [start, end] 구간 행 (시각 순, 디스크 세그먼트 + 메모리 버퍼)"""
+        key = user_key(user_id)
+        parts = []
+        for segment in self._list_segments():
+            if segment.t_end < start or segment.t_start > end:
+                continue
+            try:
+                part = segment.user_columns(key, start, end)
+            except FileNotFoundError:
+                continue
+            if part is not None:
+                parts.append(part)
+
+        for memtable in (self._flushing, self._memtable):
+            if memtable is None:
+                continue
+            part = memtable.user_columns(user_id)
+            if part is None:
+                continue
+            part.pop("key")
+            in_range = (part["ts"] >= start) & (part["ts"] <= end)
+            parts.append({name: column[in_range] for name, column in part.items()})
+
+        columns = _concat(parts, len(self.feature_columns))
+        columns.pop("key", None)
+        order = np.argsort(columns["ts"], kind="stable")
+        return {name: column[order] for name, column in columns.items()}
+
+    def query(
+        self,
+        user_id: str,
+        start: float,
+        end: float,
+        bucket_seconds: int = 0,
+        tz_offset_seconds: int = 0,
+        include_features: bool = False,
+        max_points: int = 10000
+    ) -> Dict[str, Any]:
+        """구간 조회: bucket_seconds가 0이면 기록(오래된 구간은 1시간 롤업) 그대로, 아니면 구간별 요약
+
+        구간 요약: 구간 시작(로컬 시간 기준 정렬), 최대/평균 위험도, 평균 신뢰도, 건수.
+        trend_per_day는 구간 평균 위험도의 일당 기울기 (최소제곱)로, 점진적 악화 판단에 사용한다.
+        """
+        columns = self.read(user_id, start, end)
+        ts = columns["ts"]
+        result: Dict[str, Any] = {"user_id": user_id, "start": start, "end": end, "rows": int(columns["count"].sum())}
+
+        if bucket_seconds <= 0:
+            points = []
+            first = max(len(ts) - max_points, 0)
+            for index in range(first, len(ts)):
+                point = {
+                    "ts": float(ts[index]),
+                    "risk_level": int(columns["risk_max"][index]),
+                    "risk_mean": round(float(columns["risk_mean"][index]), 3),
+                    "confidence": round(float(columns["confidence"][index]), 3),
+                    "count": int(columns["count"][index])
+                }
+                if include_features:
+                    point["features"] = dict(zip(self.feature_columns, columns["features"][index].tolist()))
+                points.append(point)
+            result["points"] = points
+            result["truncated"] = first > 0
+            return result
+
+        bucket = np.floor((ts + tz_offset_seconds) / bucket_seconds).astype(np.int64)
+        buckets = []
+        if len(ts):
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            count = columns["count"].astype(np.float64)
+            total = np.add.reduceat(count, starts)
+            risk_max = np.maximum.reduceat(columns["risk_max"], starts)
+            risk_mean = np.add.reduceat(columns["risk_mean"] * count, starts) / total
+            confidence = np.add.reduceat(columns["confidence"] * count, starts) / total
+            bucket_start = bucket[starts] * bucket_seconds - tz_offset_seconds
+            if include_features:
+                features = np.add.reduceat(columns["features"] * count[:, np.newaxis], starts) / total[:, np.newaxis]
+            for index in range(len(starts)):
+                item = {
+                    "start": float(bucket_start[index]),
+                    "risk_max": int(risk_max[index]),
+                    "risk_mean": round(float(risk_mean[index]), 3),
+                    "confidence": round(float(confidence[index]), 3),
+                    "count": int(total[index])
+                }
+                if include_features:
+                    item["features"] = dict(zip(self.feature_columns, features[index].round(3).tolist()))
+                buckets.append(item)
+            if len(starts) >= 2:
+                slope = np.polyfit(bucket_start / DAY_SECONDS, risk_mean, 1)[0]
+                result["trend_per_day"] = round(float(slope), 4)
+        result["buckets"] = buckets
+        result.setdefault("trend_per_day", None)
+        return result
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """세그먼트 병합/롤업/삭제 (다른 프로세스가 병합 중이면 건너뜀)
+
+        - 지난 날짜의 raw 세그먼트는 하루 단위 day 세그먼트로 병합한다 (오늘 날짜 행은 raw로 다시 기록).
+        - raw_retention_days가 지난 날짜는 사용자별 1시간 롤업(hourly)으로 줄인다.
+        - 오늘 날짜 raw 세그먼트가 RAW_MERGE_SEGMENTS개 이상 쌓이면 하나로 병합한다.
+        - retention_days가 지난 세그먼트는 삭제한다.
+        """
+        now = now if now is not None else time.time()
+        stats = {"merged": 0, "rolled_up": 0, "deleted": 0}
+        with open(os.path.join(self.directory, COMPACT_LOCK_FILE), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return stats
+
+            segments, incomplete = self._resolve(self._scan_segments())
+            # 잠금을 잡은 상태에서 보이는 미완료 병합 결과는 이전 병합이 중단된 흔적
+            for segment in incomplete:
+                self._remove(segment)
+
+            today_start = (now // DAY_SECONDS) * DAY_SECONDS
+            raw_cutoff = now - self.raw_retention_seconds
+            inputs: List[_Segment] = []
+            today_raw: List[_Segment] = []
+            for segment in segments:
+                if segment.t_end < now - self.retention_seconds:
+                    self._remove(segment)
+                    stats["deleted"] += 1
+                elif segment.level == LEVEL_HOURLY:
+                    continue
+                elif segment.level == LEVEL_DAY:
+                    # day 세그먼트는 롤업할 때만 다시 읽음
+                    if segment.t_start // DAY_SECONDS * DAY_SECONDS + DAY_SECONDS <= raw_cutoff:
+                        inputs.append(segment)
+                elif segment.t_start < today_start:
+                    inputs.append(segment)
+                else:
+                    today_raw.append(segment)
+            if len(today_raw) >= RAW_MERGE_SEGMENTS:
+                inputs.extend(today_raw)
+            if not inputs:
+                return stats
+
+            merged = _concat([dict(segment.columns) for segment in inputs], len(self.feature_columns))
+            day = np.floor(merged["ts"] / DAY_SECONDS).astype(np.int64)
+            outputs = []
+            for value in np.unique(day):
+                rows = np.flatnonzero(day == value)
+                part = {name: column[rows] for name, column in merged.items()}
+                order = np.lexsort((part["ts"], part["key"]))
+                part = {name: column[order] for name, column in part.items()}
+                day_start = float(value) * DAY_SECONDS
+                if day_start >= today_start:
+                    outputs.append((LEVEL_RAW, part))
+                elif day_start + DAY_SECONDS <= raw_cutoff:
+                    outputs.append((LEVEL_HOURLY, rollup_hourly(part)))
+                else:
+                    outputs.append((LEVEL_DAY, part))
+
+            replaces = [segment.name for segment in inputs]
+            group = {"id": f"{os.getpid()}-{time.time_ns()}", "size": len(outputs)}
+            for level, part in outputs:
+                _write_segment(self.directory, level, part, replaces=replaces, group=group)
+            for segment in inputs:
+                self._remove(segment)
+            stats["merged"] = sum(1 for level, _ in outputs if level != LEVEL_HOURLY)
+            stats["rolled_up"] = sum(1 for level, _ in outputs if level == LEVEL_HOURLY)
+        return stats
+
+    def _remove(self, segment: _Segment):
+        shutil.rmtree(segment.path, ignore_errors=True)
+        with self._segments_lock:
+            self._segments.pop(segment.name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        segments = self._list_segments()
+        levels: Dict[str, int] = {}
+        for segment in segments:
+            levels[segment.level] = levels.get(segment.level, 0) + 1
+        return {
+            "directory": self.directory,
+            "pending_rows": self._memtable.rows,
+            "appended": self.total_appended,
+            "flushed": self.total_flushed,
+            "segments": levels,
+            "segment_rows": sum(segment.meta["rows"] for segment in segments)
+        }
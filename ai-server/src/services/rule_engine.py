@@ -0,0 +1,282 @@
+import operator
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ScoreRule(NamedTuple):
+    """특성 값 구간별 위험 점수
+
+    right=False: bins[i-1] <= x < bins[i] 이면 points[i] (`<` 임계값 규칙)
+    right=True:  bins[i-1] < x <= bins[i] 이면 points[i] (`>` 임계값 규칙)
+    """
+    feature: str
+    bins: Tuple[float, ...]
+    points: Tuple[int, ...]
+    right: bool = False
+
+
+class Condition(NamedTuple):
+    """특성 하나에 대한 비교 조건 (특성이 없으면 default 값으로 비교)"""
+    feature: str
+    op: str
+    threshold: float
+    default: float = 0.0
+
+
+# 위험 점수표
+RISK_SCORE_RULES = (
+    # 화면 사용 시간: 30분 미만 +2, 1시간 미만 +1
+    ScoreRule("screen_time", (30, 60), (2, 1, 0)),
+    # 앱 실행 횟수: 3회 미만 +2, 8회 미만 +1
+    ScoreRule("app_open_count", (3, 8), (2, 1, 0)),
+    # 체크인 공백: 12시간 초과 +1, 24시간 초과 +3, 48시간 초과 +4
+    ScoreRule("hours_since_checkin", (12, 24, 48), (0, 1, 3, 4), right=True),
+    # 활동 공백: 6시간 초과 +1
+    ScoreRule("hours_since_activity", (6,), (0, 1), right=True),
+)
+MAX_RISK_SCORE = 10
+
+# 위험 요소표: 순서대로 비트 0, 1, 2... (응답의 위험 요소 순서와 동일)
+RISK_FACTOR_RULES = (
+    ("낮은 앱 사용량", Condition("screen_time", "<", 30)),
+    ("낮은 앱 실행 빈도", Condition("app_open_count", "<", 5)),
+    ("오랜 체크인 공백", Condition("hours_since_checkin", ">", 24)),
+    ("최근 활동 없음", Condition("hours_since_activity", ">", 6)),
+    # 사용자 기준 패턴 대비 편차
+    ("평소보다 크게 줄어든 앱 사용량", Condition("screen_time_deviation", "<=", -2)),
+    ("평소보다 긴 체크인 공백", Condition("checkin_interval_deviation", ">=", 2)),
+)
+NO_RISK_FACTOR = "특별한 위험 요소 없음"
+
+# 추천 문구 (인덱스가 추천 ID)
+RECOMMENDATIONS = (
+    "🚨 즉시 안전 상태를 확인해주세요",
+    "비상연락처에 연락을 고려해보세요",
+    "가까운 이웃이나 가족에게 안부를 알려주세요",
+    "⚠️ 정기 체크인을 해주세요",
+    "이웃과 소통해보세요",
+    "안전 상태를 업데이트해주세요",
+    "📱 주기적으로 체크인해주세요",
+    "커뮤니티 활동에 참여해보세요",
+    "😊 좋은 하루 보내세요!",
+    "📱 앱을 조금 더 활용해보세요",
+    "⏰ 체크인 주기를 줄여보는 것을 고려해보세요",
+)
+
+# 위험도 구간별 추천 ID: 3 미만, 3 이상, 5 이상, 8 이상
+RISK_BAND_BINS = (3, 5, 8)
+RISK_BAND_RECOMMENDATIONS = ((8,), (6, 7), (3, 4, 5), (0, 1, 2))
+
+# 특성별 개별 추천: 순서대로 비트 0, 1...
+FEATURE_RECOMMENDATION_RULES = (
+    (9, Condition("screen_time", "<", 60)),
+    (10, Condition("hours_since_checkin", ">", 12)),
+)
+
+_OPERATORS = {
+    "<": (operator.lt, np.less),
+    "<=": (operator.le, np.less_equal),
+    ">": (operator.gt, np.greater),
+    ">=": (operator.ge, np.greater_equal),
+}
+
+
+class RuleResult(NamedTuple):
+    """규칙 평가 결과 (단건은 정수, 일괄은 행별 배열)"""
+    risk_score: np.ndarray
+    factor_mask: np.ndarray
+    band: np.ndarray
+    recommendation_mask: np.ndarray
+
+
+class RuleEngine:
+    """위험 점수/위험 요소/추천 규칙표를 한 번 컴파일해 평가하는 규칙 엔진
+
+    같은 규칙표로 단건은 bisect 기반 순수 Python 경로(NumPy 호출 비용 없음),
+    여러 건은 np.digitize와 불리언 마스크 경로로 평가하므로 두 경로의 결과가 같다.
+    위험 요소와 추천은 비트마스크로 표현하며, 문구 목록은 (마스크별로) 한 번만
+    만들어 재사용한다.
+    """
+
+    def __init__(
+        self,
+        score_rules: Sequence[ScoreRule] = RISK_SCORE_RULES,
+        factor_rules: Sequence[Tuple[str, Condition]] = RISK_FACTOR_RULES,
+        band_bins: Sequence[float] = RISK_BAND_BINS,
+        band_recommendations: Sequence[Tuple[int, ...]] = RISK_BAND_RECOMMENDATIONS,
+        recommendation_rules: Sequence[Tuple[int, Condition]] = FEATURE_RECOMMENDATION_RULES,
+        recommendations: Sequence[str] = RECOMMENDATIONS,
+        max_score: int = MAX_RISK_SCORE
+    ):
+        for rule in score_rules:
+            if len(rule.points) != len(rule.bins) + 1:
+                raise ValueError(f"구간 수와 점수 수가 맞지 않습니다: {rule.feature}")
+        if len(band_recommendations) != len(band_bins) + 1:
+            raise ValueError("위험도 구간 수와 추천 목록 수가 맞지 않습니다")
+
+        self.score_rules = [
+            (rule.feature, tuple(rule.bins), tuple(rule.points), np.asarray(rule.bins, dtype=np.float64),
+             np.asarray(rule.points, dtype=np.int64), rule.right)
+            for rule in score_rules
+        ]
+        # 단건 경로용: (특성, 구간 탐색 함수, 경계값, 점수)
+        self._row_score_rules = tuple(
+            (rule.feature, bisect_left if rule.right else bisect_right, tuple(rule.bins), tuple(rule.points))
+            for rule in score_rules
+        )
+        self.factor_conditions = [
+            self._compile(condition, bit) for bit, (_, condition) in enumerate(factor_rules)
+        ]
+        self.factor_names = tuple(name for name, _ in factor_rules)
+        self.band_bins = tuple(band_bins)
+        self.band_recommendations = tuple(tuple(ids) for ids in band_recommendations)
+        self.recommendation_conditions = [
+            self._compile(condition, bit) for bit, (_, condition) in enumerate(recommendation_rules)
+        ]
+        self.recommendation_rule_ids = tuple(rec_id for rec_id, _ in recommendation_rules)
+        self.recommendations = tuple(recommendations)
+        self.max_score = max_score
+        # 규칙이 참조하는 특성과 값이 없을 때의 기본값 (점수 규칙 특성은 필수)
+        self.feature_defaults: Dict[str, Optional[float]] = {rule.feature: None for rule in score_rules}
+        for _, condition in (*factor_rules, *recommendation_rules):
+            self.feature_defaults.setdefault(condition.feature, condition.default)
+        # 마스크별 문구 튜플 (조합 수가 작아 제한 없이 보관)
+        self._factor_texts: Dict[int, Tuple[str, ...]] = {}
+        self._recommendation_texts: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+
+    @staticmethod
+    def _compile(condition: Condition, bit: int) -> tuple:
+        scalar_op, array_op = _OPERATORS[condition.op]
+        return condition.feature, scalar_op, array_op, condition.threshold, condition.default, 1 << bit
+
+    # ---- 단건 평가 ----
+
+    def score_row(self, features: Mapping[str, float]) -> int:
+        """한 건의 위험 점수 (0-10)"""
+        score = 0
+        for feature, search, bins, points in self._row_score_rules:
+            score += points[search(bins, features[feature])]
+        return min(score, self.max_score)
+
+    def evaluate_row(self, features: Mapping[str, float], risk_level: Optional[float] = None) -> Tuple[int, int, int, int]:
+        """한 건의 (위험 점수, 위험 요소 마스크, 위험도 구간, 개별 추천 마스크)
+
+        risk_level이 주어지면(모델 예측 등) 추천 구간은 그 값으로 정한다.
+        """
+        score = self.score_row(features)
+        band = bisect_right(self.band_bins, score if risk_level is None else risk_level)
+        return (
+            score,
+            self._row_mask(self.factor_conditions, features),
+            band,
+            self._row_mask(self.recommendation_conditions, features)
+        )
+
+    @staticmethod
+    def _row_mask(conditions: list, features: Mapping[str, float]) -> int:
+        mask = 0
+        for feature, scalar_op, _, threshold, default, bit in conditions:
+            if scalar_op(features.get(feature, default), threshold):
+                mask |= bit
+        return mask
+
+    def signature(self, features: Mapping[str, float], skip: Sequence[str] = ()) -> tuple:
+        """skip에 없는 특성에 대한 모든 규칙의 판정 결과 (결과 캐시 키용)
+
+        skip의 특성 값이 같고 이 값이 같으면 점수, 위험 요소, 추천이 모두 같다.
+        """
+        judgements = []
+        for feature, bins, _, _, _, right in self.score_rules:
+            if feature not in skip:
+                judgements.append((bisect_left if right else bisect_right)(bins, features[feature]))
+        for conditions in (self.factor_conditions, self.recommendation_conditions):
+            for feature, scalar_op, _, threshold, default, _ in conditions:
+                if feature not in skip:
+                    judgements.append(scalar_op(features.get(feature, default), threshold))
+        return tuple(judgements)
+
+    # ---- 일괄 평가 ----
+
+    def evaluate(
+        self,
+        columns: Mapping[str, np.ndarray],
+        risk_levels: Optional[np.ndarray] = None
+    ) -> RuleResult:
+        """특성 열(이름 -> 배열)에 대한 행별 점수/위험 요소 마스크/위험도 구간/추천 마스크"""
+        n_rows = len(next(iter(columns.values())))
+
+        score = np.zeros(n_rows, dtype=np.int64)
+        for feature, _, _, bins, points, right in self.score_rules:
+            score += points[np.digitize(np.asarray(columns[feature], dtype=np.float64), bins, right=right)]
+        np.minimum(score, self.max_score, out=score)
+
+        band = np.digitize(score if risk_levels is None else np.asarray(risk_levels, dtype=np.float64), self.band_bins)
+        return RuleResult(
+            score,
+            self._column_mask(self.factor_conditions, columns, n_rows),
+            band,
+            self._column_mask(self.recommendation_conditions, columns, n_rows)
+        )
+
+    def evaluate_rows(
+        self,
+        rows: Sequence[Mapping[str, float]],
+        risk_levels: Optional[Sequence[float]] = None
+    ) -> RuleResult:
+        """특성 딕셔너리 목록을 열로 모아 한 번에 평가"""
+        columns = {
+            feature: np.fromiter(
+                (row[feature] if default is None else row.get(feature, default) for row in rows),
+                dtype=np.float64,
+                count=len(rows)
+            )
+            for feature, default in self.feature_defaults.items()
+        }
+        return self.evaluate(columns, None if risk_levels is None else np.asarray(risk_levels, dtype=np.float64))
+
+    @staticmethod
+    def _column_mask(conditions: list, columns: Mapping[str, np.ndarray], n_rows: int) -> np.ndarray:
+        mask = np.zeros(n_rows, dtype=np.int64)
+        for feature, _, array_op, threshold, default, bit in conditions:
+            values = columns[feature] if feature in columns else np.full(n_rows, default)
+            mask[array_op(values, threshold)] |= bit
+        return mask
+
+    # ---- 문구 변환 ----
+
+    def recommendation_ids(self, band: int, recommendation_mask: int) -> Tuple[int, ...]:
+        """위험도 구간 추천 + 특성별 추천 ID (응답 순서)"""
+        extra = tuple(
+            rec_id for bit, rec_id in enumerate(self.recommendation_rule_ids)
+            if recommendation_mask >> bit & 1
+        )
+        return self.band_recommendations[band] + extra
+
+    def recommendation_texts(self, band: int, recommendation_mask: int) -> Tuple[str, ...]:
+        """추천 문구 튜플 (같은 조합은 같은 튜플 재사용)"""
+        key = (band, recommendation_mask)
+        texts = self._recommendation_texts.get(key)
+        if texts is None:
+            texts = tuple(self.recommendations[rec_id] for rec_id in self.recommendation_ids(*key))
+            self._recommendation_texts[int(band), int(recommendation_mask)] = texts
+        return texts
+
+    def factor_texts(self, factor_mask: int) -> Tuple[str, ...]:
+        """위험 요소 문구 튜플 (같은 마스크는 같은 튜플 재사용)"""
+        texts = self._factor_texts.get(factor_mask)
+        if texts is None:
+            texts = tuple(
+                name for bit, name in enumerate(self.factor_names) if factor_mask >> bit & 1
+            ) or (NO_RISK_FACTOR,)
+            self._factor_texts[int(factor_mask)] = texts
+        return texts
+
+    def factor_lists(self, factor_masks: np.ndarray) -> List[Tuple[str, ...]]:
+        """행별 위험 요소 마스크를 문구 튜플 목록으로 변환 (같은 마스크는 같은 튜플 공유)"""
+        return [self.factor_texts(mask) for mask in factor_masks.tolist()]
+
+
+# 서비스 전체에서 공유하는 기본 규칙 엔진
+RULE_ENGINE = RuleEngine()
@@ -1,14 +1,33 @@
+import asyncio
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import logging
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
 import json
+import math
+import random
+import time
+from collections import Counter
 
+from ..config import settings
+from ..utils.structured_logging import log_route
+from ..utils.time_utils import parse_timestamp, resolve_timestamp
+from .inference_executor import InferenceExecutor
+from .batch_scheduler import MicroBatchScheduler
+from .model_registry import DEFAULT_MODEL_VERSION, ModelBundle, ModelRegistry, ShadowComparison
+from .model_training import generate_sample_data, train_default_model
+from .metrics import MergedPerformanceMonitor, PerformanceMonitor, StageTimings, render_prometheus_gauges
+from .shared_metrics import SharedMetricsDirectory
+from .pattern_store import PATTERN_RECORD_DTYPE, UserPatternStore
+from .baseline_storage import MmapRecordStorage
+from .location_tracker import LocationTracker
+from .spatial_index import SpatialIndex
+from .result_cache import ResultCache
+from .inactivity_watchdog import InactivityWatchdog, create_escalation_sink
+from .training_data import OutcomeDataset, OutcomeRecorder
+from .risk_history import RiskHistoryStore
+from .rule_engine import RULE_ENGINE
 from ..models.schemas import (
     SafetyAnalysisRequest, 
     SafetyAnalysisResponse,
@@ -18,35 +37,152 @@ from ..models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# 모델 입력 특성 순서 (학습 데이터와 동일)
+FEATURE_COLUMNS = ["screen_time", "app_open_count", "hours_since_checkin", "location_changes"]
+
+# 부하가 높아 모델 대신 규칙으로 채점한 응답의 분석 방법
+DEGRADED_METHOD = "규칙 기반 (부하 경감)"
+
+# 지표 집계용 분석 방법 레이블
+METHOD_LABELS = {"AI 모델": "model", "규칙 기반": "rule_based", DEGRADED_METHOD: "degraded"}
+
+# 캐시 적중 시 지연 시간 집계 레이블 (응답의 method는 원래 분석 방법 유지)
+CACHE_METHOD_LABEL = "cache"
+
+# 모델 없이 규칙으로 채점한 응답의 model_version
+RULE_BASED_VERSION = "rule-based"
+
+# 규칙 기반 분석의 신뢰도
+RULE_BASED_CONFIDENCE = 0.8
+
 class SafetyAnalyzer:
     def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.model_version = "1.0.0"
+        # 활성 모델 묶음: 교체는 이 참조 하나를 바꾸는 것으로 끝나며, 예측은 시작 시점의 묶음을 사용
+        self.active_model: Optional[ModelBundle] = None
+        # 실제 트래픽으로 함께 채점만 하는 후보 모델 (응답에는 영향 없음)
+        self.shadow: Optional[ShadowComparison] = None
+        self.model_registry = ModelRegistry(settings.MODEL_ARTIFACT_DIR)
+        self._reload_lock = asyncio.Lock()
+        self._watch_task = None
+        self._watched_latest = None
+        self._shadow_tasks = set()
         self.is_initialized = False
         self.performance_metrics = {
             "total_predictions": 0,
-            "response_times": [],
             "accuracy_scores": []
         }
+        # 응답 시간은 고정 크기 히스토그램으로 집계 (요청 수와 무관한 메모리)
+        self.monitor = PerformanceMonitor()
+        # 요청 처리 단계별 소요 시간 (특성 추출, 캐시, 추론, 규칙, 응답 생성 등)
+        self.stage_timings = StageTimings(enabled=settings.STAGE_TIMING_ENABLED)
+        # 멀티 워커 실행 시 워커별 지표 상태를 공유 디렉터리에 기록하여 합산
+        self.shared_metrics = None
+        self._metrics_task = None
+        # 사용자별 행동 기준 패턴 (편차 특성 계산용, initialize에서 영속 저장소로 교체)
+        self.pattern_store = UserPatternStore(
+            alpha=settings.PATTERN_EWMA_ALPHA,
+            min_samples=settings.PATTERN_MIN_SAMPLES
+        )
+        self._maintenance_task = None
+        # 사용자별 최근 위치 이력 (위치 변화량 특성 계산용)
+        self.location_tracker = LocationTracker(
+            history_size=settings.LOCATION_HISTORY_SIZE,
+            window_hours=settings.LOCATION_WINDOW_HOURS
+        )
+        # 사용자별 마지막 위치 격자 색인 (위험 사용자 주변 이웃 조회용)
+        self.spatial_index = SpatialIndex(settings.SPATIAL_CELL_METERS) if settings.SPATIAL_INDEX_ENABLED else None
+        # 체크인 공백 경보 예약 (요청이 끊긴 사용자도 경보하기 위한 서버 내 타이머)
+        self.watchdog = None
+        if settings.WATCHDOG_ENABLED:
+            self.watchdog = InactivityWatchdog(
+                create_escalation_sink(settings.WATCHDOG_SINK, settings.WATCHDOG_WEBHOOK_URL),
+                tick_seconds=settings.WATCHDOG_TICK_SECONDS,
+                checkin_lookup=self._learned_checkin
+            )
+        # 나중에 들어오는 레이블과 묶어 재학습 데이터로 쌓기 위한 사용자별 최근 모델 입력
+        self.outcome_recorder = OutcomeRecorder(
+            OutcomeDataset(settings.TRAINING_DATA_DIR, FEATURE_COLUMNS),
+            max_users=settings.OUTCOME_RECENT_USERS
+        )
+        # 사용자별 위험도 이력 (추세 조회용, 기록은 메모리 버퍼에 쓰고 주기적으로 세그먼트로 기록)
+        self.risk_history = None
+        self._history_task = None
+        if settings.HISTORY_ENABLED:
+            self.risk_history = RiskHistoryStore(
+                settings.HISTORY_DIR,
+                FEATURE_COLUMNS,
+                memtable_rows=settings.HISTORY_MEMTABLE_ROWS,
+                raw_retention_days=settings.HISTORY_RAW_RETENTION_DAYS,
+                retention_days=settings.HISTORY_RETENTION_DAYS
+            )
+        # 같은 양자화 특성의 분석 결과(위험도, 추천, 위험요소) 재사용
+        self.result_cache = None
+        if settings.RESULT_CACHE_SIZE > 0:
+            self.result_cache = ResultCache(
+                max_size=settings.RESULT_CACHE_SIZE,
+                ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+            )
+        # 모델 추론은 이벤트 루프가 아닌 전용 워커 풀에서 실행
+        self.inference_executor = InferenceExecutor(settings.INFERENCE_WORKERS)
+        # 동시 단건 요청을 모아 한 번에 추론하는 마이크로 배칭 (설정으로 비활성화 가능)
+        self.batch_scheduler = None
+        if settings.MICRO_BATCH_ENABLED:
+            self.batch_scheduler = MicroBatchScheduler(
+                self._run_inference,
+                max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS
+            )
+        
+    def load_model(self):
+        """모델 로드 (아티팩트 > 저장된 모델 > 기본 모델 학습 순)
+        
+        production 모드에서는 워커 fork 전에 부모 프로세스에서 호출하여 모든 워커가
+        같은 모델 메모리를 공유하게 한다. 이미 로드되어 있으면 아무것도 하지 않는다.
+        """
+        if self._has_model():
+            return
+        
+        # 모델 로드 시도
+        model_path = "models/safety_model.joblib"
+        scaler_path = "models/safety_scaler.joblib"
         
+        if self._load_model_artifact():
+            # 빌드된 아티팩트는 학습/역직렬화 없이 메모리 매핑으로 바로 사용
+            pass
+        elif os.path.exists(model_path) and os.path.exists(scaler_path):
+            import joblib
+            self.active_model = ModelBundle.from_sklearn(
+                DEFAULT_MODEL_VERSION,
+                joblib.load(model_path),
+                joblib.load(scaler_path),
+                compile_forest=settings.INFERENCE_ENGINE == "compiled"
+            )
+            logger.info("✅ 기존 모델 로드 완료")
+        elif settings.MODEL_TRAIN_ON_STARTUP:
+            # 기본 모델 생성
+            self._create_default_model()
+            logger.info("✅ 기본 모델 생성 완료")
+        else:
+            logger.warning("⚠️ 사용할 모델이 없어 규칙 기반 분석으로 동작합니다 (build_model.py로 아티팩트 생성 필요)")
+
     async def initialize(self):
         """AI 분석 서비스 초기화"""
         try:
             logger.info("🧠 AI 모델 초기화 시작...")
             
-            # 모델 로드 시도
-            model_path = "models/safety_model.joblib"
-            scaler_path = "models/safety_scaler.joblib"
-            
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                self.model = joblib.load(model_path)
-                self.scaler = joblib.load(scaler_path)
-                logger.info("✅ 기존 모델 로드 완료")
+            if self._has_model():
+                logger.info("✅ 사전 로드된 모델 사용")
             else:
-                # 기본 모델 생성
-                await self._create_default_model()
-                logger.info("✅ 기본 모델 생성 완료")
+                # 학습/역직렬화는 CPU를 오래 점유하므로 이벤트 루프 밖에서 실행
+                await asyncio.to_thread(self.load_model)
+            
+            self._open_baseline_storage()
+            self._start_metrics_publisher()
+            self._start_model_watcher()
+            if self.watchdog is not None:
+                self.watchdog.start()
+            if self.risk_history is not None:
+                self._history_task = asyncio.create_task(self._history_flush_loop())
             
             self.is_initialized = True
             logger.info("🧠 AI 분석 서비스 초기화 완료")
@@ -56,158 +192,574 @@ class SafetyAnalyzer:
             # 폴백: 규칙 기반 분석만 사용
             self.is_initialized = True
 
-    async def _create_default_model(self):
-        """기본 모델 생성"""
+    def _load_model_artifact(self) -> bool:
+        """빌드된 모델 아티팩트가 있으면 메모리 매핑으로 로드"""
+        try:
+            bundle = self.model_registry.load(settings.MODEL_ARTIFACT_VERSION or None, FEATURE_COLUMNS)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"❌ 모델 아티팩트 로드 실패: {str(e)}")
+            return False
+        
+        self.active_model = bundle
+        compiled = bundle.compiled_forest
+        logger.info(
+            f"✅ 모델 아티팩트 로드 완료: {bundle.version} "
+            f"(트리 {compiled.n_estimators}개, 노드 {compiled.n_nodes}개)"
+        )
+        return True
+
+    def _has_model(self) -> bool:
+        """예측에 사용할 모델이 준비되었는지 여부"""
+        return self.active_model is not None
+
+    @property
+    def model_version(self) -> str:
+        """현재 활성 모델 버전"""
+        return self.active_model.version if self.active_model is not None else RULE_BASED_VERSION
+
+    def _load_candidate(self, version: Optional[str]) -> ModelBundle:
+        """레지스트리에서 모델을 로드하고 샘플 예측으로 페이지를 미리 읽어 둠 (워커 스레드에서 실행)"""
+        bundle = self.model_registry.load(version, FEATURE_COLUMNS)
+        X_sample, _ = generate_sample_data()
+        bundle.predict_proba(X_sample[:settings.MICRO_BATCH_MAX_SIZE])
+        return bundle
+
+    async def reload_model(self, version: Optional[str] = None, shadow: bool = False) -> Dict[str, Any]:
+        """모델 무중단 교체 (version이 없으면 LATEST)
+        
+        새 모델은 이벤트 루프 밖에서 로드/예열한 뒤 활성 모델 참조만 바꾼다. 이미 시작된
+        예측은 이전 모델로 끝나고 응답에도 이전 버전이 표시된다. shadow이면 교체하지 않고
+        후보 모델로 등록하여 실제 트래픽과 함께 채점만 한다.
+        """
+        async with self._reload_lock:
+            bundle = await asyncio.to_thread(self._load_candidate, version)
+            
+            if shadow:
+                self.shadow = ShadowComparison(bundle)
+                logger.info(f"🕶️ 섀도 모델 등록: {bundle.version}")
+                return {"shadow_version": bundle.version, "active_version": self.model_version}
+            
+            previous_version = self.model_version
+            self._activate(bundle)
+            return {"previous_version": previous_version, "active_version": bundle.version}
+
+    async def promote_shadow(self) -> Dict[str, Any]:
+        """섀도 모델을 활성 모델로 승격"""
+        async with self._reload_lock:
+            if self.shadow is None:
+                raise ValueError("등록된 섀도 모델이 없습니다")
+            
+            previous_version = self.model_version
+            self._activate(self.shadow.bundle)
+            return {"previous_version": previous_version, "active_version": self.model_version}
+
+    def clear_shadow(self) -> Optional[str]:
+        """섀도 채점 중단 (중단한 버전 반환)"""
+        shadow, self.shadow = self.shadow, None
+        return shadow.bundle.version if shadow is not None else None
+
+    def _activate(self, bundle: ModelBundle):
+        previous_version = self.model_version
+        # 참조 교체는 원자적이므로 진행 중인 예측은 이전 묶음을 계속 사용
+        self.active_model = bundle
+        if self.shadow is not None and self.shadow.bundle is bundle:
+            self.shadow = None
+        # 이전 모델로 만든 결과는 재사용하지 않음 (캐시 키에도 버전이 포함됨)
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        logger.info(f"🔄 모델 교체 완료: {previous_version} -> {bundle.version}")
+
+    def _start_model_watcher(self):
+        """LATEST 파일 감시 시작 (새 버전이 빌드되면 자동 교체, 멀티 워커에서는 워커마다 실행)"""
+        if settings.MODEL_WATCH_INTERVAL_SECONDS <= 0:
+            return
+        self._watched_latest = self.model_registry.latest_version()
+        self._watch_task = asyncio.create_task(self._model_watch_loop())
+
+    async def _model_watch_loop(self):
+        while True:
+            await asyncio.sleep(settings.MODEL_WATCH_INTERVAL_SECONDS)
+            try:
+                latest = await asyncio.to_thread(self.model_registry.latest_version)
+                # LATEST가 바뀐 경우에만 반응 (API로 지정한 버전을 되돌리지 않음, 실패한 버전은 재시도하지 않음)
+                if latest is None or latest == self._watched_latest:
+                    continue
+                self._watched_latest = latest
+                if latest != self.model_version:
+                    await self.reload_model(latest)
+            except Exception as e:
+                logger.error(f"❌ 모델 자동 교체 실패: {str(e)}")
+
+    def _open_baseline_storage(self):
+        """사용자 기준 패턴을 메모리 매핑 파일 저장소로 연결 (실패 시 메모리 저장소 유지)"""
+        if settings.BASELINE_STORAGE != "mmap":
+            return
+        
         try:
-            # 샘플 데이터 생성 (실제로는 축적된 데이터 사용)
-            X_sample, y_sample = self._generate_sample_data()
+            storage = MmapRecordStorage(
+                settings.BASELINE_STORAGE_PATH,
+                PATTERN_RECORD_DTYPE,
+                initial_capacity=settings.BASELINE_STORAGE_CAPACITY
+            )
+            self.pattern_store = UserPatternStore(
+                storage,
+                alpha=settings.PATTERN_EWMA_ALPHA,
+                min_samples=settings.PATTERN_MIN_SAMPLES
+            )
+            self._maintenance_task = asyncio.create_task(self._baseline_maintenance_loop())
             
-            # 모델 훈련
-            self.scaler = StandardScaler()
-            X_scaled = self.scaler.fit_transform(X_sample)
+        except Exception as e:
+            logger.error(f"❌ 기준 패턴 저장소 열기 실패, 메모리 저장소 사용: {str(e)}")
+
+    async def _baseline_maintenance_loop(self):
+        """기준 패턴 저장소 주기적 디스크 동기화 및 압축"""
+        while True:
+            await asyncio.sleep(settings.BASELINE_FLUSH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.pattern_store.storage.maintenance)
+            except Exception as e:
+                logger.error(f"❌ 기준 패턴 저장소 동기화 실패: {str(e)}")
+
+    async def _history_flush_loop(self):
+        """위험도 이력 버퍼를 주기적으로(또는 버퍼가 차면) 세그먼트로 기록하고, 오래된 세그먼트를 병합/롤업"""
+        history = self.risk_history
+        last_maintenance = 0.0
+        while True:
+            await asyncio.sleep(1)
+            try:
+                if history.flush_due(settings.HISTORY_FLUSH_INTERVAL_SECONDS):
+                    # 버퍼 교체는 기록과 같은 이벤트 루프 스레드에서, 정렬/파일 기록은 워커 스레드에서
+                    memtable = history.detach_memtable()
+                    if memtable is not None:
+                        await asyncio.to_thread(history.flush_memtable, memtable)
+                if time.monotonic() - last_maintenance >= settings.HISTORY_MAINTENANCE_INTERVAL_SECONDS:
+                    last_maintenance = time.monotonic()
+                    stats = await asyncio.to_thread(history.compact)
+                    if any(stats.values()):
+                        logger.info(f"🗜️ 위험도 이력 세그먼트 정리: {stats}")
+            except Exception as e:
+                logger.error(f"❌ 위험도 이력 기록 실패: {str(e)}")
+
+    def _record_history(self, user_id: str, assessment: tuple, features: Dict[str, float]):
+        """분석 결과를 사용자 위험도 이력에 추가 (메모리 버퍼에 한 행 기록)"""
+        if self.risk_history is not None:
+            self.risk_history.append(user_id, time.time(), assessment[0], assessment[1], features)
+
+    def _start_metrics_publisher(self):
+        """공유 지표 디렉터리가 설정되어 있으면 이 워커의 지표 상태를 주기적으로 기록"""
+        if not settings.METRICS_SHARED_DIR:
+            return
+        
+        try:
+            self.shared_metrics = SharedMetricsDirectory(
+                settings.METRICS_SHARED_DIR,
+                settings.METRICS_PUBLISH_INTERVAL_SECONDS
+            )
+            self.shared_metrics.publish(self._metrics_state())
+            self._metrics_task = asyncio.create_task(self._metrics_publish_loop())
             
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
+        except Exception as e:
+            logger.error(f"❌ 공유 지표 디렉터리 열기 실패, 프로세스별 지표 사용: {str(e)}")
+            self.shared_metrics = None
+
+    async def _metrics_publish_loop(self):
+        """워커 지표 상태 주기적 기록"""
+        while True:
+            await asyncio.sleep(settings.METRICS_PUBLISH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.shared_metrics.publish, self._metrics_state())
+            except Exception as e:
+                logger.error(f"❌ 워커 지표 기록 실패: {str(e)}")
+
+    def _metrics_state(self) -> Dict[str, Any]:
+        return {
+            "total_predictions": self.performance_metrics["total_predictions"],
+            "methods": self.monitor.export_state(),
+            "stages": self.stage_timings.export_state()
+        }
+
+    def _collect_metrics(self) -> tuple:
+        """(지표 집계, 총 예측 횟수, 워커 정보, 단계별 시간 상태): 공유 디렉터리가 없으면 이 프로세스의 값"""
+        if self.shared_metrics is None:
+            return (
+                self.monitor,
+                self.performance_metrics["total_predictions"],
+                None,
+                self.stage_timings.export_state()
+            )
+        
+        # 자기 상태는 최신 값으로 기록한 뒤 모든 워커 상태를 합침
+        self.shared_metrics.publish(self._metrics_state())
+        states = self.shared_metrics.collect()
+        
+        monitor = MergedPerformanceMonitor(
+            [(state["methods"], state["fresh"]) for state in states],
+            self.monitor.window_seconds
+        )
+        workers = {
+            "count": len(states),
+            "active": sum(1 for state in states if state["fresh"]),
+            "per_worker": [
+                {"pid": state["pid"], "total_predictions": state["total_predictions"], "active": state["fresh"]}
+                for state in states
+            ]
+        }
+        stage_state = StageTimings.merge_states([state.get("stages", {}) for state in states])
+        return monitor, sum(state["total_predictions"] for state in states), workers, stage_state
+
+    async def shutdown(self):
+        """AI 분석 서비스 종료"""
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        if self._history_task is not None:
+            self._history_task.cancel()
+            self._history_task = None
+        if self.risk_history is not None:
+            try:
+                self.risk_history.flush()
+            except Exception as e:
+                logger.error(f"❌ 위험도 이력 기록 실패: {str(e)}")
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+            try:
+                self.shared_metrics.publish(self._metrics_state())
+            except Exception as e:
+                logger.error(f"❌ 워커 지표 기록 실패: {str(e)}")
+        self.pattern_store.storage.close()
+        self.inference_executor.shutdown()
+
+    def _create_default_model(self):
+        """기본 모델 생성"""
+        try:
+            model, scaler = train_default_model()
+            self.active_model = ModelBundle.from_sklearn(
+                DEFAULT_MODEL_VERSION,
+                model,
+                scaler,
+                compile_forest=settings.INFERENCE_ENGINE == "compiled",
+                source="trained"
             )
-            self.model.fit(X_scaled, y_sample)
             
             # 모델 저장 디렉토리 생성
             os.makedirs("models", exist_ok=True)
             
             # 모델 저장
-            joblib.dump(self.model, "models/safety_model.joblib")
-            joblib.dump(self.scaler, "models/safety_scaler.joblib")
+            import joblib
+            joblib.dump(model, "models/safety_model.joblib")
+            joblib.dump(scaler, "models/safety_scaler.joblib")
             
             logger.info("✅ 기본 모델 저장 완료")
             
         except Exception as e:
             logger.error(f"❌ 기본 모델 생성 실패: {str(e)}")
 
-    def _generate_sample_data(self):
-        """샘플 훈련 데이터 생성"""
-        np.random.seed(42)
-        n_samples = 1000
-        
-        # 특성 생성
-        screen_time = np.random.normal(180, 60, n_samples)  # 평균 3시간
-        app_open_count = np.random.poisson(20, n_samples)
-        hours_since_checkin = np.random.exponential(12, n_samples)
-        location_changes = np.random.poisson(5, n_samples)
-        
-        X = np.column_stack([
-            screen_time,
-            app_open_count, 
-            hours_since_checkin,
-            location_changes
-        ])
-        
-        # 레이블 생성 (위험도 기반)
-        risk_scores = (
-            (screen_time < 60) * 2 +  # 낮은 화면 시간
-            (app_open_count < 5) * 2 +  # 낮은 앱 사용
-            (hours_since_checkin > 24) * 3 +  # 오랜 체크인 없음
-            (location_changes == 0) * 1  # 위치 변화 없음
-        )
+    async def analyze_safety_data(
+        self,
+        request: SafetyAnalysisRequest,
+        verbose: bool = False,
+        degraded: bool = False
+    ) -> SafetyAnalysisResponse:
+        """안전 데이터 분석 (verbose일 때만 응답에 추출된 특성을 포함)
         
-        # 0: 안전, 1: 주의, 2: 위험
-        y = np.where(risk_scores < 2, 0, np.where(risk_scores < 5, 1, 2))
-        
-        return X, y
-
-    async def analyze_safety_data(self, request: SafetyAnalysisRequest) -> SafetyAnalysisResponse:
-        """안전 데이터 분석"""
-        start_time = datetime.now()
+        degraded이면(서버 부하 경감) 캐시에 없는 요청을 모델 대신 규칙 기반으로 채점하며,
+        이 결과는 캐시에 저장하지 않는다.
+        """
+        start_time = time.perf_counter()
+        stages = self.stage_timings
+        mark = time.perf_counter_ns()
         
         try:
-            logger.info(f"🔍 사용자 {request.user_id} 안전 분석 시작")
+            logger.debug("🔍 사용자 %s 안전 분석 시작", request.user_id)
             
             # 특성 추출
             features = self._extract_features(request)
+            mark = stages.lap("features", mark)
             
-            # AI 모델 예측 (모델이 있는 경우)
-            if self.model is not None and self.scaler is not None:
-                risk_level, confidence = await self._predict_with_model(features)
-                analysis_method = "AI 모델"
-            else:
-                # 폴백: 규칙 기반 분석
-                risk_level, confidence = self._rule_based_analysis(features)
-                analysis_method = "규칙 기반"
-            
-            # 추천사항 및 위험요소 생성
-            recommendations = self._generate_recommendations(risk_level, features)
-            risk_factors = self._identify_risk_factors(features)
+            cache_key, model_features, assessment = self._lookup_assessment(features)
+            mark = stages.lap("cache_lookup", mark)
+            cached = assessment is not None
+            if not cached and degraded:
+                risk_level, confidence = self._rule_based_analysis(model_features)
+                mark = stages.lap("rules", mark)
+                assessment = self._store_assessment(
+                    None, risk_level, confidence, RULE_BASED_VERSION, model_features,
+                    analysis_method=DEGRADED_METHOD
+                )
+                mark = stages.lap("assessment", mark)
+            elif not cached:
+                # AI 모델 예측 (모델이 있는 경우)
+                if self._has_model():
+                    risk_level, confidence, version = await self._predict_with_model(model_features)
+                    mark = stages.lap("inference", mark)
+                else:
+                    # 폴백: 규칙 기반 분석
+                    risk_level, confidence = self._rule_based_analysis(model_features)
+                    version = RULE_BASED_VERSION
+                    mark = stages.lap("rules", mark)
+                assessment = self._store_assessment(
+                    cache_key, risk_level, confidence, version, model_features
+                )
+                mark = stages.lap("assessment", mark)
             
             # 응답 시간 기록
-            response_time = (datetime.now() - start_time).total_seconds()
-            self.performance_metrics["response_times"].append(response_time)
+            response_time = time.perf_counter() - start_time
+            self.monitor.record(CACHE_METHOD_LABEL if cached else METHOD_LABELS[assessment[2]], response_time)
             self.performance_metrics["total_predictions"] += 1
             
-            result = SafetyAnalysisResponse(
-                risk_level=int(risk_level),
-                confidence=float(confidence),
-                recommendations=recommendations,
-                risk_factors=risk_factors,
-                timestamp=datetime.now().isoformat(),
-                model_version=self.model_version,
-                analysis_details={
-                    "method": analysis_method,
-                    "features": features,
-                    "response_time_ms": int(response_time * 1000)
-                }
-            )
+            result = self._build_response(assessment, features, response_time, verbose)
+            self._record_history(request.user_id, assessment, features)
+            stages.lap("response", mark)
             
-            logger.info(f"✅ 안전 분석 완료: 위험도 {risk_level}/10 (신뢰도: {confidence:.2f})")
+            logger.debug("✅ 안전 분석 완료: 위험도 %s/10 (신뢰도: %.2f)", assessment[0], assessment[1])
             return result
             
         except Exception as e:
             logger.error(f"❌ 안전 분석 실패: {str(e)}")
+            self.monitor.record("error", time.perf_counter() - start_time)
             # 에러 시 기본값 반환
-            return SafetyAnalysisResponse(
-                risk_level=5,
-                confidence=0.5,
-                recommendations=["시스템 점검 중입니다. 잠시 후 다시 시도해주세요."],
-                risk_factors=["분석 오류"],
-                timestamp=datetime.now().isoformat(),
-                model_version=self.model_version,
-                analysis_details={"error": str(e)}
-            )
+            return self._build_error_response(e)
+
+    async def analyze_safety_batch(
+        self,
+        requests: List[SafetyAnalysisRequest],
+        verbose: bool = False,
+        degraded: bool = False
+    ) -> List[SafetyAnalysisResponse]:
+        """여러 요청을 하나의 특성 행렬로 묶어 일괄 분석 (결과는 입력 순서 유지, degraded는 단건 분석과 같음)"""
+        start_time = time.perf_counter()
+        stages = self.stage_timings
+        mark = time.perf_counter_ns()
+        
+        try:
+            logger.debug("🔍 배치 안전 분석 시작: %d건", len(requests))
+            
+            features_list = [self._extract_features(request) for request in requests]
+            mark = stages.lap("batch.features", mark)
+            lookups = [self._lookup_assessment(features) for features in features_list]
+            assessments = [assessment for _, _, assessment in lookups]
+            mark = stages.lap("batch.cache_lookup", mark)
+            
+            # 캐시에 없는 요청만 모아서 예측
+            missing = [i for i, assessment in enumerate(assessments) if assessment is None]
+            if missing:
+                missing_features = [lookups[i][1] for i in missing]
+                if degraded:
+                    predictions = self._rule_based_batch(missing_features)
+                    mark = stages.lap("batch.rules", mark)
+                elif self._has_model():
+                    predictions = await self._predict_batch_with_model(missing_features)
+                    mark = stages.lap("batch.inference", mark)
+                else:
+                    predictions = self._rule_based_batch(missing_features)
+                    mark = stages.lap("batch.rules", mark)
+                
+                # 위험 요소/추천 규칙도 누락된 요청 전체를 한 번에 평가
+                rules = RULE_ENGINE.evaluate_rows(missing_features, [risk_level for risk_level, _, _ in predictions])
+                rule_results = zip(rules.factor_mask.tolist(), rules.band.tolist(), rules.recommendation_mask.tolist())
+                for i, (risk_level, confidence, version), rule_result in zip(missing, predictions, rule_results):
+                    assessments[i] = self._store_assessment(
+                        None if degraded else lookups[i][0], risk_level, confidence, version, lookups[i][1], rule_result,
+                        analysis_method=DEGRADED_METHOD if degraded else None
+                    )
+                mark = stages.lap("batch.assessment", mark)
+            
+            # 배치 처리 시간을 요청 수로 나누어 건당 응답 시간으로 기록
+            response_time = time.perf_counter() - start_time
+            per_request_time = response_time / len(requests)
+            method_counts = Counter(assessments[i][2] for i in missing)
+            for analysis_method, count in method_counts.items():
+                self.monitor.record(METHOD_LABELS[analysis_method], per_request_time, count=count)
+            if len(missing) < len(requests):
+                self.monitor.record(CACHE_METHOD_LABEL, per_request_time, count=len(requests) - len(missing))
+            self.performance_metrics["total_predictions"] += len(requests)
+            
+            results = [
+                self._build_response(assessment, features, per_request_time, verbose)
+                for assessment, features in zip(assessments, features_list)
+            ]
+            for request, assessment, features in zip(requests, assessments, features_list):
+                self._record_history(request.user_id, assessment, features)
+            stages.lap("batch.response", mark)
+            
+            logger.debug("✅ 배치 안전 분석 완료: %d건 (%.1fms)", len(results), response_time * 1000)
+            return results
+            
+        except Exception as e:
+            logger.error(f"❌ 배치 안전 분석 실패: {str(e)}")
+            elapsed = time.perf_counter() - start_time
+            self.monitor.record("error", elapsed / len(requests), count=len(requests))
+            return [self._build_error_response(e) for _ in requests]
+
+    def _quantize_features(self, features: Dict[str, float]) -> Dict[str, float]:
+        """캐시 키용 특성 양자화
+        
+        화면 사용 시간은 내림, 체크인 경과 시간은 올림으로 구간화한다. 단위가 규칙
+        임계값의 약수이면 `<`/`>` 비교 결과가 원래 값과 같게 유지된다.
+        """
+        quantized = dict(features)
+        screen_step = settings.RESULT_CACHE_SCREEN_TIME_STEP
+        checkin_step = settings.RESULT_CACHE_CHECKIN_STEP_HOURS
+        quantized["screen_time"] = (features["screen_time"] // screen_step) * screen_step
+        quantized["hours_since_checkin"] = math.ceil(features["hours_since_checkin"] / checkin_step) * checkin_step
+        return quantized
+
+    def _result_cache_key(self, quantized: Dict[str, float]) -> tuple:
+        """활성 모델 버전, 양자화된 모델 입력과 모델 입력 외 특성에 대한 규칙 판정 결과로 만든 캐시 키"""
+        return (
+            self.model_version,
+            *(quantized[column] for column in FEATURE_COLUMNS),
+            *RULE_ENGINE.signature(quantized, skip=FEATURE_COLUMNS)
+        )
+
+    def _lookup_assessment(self, features: Dict[str, float]) -> tuple:
+        """캐시 조회: (캐시 키, 예측에 사용할 특성, 캐시된 평가 또는 None)
+        
+        캐시를 사용하면 양자화된 특성으로 예측하므로, 결과는 도착 순서와 무관하게
+        캐시 키만으로 결정된다.
+        """
+        if self.result_cache is None:
+            return None, features, None
+        
+        quantized = self._quantize_features(features)
+        cache_key = self._result_cache_key(quantized)
+        return cache_key, quantized, self.result_cache.get(cache_key)
+
+    def _store_assessment(
+        self,
+        cache_key: Optional[tuple],
+        risk_level: float,
+        confidence: float,
+        version: str,
+        features: Dict[str, float],
+        rule_result: Optional[tuple] = None,
+        analysis_method: Optional[str] = None
+    ) -> tuple:
+        """예측 결과로 (위험도, 신뢰도, 분석 방법, 추천사항, 위험요소, 모델 버전) 평가를 만들고 캐시에 저장
+        
+        rule_result: 일괄 평가로 미리 계산한 (위험 요소 마스크, 위험도 구간, 추천 마스크)
+        analysis_method: 모델 버전으로 정하는 대신 지정할 분석 방법 (부하 경감 등)
+        """
+        if rule_result is None:
+            _, factor_mask, band, recommendation_mask = RULE_ENGINE.evaluate_row(features, risk_level)
+        else:
+            factor_mask, band, recommendation_mask = rule_result
+        assessment = (
+            int(risk_level),
+            float(confidence),
+            analysis_method or ("규칙 기반" if version == RULE_BASED_VERSION else "AI 모델"),
+            RULE_ENGINE.recommendation_texts(band, recommendation_mask),
+            RULE_ENGINE.factor_texts(factor_mask),
+            version
+        )
+        if cache_key is not None:
+            self.result_cache.put(cache_key, assessment)
+        return assessment
+
+    def _build_response(
+        self,
+        assessment: tuple,
+        features: Dict[str, float],
+        response_time: float,
+        verbose: bool = False
+    ) -> SafetyAnalysisResponse:
+        """평가 결과로 응답 객체 생성
+        
+        모든 필드를 서버에서 만든 값으로 채우므로 model_construct로 재검증을 생략한다.
+        """
+        risk_level, confidence, analysis_method, recommendations, risk_factors, version = assessment
+        
+        analysis_details = {
+            "method": analysis_method,
+            "response_time_ms": int(response_time * 1000)
+        }
+        if verbose:
+            analysis_details["features"] = features
+        
+        return SafetyAnalysisResponse.model_construct(
+            risk_level=risk_level,
+            confidence=confidence,
+            recommendations=list(recommendations),
+            risk_factors=list(risk_factors),
+            timestamp=datetime.now().isoformat(),
+            model_version=version,
+            analysis_details=analysis_details
+        )
+
+    def _build_error_response(self, error: Exception) -> SafetyAnalysisResponse:
+        """분석 실패 시 기본 응답 생성"""
+        return SafetyAnalysisResponse(
+            risk_level=5,
+            confidence=0.5,
+            recommendations=["시스템 점검 중입니다. 잠시 후 다시 시도해주세요."],
+            risk_factors=["분석 오류"],
+            timestamp=datetime.now().isoformat(),
+            model_version=self.model_version,
+            analysis_details={"error": str(error)}
+        )
 
     def _extract_features(self, request: SafetyAnalysisRequest) -> Dict[str, float]:
         """요청 데이터에서 특성 추출"""
         features = {}
+        now_ts = time.time()
         
         # 앱 사용 특성
         if request.app_usage:
             features["screen_time"] = request.app_usage.screen_time
             features["app_open_count"] = request.app_usage.app_open_count
             
-            # 마지막 활동으로부터의 시간
-            try:
-                last_activity = datetime.fromisoformat(request.app_usage.last_activity.replace('Z', '+00:00'))
-                features["hours_since_activity"] = (datetime.now() - last_activity).total_seconds() / 3600
-            except:
+            # 마지막 활동으로부터의 시간 (epoch 값 우선, ISO 문자열은 캐시된 해석 사용)
+            last_activity = resolve_timestamp(
+                request.app_usage.last_activity_ts, request.app_usage.last_activity
+            )
+            if last_activity is not None:
+                features["hours_since_activity"] = (now_ts - last_activity) / 3600
+            else:
                 features["hours_since_activity"] = 0
         
         # 체크인 특성
-        if request.last_checkin:
-            try:
-                last_checkin = datetime.fromisoformat(request.last_checkin.replace('Z', '+00:00'))
-                features["hours_since_checkin"] = (datetime.now() - last_checkin).total_seconds() / 3600
-            except:
-                features["hours_since_checkin"] = 24  # 기본값
+        last_checkin = resolve_timestamp(request.last_checkin_ts, request.last_checkin)
+        if last_checkin is not None:
+            features["hours_since_checkin"] = (now_ts - last_checkin) / 3600
+            # 공유 저장소에 남겨 다른 워커의 경보 만기 확인과 재시작 후 예약 복원에 사용
+            self.pattern_store.record_checkin(request.user_id, last_checkin)
+            if self.watchdog is not None:
+                self.watchdog.observe_checkin(request.user_id, last_checkin, now_ts)
         else:
-            features["hours_since_checkin"] = 24
+            features["hours_since_checkin"] = 24  # 기본값
         
-        # 위치 특성 (향후 확장 가능)
+        # 위치 특성: 사용자별 최근 위치 이력에서 이동/장소/재택 비율 계산
         if request.location:
             features["has_location"] = 1
-            # 위치 변화량 계산 (향후 구현)
-            features["location_changes"] = 0
+            location_time = resolve_timestamp(request.location.timestamp_ts, request.location.timestamp)
+            if location_time is None:
+                location_time = now_ts
+            self.location_tracker.observe(
+                request.user_id,
+                request.location.latitude,
+                request.location.longitude,
+                request.location.accuracy,
+                location_time
+            )
+            if self.spatial_index is not None:
+                self.spatial_index.update(
+                    request.user_id,
+                    request.location.latitude,
+                    request.location.longitude,
+                    request.location.accuracy,
+                    location_time
+                )
         else:
             features["has_location"] = 0
-            features["location_changes"] = 0
+        features.update(self.location_tracker.features(request.user_id, now_ts))
         
         # 기본값 설정
         features.setdefault("screen_time", 0)
@@ -215,160 +767,314 @@ class SafetyAnalyzer:
         features.setdefault("hours_since_activity", 24)
         features.setdefault("location_changes", 0)
         
+        # 사용자 기준 패턴 대비 편차 (모델 입력에는 포함되지 않음)
+        features.update(
+            self.pattern_store.deviation_features(request.user_id, features, datetime.now().hour)
+        )
+        self.outcome_recorder.remember(request.user_id, features)
+        
         return features
 
+    def _learned_checkin(self, user_id: str) -> Optional[float]:
+        """패턴 저장소(멀티 워커 공유)에 기록된 마지막 체크인 시각"""
+        return self.pattern_store.last_checkin(user_id)
+
+    def restore_checkin_timers(self, owns: Optional[Callable[[str], bool]] = None) -> int:
+        """패턴 저장소의 마지막 체크인 시각으로 체크인 공백 경보 예약 복원 (owns가 있으면 담당 사용자만)"""
+        if self.watchdog is None:
+            return 0
+        try:
+            now_ts = time.time()
+            checkins = self.pattern_store.checkins(now_ts - self.watchdog.restore_window_seconds)
+            if owns is not None:
+                checkins = [checkin for checkin in checkins if owns(checkin[0])]
+            restored = self.watchdog.restore(checkins, now_ts)
+            if restored:
+                logger.info(f"⏰ 체크인 경보 예약 복원: {restored}명")
+            return restored
+        except Exception as e:
+            logger.error(f"❌ 체크인 경보 예약 복원 실패: {str(e)}")
+            return 0
+
+    def _build_feature_matrix(self, features_list: List[Dict[str, float]]) -> np.ndarray:
+        """특성 딕셔너리 목록을 N x 4 특성 행렬로 변환"""
+        return np.array(
+            [[features[column] for column in FEATURE_COLUMNS] for features in features_list],
+            dtype=float
+        )
+
     async def _predict_with_model(self, features: Dict[str, float]) -> tuple:
-        """AI 모델을 사용한 예측"""
+        """AI 모델을 사용한 예측: (위험도, 신뢰도, 채점한 모델 버전)"""
+        if self.batch_scheduler is None:
+            predictions = await self._predict_batch_with_model([features])
+            return predictions[0]
+        
         try:
-            # 특성 벡터 생성
-            feature_vector = np.array([[
-                features["screen_time"],
-                features["app_open_count"],
-                features["hours_since_checkin"],
-                features["location_changes"]
-            ]])
+            # 동시에 들어온 다른 요청과 함께 한 번의 행렬 연산으로 처리
+            feature_row = self._build_feature_matrix([features])
+            outputs = await self.batch_scheduler.submit(feature_row)
+            return self._to_risk_levels(*outputs)[0]
             
-            # 스케일링
-            feature_scaled = self.scaler.transform(feature_vector)
-            
-            # 예측
-            prediction = self.model.predict(feature_scaled)[0]
-            probabilities = self.model.predict_proba(feature_scaled)[0]
-            
-            # 위험도를 0-10 스케일로 변환
-            risk_level = prediction * 3.33  # 0,1,2 -> 0,3.33,6.66
-            confidence = np.max(probabilities)
+        except Exception as e:
+            logger.error(f"❌ AI 모델 예측 실패: {str(e)}")
+            return (*self._rule_based_analysis(features), RULE_BASED_VERSION)
+
+    async def _predict_batch_with_model(self, features_list: List[Dict[str, float]]) -> List[tuple]:
+        """AI 모델을 사용한 일괄 예측 (스케일링/예측 각 1회)"""
+        try:
+            # 특성 행렬 생성
+            feature_matrix = self._build_feature_matrix(features_list)
             
-            return min(risk_level, 10), confidence
+            outputs = await self._run_inference(feature_matrix)
+            return self._to_risk_levels(*outputs)
             
         except Exception as e:
             logger.error(f"❌ AI 모델 예측 실패: {str(e)}")
-            return self._rule_based_analysis(features)
+            return self._rule_based_batch(features_list)
 
-    def _rule_based_analysis(self, features: Dict[str, float]) -> tuple:
-        """규칙 기반 안전 분석"""
-        risk_score = 0
-        
-        # 화면 사용 시간 분석
-        if features["screen_time"] < 30:  # 30분 미만
-            risk_score += 2
-        elif features["screen_time"] < 60:  # 1시간 미만
-            risk_score += 1
-        
-        # 앱 실행 횟수 분석
-        if features["app_open_count"] < 3:
-            risk_score += 2
-        elif features["app_open_count"] < 8:
-            risk_score += 1
-        
-        # 체크인 시간 분석
-        hours_since_checkin = features["hours_since_checkin"]
-        if hours_since_checkin > 48:  # 48시간 이상
-            risk_score += 4
-        elif hours_since_checkin > 24:  # 24시간 이상
-            risk_score += 3
-        elif hours_since_checkin > 12:  # 12시간 이상
-            risk_score += 1
-        
-        # 활동 시간 분석
-        hours_since_activity = features["hours_since_activity"]
-        if hours_since_activity > 6:
-            risk_score += 1
-        
-        # 위험도를 0-10으로 정규화
-        risk_level = min(risk_score, 10)
-        confidence = 0.8  # 규칙 기반은 높은 신뢰도
-        
-        return risk_level, confidence
-
-    def _generate_recommendations(self, risk_level: int, features: Dict[str, float]) -> List[str]:
-        """위험도에 따른 추천사항 생성"""
-        recommendations = []
-        
-        if risk_level >= 8:
-            recommendations.extend([
-                "🚨 즉시 안전 상태를 확인해주세요",
-                "비상연락처에 연락을 고려해보세요",
-                "가까운 이웃이나 가족에게 안부를 알려주세요"
-            ])
-        elif risk_level >= 5:
-            recommendations.extend([
-                "⚠️ 정기 체크인을 해주세요",
-                "이웃과 소통해보세요",
-                "안전 상태를 업데이트해주세요"
-            ])
-        elif risk_level >= 3:
-            recommendations.extend([
-                "📱 주기적으로 체크인해주세요",
-                "커뮤니티 활동에 참여해보세요"
-            ])
-        else:
-            recommendations.append("😊 좋은 하루 보내세요!")
+    async def _run_inference(self, feature_matrix: np.ndarray) -> tuple:
+        """스케일링 및 예측을 워커 풀에서 실행: (예측, 확률, 행별 모델 버전)
         
-        # 특성별 개별 추천
-        if features["screen_time"] < 60:
-            recommendations.append("📱 앱을 조금 더 활용해보세요")
-        
-        if features["hours_since_checkin"] > 12:
-            recommendations.append("⏰ 체크인 주기를 줄여보는 것을 고려해보세요")
-        
-        return recommendations
+        호출 시점의 활성 모델 묶음을 잡아 두므로 실행 중에 모델이 교체되어도
+        이 배치는 이전 모델로 끝까지 계산된다.
+        """
+        bundle = self.active_model
+        predictions, probabilities = await self.inference_executor.run(
+            bundle.predict_proba, feature_matrix, self.stage_timings
+        )
+        self._schedule_shadow(feature_matrix, predictions, probabilities)
+        return predictions, probabilities, np.full(len(predictions), bundle.version, dtype=object)
 
-    def _identify_risk_factors(self, features: Dict[str, float]) -> List[str]:
-        """위험 요소 식별"""
-        risk_factors = []
-        
-        if features["screen_time"] < 30:
-            risk_factors.append("낮은 앱 사용량")
-        
-        if features["app_open_count"] < 5:
-            risk_factors.append("낮은 앱 실행 빈도")
-        
-        if features["hours_since_checkin"] > 24:
-            risk_factors.append("오랜 체크인 공백")
-        
-        if features["hours_since_activity"] > 6:
-            risk_factors.append("최근 활동 없음")
-        
-        if not risk_factors:
-            risk_factors.append("특별한 위험 요소 없음")
+    def _schedule_shadow(self, feature_matrix: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray):
+        """섀도 모델이 있으면 같은 입력을 백그라운드에서 채점 (SHADOW_SAMPLE_RATE 비율만)"""
+        shadow = self.shadow
+        if shadow is None or random.random() >= settings.SHADOW_SAMPLE_RATE:
+            return
+        task = asyncio.ensure_future(self._score_shadow(shadow, feature_matrix, predictions, probabilities))
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def _score_shadow(
+        self,
+        shadow: ShadowComparison,
+        feature_matrix: np.ndarray,
+        predictions: np.ndarray,
+        probabilities: np.ndarray
+    ):
+        start_time = time.perf_counter()
+        try:
+            shadow_predictions, shadow_probabilities = await self.inference_executor.run(
+                shadow.bundle.predict_proba, feature_matrix
+            )
+            shadow.record(
+                predictions, probabilities, shadow_predictions, shadow_probabilities,
+                time.perf_counter() - start_time
+            )
+        except Exception as e:
+            shadow.record_error()
+            logger.error(f"❌ 섀도 모델 채점 실패: {str(e)}")
+
+    def _to_risk_levels(self, predictions: np.ndarray, probabilities: np.ndarray, versions: np.ndarray) -> List[tuple]:
+        """예측 클래스와 확률을 (위험도, 신뢰도, 모델 버전) 목록으로 변환"""
+        # 위험도를 0-10 스케일로 변환
+        risk_levels = np.minimum(predictions * 3.33, 10)  # 0,1,2 -> 0,3.33,6.66
+        confidences = np.max(probabilities, axis=1)
         
-        return risk_factors
+        return list(zip(risk_levels, confidences, versions))
+
+    def _rule_based_analysis(self, features: Dict[str, float]) -> tuple:
+        """규칙 기반 안전 분석 (위험도, 신뢰도)"""
+        # 규칙 기반은 높은 신뢰도
+        return RULE_ENGINE.score_row(features), RULE_BASED_CONFIDENCE
+
+    def _rule_based_batch(self, features_list: List[Dict[str, float]]) -> List[tuple]:
+        """규칙 기반 일괄 분석: 규칙표를 한 번의 열 단위 연산으로 평가한 (위험도, 신뢰도, 모델 버전) 목록"""
+        scores = RULE_ENGINE.evaluate_rows(features_list).risk_score
+        return [(score, RULE_BASED_CONFIDENCE, RULE_BASED_VERSION) for score in scores.tolist()]
 
     async def learn_user_pattern(self, user_id: str, data: Dict[str, Any]):
-        """사용자 패턴 학습 (백그라운드 작업)"""
+        """사용자 패턴 학습 (백그라운드 작업)
+        
+        data 키 (모두 선택):
+        - screen_time, app_open_count: 화면 사용 시간(분), 앱 실행 횟수
+        - checkin_time: 체크인 시간 (ISO format 또는 epoch 초)
+        - timestamp: 이벤트 발생 시간 (ISO format 또는 epoch 초, 기본값: 현재)
+        """
         try:
-            logger.info(f"📚 사용자 {user_id} 패턴 학습 시작")
+            log_route(logger, "/learn/pattern", "📚 패턴 학습 시작", user_id=user_id)
             
-            # TODO: 실제 패턴 학습 로직 구현
-            # 현재는 로그만 기록
+            event_time = parse_timestamp(data.get("timestamp"))
+            checkin_time = parse_timestamp(data.get("checkin_time"))
+            self.pattern_store.update(
+                user_id,
+                screen_time=data.get("screen_time"),
+                app_open_count=data.get("app_open_count"),
+                checkin_time=checkin_time,
+                event_time=event_time if event_time is not None else time.time()
+            )
+            if checkin_time is not None and self.watchdog is not None:
+                self.watchdog.observe_checkin(user_id, checkin_time)
             
-            logger.info(f"✅ 사용자 {user_id} 패턴 학습 완료")
+            log_route(logger, "/learn/pattern", "✅ 패턴 학습 완료", user_id=user_id)
             
         except Exception as e:
             logger.error(f"❌ 패턴 학습 실패: {str(e)}")
 
+    async def record_outcomes(self, outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """확인된 결과(레이블)를 재학습 데이터셋에 추가 (파일 기록은 이벤트 루프 밖에서 실행)"""
+        return await asyncio.to_thread(self.outcome_recorder.record, outcomes)
+
+    def known_users(self) -> set:
+        """이 프로세스 메모리에 사용자별 상태가 있는 사용자 (샤드 이관 대상 계산용)"""
+        users = set(self.location_tracker.users())
+        users.update(self.outcome_recorder.users())
+        if self.spatial_index is not None:
+            users.update(self.spatial_index.users())
+        if self.watchdog is not None:
+            users.update(self.watchdog.users())
+        return users
+
+    def export_user_state(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """사용자별 상태를 JSON으로 보낼 수 있는 형태로 (다른 샤드로 이관할 때 사용)"""
+        states = {}
+        for user_id in user_ids:
+            state = {
+                "locations": self.location_tracker.export_user(user_id),
+                "recent_features": self.outcome_recorder.export_user(user_id),
+                "baseline": self.pattern_store.export_record(user_id)
+            }
+            if self.spatial_index is not None:
+                state["position"] = self.spatial_index.position(user_id)
+            if self.watchdog is not None:
+                state["watchdog"] = self.watchdog.export_user(user_id)
+            states[user_id] = state
+        return states
+
+    def import_user_state(self, states: Dict[str, Dict[str, Any]]) -> int:
+        """다른 샤드가 보낸 사용자별 상태 반영 (이 샤드에 이미 있는 더 최근 상태는 유지)"""
+        for user_id, state in states.items():
+            for latitude, longitude, accuracy, timestamp in state.get("locations") or ():
+                self.location_tracker.observe(user_id, latitude, longitude, accuracy, timestamp)
+            position = state.get("position")
+            if position is not None and self.spatial_index is not None:
+                self.spatial_index.update(
+                    user_id, position["latitude"], position["longitude"], position["accuracy"], position["timestamp"]
+                )
+            watchdog = state.get("watchdog")
+            if watchdog is not None and self.watchdog is not None:
+                self.watchdog.import_user(user_id, *watchdog)
+            recent = state.get("recent_features")
+            if recent is not None:
+                self.outcome_recorder.import_user(user_id, *recent)
+            baseline = state.get("baseline")
+            if baseline is not None:
+                self.pattern_store.import_record(user_id, baseline)
+        return len(states)
+
+    def forget_users(self, user_ids: List[str]):
+        """이관을 마친 사용자의 메모리 상태 삭제 (파일 저장소의 기준 패턴은 공유될 수 있으므로 유지)"""
+        for user_id in user_ids:
+            self.location_tracker.forget(user_id)
+            self.outcome_recorder.forget(user_id)
+            if self.spatial_index is not None:
+                self.spatial_index.remove(user_id)
+            if self.watchdog is not None:
+                self.watchdog.forget(user_id)
+
+    def _evaluation(self) -> Dict[str, Any]:
+        """활성 모델의 holdout 평가 결과 (재학습으로 만든 모델만 있음)"""
+        if self.active_model is None or not self.active_model.evaluation:
+            return {}
+        return self.active_model.evaluation
+
     async def get_model_status(self) -> ModelStatus:
         """모델 상태 조회"""
+        evaluation = self._evaluation()
         return ModelStatus(
             model_name="SafetyAnalyzer",
             version=self.model_version,
             status="operational" if self.is_initialized else "initializing",
-            last_trained=None,  # TODO: 실제 학습 시간 기록
-            accuracy=0.85 if self.model is not None else None,
-            total_predictions=self.performance_metrics["total_predictions"]
+            last_trained=evaluation.get("trained_at") or (self.active_model.created_at if self._has_model() else None),
+            accuracy=evaluation.get("metrics", {}).get("accuracy"),
+            total_predictions=self.performance_metrics["total_predictions"],
+            inference_engine=self.active_model.inference_engine if self._has_model() else None,
+            loaded_at=self.active_model.loaded_at if self._has_model() else None,
+            shadow=self.shadow.get_stats() if self.shadow is not None else None,
+            result_cache=self.result_cache.get_stats() if self.result_cache else None
         )
 
+    async def get_model_versions(self) -> Dict[str, Any]:
+        """레지스트리에 등록된 모델 버전 목록"""
+        versions = await asyncio.to_thread(self.model_registry.versions)
+        return {
+            "active_version": self.model_version,
+            "shadow_version": self.shadow.bundle.version if self.shadow is not None else None,
+            "versions": versions
+        }
+
     async def get_performance_metrics(self) -> PerformanceMetrics:
-        """성능 지표 조회"""
-        response_times = self.performance_metrics["response_times"]
+        """성능 지표 조회 (멀티 워커 실행 시 지연 시간/처리량/예측 횟수는 전체 워커 합산)"""
+        monitor, total_predictions, workers, stage_state = await asyncio.to_thread(self._collect_metrics)
+        snapshot = monitor.snapshot()
+        # 정확도 등은 재학습 시 holdout 데이터로 평가한 값 (평가하지 않은 모델은 None)
+        evaluation = self._evaluation()
+        quality = evaluation.get("metrics", {})
         
         return PerformanceMetrics(
-            accuracy=0.85,  # TODO: 실제 정확도 계산
-            precision=0.82,
-            recall=0.88,
-            f1_score=0.85,
-            total_predictions=self.performance_metrics["total_predictions"],
-            avg_response_time=np.mean(response_times) if response_times else 0.0,
-            last_updated=datetime.now().isoformat()
+            accuracy=quality.get("accuracy"),
+            precision=quality.get("precision"),
+            recall=quality.get("recall"),
+            f1_score=quality.get("f1_score"),
+            evaluation=evaluation or None,
+            total_predictions=total_predictions,
+            avg_response_time=monitor.average_seconds(),
+            last_updated=datetime.now().isoformat(),
+            latency=snapshot["latency_ms"],
+            throughput=snapshot["throughput_per_sec"],
+            inference_pool=self.inference_executor.get_stats(),
+            micro_batching=self.batch_scheduler.get_stats() if self.batch_scheduler else None,
+            workers=workers,
+            stages=StageTimings.snapshot_state(stage_state)
         )
+
+    async def get_prometheus_metrics(self) -> str:
+        """Prometheus 텍스트 형식 성능 지표 (워커 풀/배칭/캐시 지표는 응답한 워커 기준)"""
+        monitor, total_predictions, workers, stage_state = await asyncio.to_thread(self._collect_metrics)
+        lines = monitor.render_prometheus()
+        lines += StageTimings.render_prometheus_state(stage_state)
+        lines += [
+            "# HELP safety_analysis_predictions_total 총 예측 횟수",
+            "# TYPE safety_analysis_predictions_total counter",
+            f"safety_analysis_predictions_total {total_predictions}"
+        ]
+        
+        if workers is not None:
+            lines += render_prometheus_gauges(
+                "safety_server_workers",
+                {"count": workers["count"], "active": workers["active"]}
+            )
+        
+        pool_stats = self.inference_executor.get_stats()
+        lines += render_prometheus_gauges("safety_inference_pool", pool_stats, counters=("completed",))
+        for stage in ("wait", "run"):
+            # 최근 구간 분포 요약 (건수는 누적 값이 아니므로 _count 대신 samples)
+            summary = pool_stats[f"{stage}_ms"]
+            lines += render_prometheus_gauges(
+                f"safety_inference_pool_{stage}_seconds",
+                {name: value / 1000 for name, value in summary.items() if name != "count"}
+            )
+            lines += render_prometheus_gauges(f"safety_inference_pool_{stage}", {"samples": summary["count"]})
+        
+        if self.batch_scheduler is not None:
+            lines += render_prometheus_gauges(
+                "safety_micro_batch", self.batch_scheduler.get_stats(), counters=("batches", "rows")
+            )
+        
+        if self.result_cache is not None:
+            lines += render_prometheus_gauges(
+                "safety_result_cache",
+                self.result_cache.get_stats(),
+                counters=("hits", "misses", "evictions", "expirations")
+            )
+        
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+WORKER_FILE_PREFIX = "worker-"
+
+
+class SharedMetricsDirectory:
+    """워커 프로세스별 지표 상태를 공유 디렉터리의 파일로 주고받는 저장소
+
+    각 워커는 자기 pid 이름의 JSON 파일 하나만 주기적으로 덮어쓰고(임시 파일 + os.replace),
+    조회하는 워커는 디렉터리의 모든 파일을 읽어 합친다. 쓰기 경합이 없어 잠금이 필요 없고,
+    종료된 워커의 파일도 남아 있으므로 누적 값이 사라지지 않는다.
+    """
+
+    def __init__(self, directory: str, publish_interval: float = 1.0):
+        self.directory = directory
+        self.publish_interval = publish_interval
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def reset(directory: str):
+        """서버 시작 전 이전 실행의 워커 파일 삭제 (워커 fork 전에 부모 프로세스에서 호출)"""
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{WORKER_FILE_PREFIX}{os.getpid()}.json")
+
+    def publish(self, state: Dict[str, Any]):
+        """현재 워커 상태 기록"""
+        payload = dict(state, pid=os.getpid(), published_at=time.time())
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, self.path)
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """모든 워커의 마지막 상태 (각 항목에 최근 값 유효 여부 fresh 포함)"""
+        stale_after = time.time() - self.publish_interval * 5
+        states = []
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith(WORKER_FILE_PREFIX) and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 워커 지표 파일 읽기 실패: {name} ({str(e)})")
+                continue
+            state["fresh"] = state.get("published_at", 0) >= stale_after
+            states.append(state)
+        return states
@@ -0,0 +1,296 @@
+import itertools
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .location_tracker import EARTH_RADIUS_METERS, haversine_meters
+
+logger = logging.getLogger(__name__)
+
+# 위도 1도의 거리 (미터)
+METERS_PER_DEGREE = 111320.0
+
+# 링 단위 확장의 최대 링 수 (이보다 많이 필요하면 위도 행 범위의 사용 중인 셀만 훑음)
+MAX_QUERY_RINGS = 64
+
+
+class SpatialIndex:
+    """사용자별 마지막 위치를 균등 위경도 격자 셀로 색인하여 반경/최근접 이웃 조회
+
+    - 셀은 위도/경도 모두 cell_meters / 111320도 간격이며, 셀 키는 (위도 칸, 경도 칸)을 정수 하나로
+      합친 값이다. 셀마다 그 안에 있는 사용자 슬롯 집합을 보관한다.
+    - 위치 갱신은 셀이 바뀔 때만 이전 셀에서 빼고 새 셀에 넣으므로 O(1)이다.
+    - 조회는 중심 셀에서 바깥쪽으로 링 단위로 셀을 모아 후보만 거리 계산하므로 비용은 전체
+      사용자 수가 아니라 조회 반경 안의 사용자 수에 비례한다.
+    - 위치 값은 슬롯별 연속 배열에 보관하여 후보 거리/정확도/시각 필터를 벡터 연산으로 처리한다.
+    """
+
+    def __init__(self, cell_meters: float = 500.0, initial_capacity: int = 1024):
+        self.cell_meters = cell_meters
+        self.cell_degrees = cell_meters / METERS_PER_DEGREE
+        self.n_lon_cells = math.ceil(360.0 / self.cell_degrees)
+        self._lat = np.zeros(initial_capacity, dtype=np.float64)
+        self._lon = np.zeros(initial_capacity, dtype=np.float64)
+        self._accuracy = np.zeros(initial_capacity, dtype=np.float32)
+        self._ts = np.zeros(initial_capacity, dtype=np.float64)
+        self._cell = np.zeros(initial_capacity, dtype=np.int64)
+        self._user_ids: List[str] = []
+        self._slots: Dict[str, int] = {}
+        # 다른 샤드로 이관되어 비운 슬롯 (새 사용자에게 재사용)
+        self._free: List[int] = []
+        self._cells: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+        self.total_updates = 0
+        self.total_cell_moves = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self._lat, self._lon, self._accuracy, self._ts, self._cell))
+
+    def _cell_coords(self, latitude: float, longitude: float):
+        return (
+            math.floor((latitude + 90.0) / self.cell_degrees),
+            math.floor((longitude + 180.0) / self.cell_degrees) % self.n_lon_cells
+        )
+
+    def _cell_key(self, row: int, col: int) -> int:
+        return row * self.n_lon_cells + col % self.n_lon_cells
+
+    def _grow(self):
+        # 용량 두 배 확장 (분할 상환 O(1))
+        for name in ("_lat", "_lon", "_accuracy", "_ts", "_cell"):
+            current = getattr(self, name)
+            grown = np.zeros(len(current) * 2, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def update(self, user_id: str, latitude: float, longitude: float, accuracy: float, timestamp: float):
+        """사용자의 마지막 위치 갱신 (이미 기록된 위치보다 과거 시각이면 무시)"""
+        key = self._cell_key(*self._cell_coords(latitude, longitude))
+        with self._lock:
+            slot = self._slots.get(user_id)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                    self._user_ids[slot] = user_id
+                else:
+                    slot = len(self._user_ids)
+                    if slot >= len(self._lat):
+                        self._grow()
+                    self._user_ids.append(user_id)
+                self._slots[user_id] = slot
+            elif timestamp < self._ts[slot]:
+                return
+            else:
+                previous = int(self._cell[slot])
+                if previous == key:
+                    key = None
+                else:
+                    self._cells[previous].discard(slot)
+                    if not self._cells[previous]:
+                        del self._cells[previous]
+                    self.total_cell_moves += 1
+
+            if key is not None:
+                self._cells.setdefault(key, set()).add(slot)
+                self._cell[slot] = key
+            self._lat[slot] = latitude
+            self._lon[slot] = longitude
+            self._accuracy[slot] = max(accuracy, 0.0)
+            self._ts[slot] = timestamp
+            self.total_updates += 1
+
+    def position(self, user_id: str) -> Optional[Dict[str, float]]:
+        """사용자의 마지막 위치 (없으면 None)"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+        return {
+            "latitude": float(self._lat[slot]),
+            "longitude": float(self._lon[slot]),
+            "accuracy": float(self._accuracy[slot]),
+            "timestamp": float(self._ts[slot])
+        }
+
+    def users(self) -> List[str]:
+        return list(self._slots)
+
+    def remove(self, user_id: str):
+        """사용자 위치 삭제 (슬롯은 재사용)"""
+        with self._lock:
+            slot = self._slots.pop(user_id, None)
+            if slot is None:
+                return
+            key = int(self._cell[slot])
+            self._cells[key].discard(slot)
+            if not self._cells[key]:
+                del self._cells[key]
+            self._free.append(slot)
+
+    def _ring_keys(self, row: int, col: int, ring: int) -> List[int]:
+        """중심 셀에서 체비셰프 거리가 정확히 ring인 셀 키 목록"""
+        if ring == 0:
+            return [self._cell_key(row, col)]
+        keys = []
+        for d_col in range(-ring, ring + 1):
+            keys.append(self._cell_key(row - ring, col + d_col))
+            keys.append(self._cell_key(row + ring, col + d_col))
+        for d_row in range(-ring + 1, ring):
+            keys.append(self._cell_key(row + d_row, col - ring))
+            keys.append(self._cell_key(row + d_row, col + ring))
+        return keys
+
+    def _search_box(self, latitude: float, radius_meters: float) -> Tuple[int, Optional[int]]:
+        """반경 안의 점이 있을 수 있는 범위를 중심 셀 기준 (위도 칸 수, 경도 칸 수)로 반환
+
+        원의 경계 상자(위도 ±r, 경도 ±asin(sin r / cos 위도))를 셀 칸 수로 올림한다. 원이 극을 포함하거나
+        경도 범위가 한 바퀴를 넘으면 경도 범위를 한정할 수 없으므로 경도 칸 수는 None이다.
+        """
+        angle = radius_meters / EARTH_RADIUS_METERS
+        lat_rows = math.ceil(math.degrees(angle) / self.cell_degrees)
+        if abs(latitude) + math.degrees(angle) >= 90.0:
+            return lat_rows, None
+        ratio = math.sin(angle) / math.cos(math.radians(latitude))
+        lon_cols = math.ceil(math.degrees(math.asin(min(ratio, 1.0))) / self.cell_degrees)
+        if 2 * lon_cols + 1 >= self.n_lon_cells:
+            return lat_rows, None
+        return lat_rows, lon_cols
+
+    def _covered_meters(self, latitude: float, ring: int) -> float:
+        """중심 셀에서 ring칸까지 모았을 때 빠짐없이 포함됨이 보장되는 반경 (미터)
+
+        _search_box의 역으로, 경계 상자가 위도/경도 모두 ring칸 안에 들고 극을 포함하지 않는 가장 큰 반경이다.
+        """
+        span = math.radians(ring * self.cell_degrees)
+        to_pole = math.radians(90.0 - min(abs(latitude), 90.0))
+        lon_angle = math.asin(math.sin(min(span, math.pi / 2)) * math.cos(math.radians(min(abs(latitude), 90.0))))
+        return EARTH_RADIUS_METERS * min(span, to_pole, lon_angle)
+
+    def _row_members(self, row: int, col: int, lat_rows: int, lon_cols: Optional[int]) -> List[Set[int]]:
+        """위도 행 범위(와 경도 칸 범위) 안의 비어 있지 않은 셀 (잠금 안에서 호출)
+
+        링으로 훑을 셀 수가 너무 많을 때 사용하며, 비용은 사용 중인 셀 수에 비례한다.
+        """
+        low = (row - lat_rows) * self.n_lon_cells
+        high = (row + lat_rows + 1) * self.n_lon_cells
+        members = []
+        for key, slots in self._cells.items():
+            if not low <= key < high:
+                continue
+            if lon_cols is not None:
+                offset = (key % self.n_lon_cells - col) % self.n_lon_cells
+                if min(offset, self.n_lon_cells - offset) > lon_cols:
+                    continue
+            members.append(slots)
+        return members
+
+    def query(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_meters: float,
+        k: Optional[int] = None,
+        max_accuracy: Optional[float] = None,
+        min_timestamp: Optional[float] = None,
+        exclude_user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """반경 안의 사용자를 가까운 순으로 반환 (k가 있으면 최대 k명, 먼저 k명을 찾으면 더 넓히지 않음)
+
+        max_accuracy: 위치 정확도(미터)가 이보다 큰(부정확한) 위치 제외
+        min_timestamp: 이 시각보다 오래된 위치 제외
+
+        링 수는 반경의 경계 상자로 제한하며, 경도 칸이 좁아지는 극지방 근처처럼 필요한 링이
+        MAX_QUERY_RINGS를 넘거나 경도 범위를 한정할 수 없으면 해당 위도 행의 사용 중인 셀만 훑는다.
+        """
+        row, col = self._cell_coords(latitude, longitude)
+        exclude_slot = self._slots.get(exclude_user_id) if exclude_user_id is not None else None
+
+        # 반경 안 후보: 셀 묶음별 (거리, 슬롯, 정확도, 시각) 배열
+        found: List[tuple] = []
+
+        def collect(select) -> int:
+            with self._lock:
+                members = select()
+                count = sum(map(len, members))
+                if not count:
+                    return 0
+                candidate = np.fromiter(itertools.chain.from_iterable(members), dtype=np.int64, count=count)
+                lat = self._lat.take(candidate)
+                lon = self._lon.take(candidate)
+                accuracy = self._accuracy.take(candidate)
+                ts = self._ts.take(candidate)
+            keep = np.ones(len(candidate), dtype=bool)
+            if max_accuracy is not None:
+                keep &= accuracy <= max_accuracy
+            if min_timestamp is not None:
+                keep &= ts >= min_timestamp
+            if exclude_slot is not None:
+                keep &= candidate != exclude_slot
+            if keep.any():
+                distance = haversine_meters(latitude, longitude, lat[keep], lon[keep])
+                in_radius = distance <= radius_meters
+                found.append((
+                    distance[in_radius],
+                    candidate[keep][in_radius],
+                    accuracy[keep][in_radius],
+                    ts[keep][in_radius]
+                ))
+            return count
+
+        lat_rows, lon_cols = self._search_box(latitude, radius_meters)
+        max_ring = max(lat_rows, lon_cols or 0)
+        row_scan = lon_cols is None or max_ring > MAX_QUERY_RINGS
+        scanned = 0
+        rings = 0
+        if row_scan:
+            scanned = collect(lambda: self._row_members(row, col, lat_rows, lon_cols))
+        else:
+            for ring in range(max_ring + 1):
+                scanned += collect(
+                    lambda: [self._cells[key] for key in self._ring_keys(row, col, ring) if key in self._cells]
+                )
+                rings = ring + 1
+                if k is not None and ring < max_ring:
+                    # 지금까지 찾은 이웃 중 확실히 포함된 반경 안에 k명 이상이면 더 넓혀도 순위가 바뀌지 않음
+                    covered = self._covered_meters(latitude, ring)
+                    within = sum(int((part[0] <= covered).sum()) for part in found)
+                    if within >= k:
+                        break
+
+        if found:
+            distance, slot_array, accuracy, ts = (np.concatenate(parts) for parts in zip(*found))
+        else:
+            distance, slot_array, accuracy, ts = np.empty(0), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        if k is not None and len(distance) > k:
+            nearest = np.argpartition(distance, k - 1)[:k]
+            distance, slot_array, accuracy, ts = distance[nearest], slot_array[nearest], accuracy[nearest], ts[nearest]
+        order = np.argsort(distance, kind="stable")
+
+        # 결과 변환은 배열 단위로 처리 (이웃 수가 많을 때 원소별 변환 비용이 조회 비용보다 커짐)
+        user_ids = self._user_ids
+        neighbors = [
+            {"user_id": user_ids[slot], "distance_m": distance_m, "accuracy": accuracy_m, "timestamp": timestamp}
+            for slot, distance_m, accuracy_m, timestamp in zip(
+                slot_array.take(order).tolist(),
+                np.round(distance.take(order), 1).tolist(),
+                accuracy.take(order).astype(np.float64).tolist(),
+                ts.take(order).tolist()
+            )
+        ]
+        return {"neighbors": neighbors, "scanned": scanned, "rings": rings, "row_scan": row_scan}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._slots),
+            "cells": len(self._cells),
+            "cell_meters": self.cell_meters,
+            "updates": self.total_updates,
+            "cell_moves": self.total_cell_moves,
+            "memory_bytes": self.memory_bytes
+        }
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models.schemas import AppUsageData, LocationData, SafetyAnalysisRequest
+
+logger = logging.getLogger(__name__)
+
+# 수집하는 원격 측정 이벤트 종류
+TELEMETRY_EVENT_TYPES = ("app_usage", "activity", "checkin", "location")
+
+# 활동/체크인 시각은 분 단위로 비교 (같은 분 안의 반복 이벤트는 재채점하지 않음)
+TIMESTAMP_RESOLUTION_SECONDS = 60
+
+
+def _number(event: Dict[str, Any], key: str) -> float:
+    value = event.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} 값이 숫자가 아닙니다")
+    return float(value)
+
+
+class TelemetrySubscription:
+    """스트리밍 연결 하나: 이 연결로 이벤트를 보낸 사용자의 위험도 변화가 outbox로 전달됨
+
+    outbox가 가득 차면(느린 클라이언트) 가장 오래된 메시지를 버리고 최신 메시지를 넣는다.
+    """
+
+    def __init__(self, outbox_size: int = 0):
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=outbox_size)
+        self.closed = False
+        self.events = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def push(self, message: Dict[str, Any]):
+        if self.closed:
+            return
+        if self.outbox.full():
+            self.outbox.get_nowait()
+            self.dropped += 1
+        self.outbox.put_nowait(message)
+
+
+class _UserStreamState:
+    """사용자별 최신 원격 측정 값과 마지막 채점 결과"""
+
+    __slots__ = (
+        "screen_time", "app_open_count", "last_activity_ts", "last_checkin_ts",
+        "pending_location", "risk_level", "owner"
+    )
+
+    def __init__(self):
+        # 첫 app_usage 이벤트 전에는 None (사용량을 모르는 상태)
+        self.screen_time: Optional[int] = None
+        self.app_open_count: Optional[int] = None
+        self.last_activity_ts: Optional[float] = None
+        self.last_checkin_ts: Optional[float] = None
+        # 아직 채점에 반영하지 않은 마지막 위치 (latitude, longitude, accuracy, ts)
+        self.pending_location: Optional[Tuple[float, float, float, float]] = None
+        self.risk_level: Optional[int] = None
+        self.owner: Optional[TelemetrySubscription] = None
+
+
+class TelemetryIngestor:
+    """연속 원격 측정 이벤트로 사용자 상태를 갱신하고 값이 바뀐 사용자만 모아서 재채점
+
+    - 이벤트는 사용자 상태의 해당 값만 바꾸며, 값이 실제로 바뀐 사용자만 재채점 대상이 된다.
+      앱 사용량(app_usage)을 한 번도 보내지 않은 사용자는 사용량을 0으로 채점하지 않도록
+      첫 app_usage 이벤트가 들어올 때까지 채점을 미룬다 (그 사이의 위치는 이력에 반영됨).
+    - 재채점은 flush_interval 동안 모인 사용자를 analyze_safety_batch 한 번으로 처리한다
+      (스냅샷 요청과 같은 특성 추출, 결과 캐시, 모델/규칙 경로 사용).
+    - 위험도가 바뀌고 이전 또는 새 위험도가 alert_threshold 이상이면, 그 사용자의 이벤트를
+      마지막으로 보낸 연결로 변화 메시지를 보낸다.
+    - 사용자 상태는 프로세스별로 최대 max_users명까지 보관하며, 오래 이벤트가 없던 사용자부터 제거한다.
+    - should_degrade()가 True이면(서버 부하 경감) 재채점을 규칙 기반으로 처리한다.
+    """
+
+    def __init__(
+        self,
+        analyzer,
+        alert_threshold: int = 5,
+        flush_interval: float = 0.05,
+        max_users: int = 100000,
+        should_degrade: Optional[Callable[[], bool]] = None
+    ):
+        self.analyzer = analyzer
+        self.should_degrade = should_degrade
+        self.alert_threshold = alert_threshold
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self._states: "OrderedDict[str, _UserStreamState]" = OrderedDict()
+        self._dirty: Dict[str, _UserStreamState] = {}
+        self._dirty_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.connections = 0
+        self.total_events = 0
+        self.total_rescored = 0
+        self.total_pushed = 0
+        self.total_flushes = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def subscribe(self, outbox_size: int = 0) -> TelemetrySubscription:
+        self.connections += 1
+        return TelemetrySubscription(outbox_size)
+
+    def unsubscribe(self, subscription: TelemetrySubscription):
+        # 사용자 상태의 owner는 다음 이벤트가 들어올 때 바뀌며, 그 전까지는 닫힌 연결로 보내지 않음
+        subscription.closed = True
+        self.connections -= 1
+
+    def ingest(self, subscription: TelemetrySubscription, event: Any, now_ts: Optional[float] = None):
+        """이벤트 하나를 사용자 상태에 반영 (형식이 잘못되면 ValueError)"""
+        if not isinstance(event, dict):
+            raise ValueError("이벤트는 JSON 객체여야 합니다")
+        user_id = event.get("user_id")
+        if not isinstance(user_id, str) or not user_id:
+            raise ValueError("user_id가 필요합니다")
+        event_type = event.get("type")
+        if event_type not in TELEMETRY_EVENT_TYPES:
+            raise ValueError(f"알 수 없는 이벤트 종류: {event_type}")
+        ts = _number(event, "ts") if event.get("ts") is not None else (now_ts or time.time())
+
+        state = self._states.get(user_id)
+        if state is None:
+            state = self._states[user_id] = _UserStreamState()
+            if len(self._states) > self.max_users:
+                evicted_id, _ = self._states.popitem(last=False)
+                self._dirty.pop(evicted_id, None)
+        else:
+            self._states.move_to_end(user_id)
+
+        changed = state.risk_level is None
+        if event_type == "app_usage":
+            screen_time = int(_number(event, "screen_time"))
+            app_open_count = int(_number(event, "app_open_count"))
+            changed |= screen_time != state.screen_time or app_open_count != state.app_open_count
+            state.screen_time = screen_time
+            state.app_open_count = app_open_count
+            changed |= self._advance(state, "last_activity_ts", ts)
+        elif event_type == "activity":
+            changed |= self._advance(state, "last_activity_ts", ts)
+        elif event_type == "checkin":
+            changed |= self._advance(state, "last_checkin_ts", ts)
+        else:
+            location = (_number(event, "latitude"), _number(event, "longitude"), _number(event, "accuracy"), ts)
+            if state.pending_location is not None:
+                # 채점 전에 위치가 여러 번 들어오면 앞선 위치는 이력에만 기록
+                self.analyzer.location_tracker.observe(user_id, *state.pending_location)
+            state.pending_location = location
+            changed = True
+
+        state.owner = subscription
+        subscription.events += 1
+        self.total_events += 1
+        if changed and state.screen_time is not None:
+            self._dirty[user_id] = state
+            self._dirty_event.set()
+
+    @staticmethod
+    def _advance(state: _UserStreamState, field: str, ts: float) -> bool:
+        """시각 값을 앞으로만 갱신하고, 분 단위로 바뀌었으면 True"""
+        previous = getattr(state, field)
+        if previous is not None and ts <= previous:
+            return False
+        setattr(state, field, ts)
+        if previous is None:
+            return True
+        return int(ts // TIMESTAMP_RESOLUTION_SECONDS) != int(previous // TIMESTAMP_RESOLUTION_SECONDS)
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty_event.wait()
+            # 짧은 시간 동안 들어온 이벤트를 모아 한 번에 채점
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ 스트리밍 재채점 실패: {str(e)}")
+
+    async def flush(self):
+        """재채점 대기 중인 사용자를 모두 채점하고 위험도 변화를 각 연결로 전달"""
+        async with self._flush_lock:
+            self._dirty_event.clear()
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            user_ids = list(dirty)
+            requests = [self._build_request(user_id, dirty[user_id]) for user_id in user_ids]
+            degraded = self.should_degrade is not None and self.should_degrade()
+            results = await self.analyzer.analyze_safety_batch(requests, degraded=degraded)
+            self.total_flushes += 1
+            self.total_rescored += len(requests)
+
+            for user_id, result in zip(user_ids, results):
+                if result.analysis_details and "error" in result.analysis_details:
+                    continue
+                state = dirty[user_id]
+                previous = state.risk_level
+                state.risk_level = result.risk_level
+                if result.risk_level == previous:
+                    continue
+                if result.risk_level < self.alert_threshold and (previous is None or previous < self.alert_threshold):
+                    continue
+                if state.owner is not None:
+                    state.owner.push({
+                        "type": "risk_change",
+                        "user_id": user_id,
+                        "risk_level": result.risk_level,
+                        "previous_risk_level": previous,
+                        "confidence": result.confidence,
+                        "risk_factors": result.risk_factors,
+                        "recommendations": result.recommendations,
+                        "model_version": result.model_version,
+                        "timestamp": result.timestamp
+                    })
+                    self.total_pushed += 1
+
+    def _build_request(self, user_id: str, state: _UserStreamState) -> SafetyAnalysisRequest:
+        """사용자 상태로 분석 요청 생성 (이벤트 수집 시 검증했으므로 재검증 생략)"""
+        location = None
+        if state.pending_location is not None:
+            latitude, longitude, accuracy, ts = state.pending_location
+            location = LocationData.model_construct(
+                latitude=latitude, longitude=longitude, accuracy=accuracy, timestamp=None, timestamp_ts=ts
+            )
+            state.pending_location = None
+        return SafetyAnalysisRequest.model_construct(
+            user_id=user_id,
+            app_usage=AppUsageData.model_construct(
+                screen_time=state.screen_time,
+                app_open_count=state.app_open_count,
+                last_activity=None,
+                last_activity_ts=state.last_activity_ts
+            ),
+            location=location,
+            last_checkin=None,
+            last_checkin_ts=state.last_checkin_ts,
+            additional_data=None
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "users": len(self._states),
+            "pending": len(self._dirty),
+            "events": self.total_events,
+            "rescored": self.total_rescored,
+            "flushes": self.total_flushes,
+            "pushed": self.total_pushed
+        }
+
+
+def split_ndjson(buffer: bytes, chunk: bytes, max_line_bytes: int) -> Tuple[List[bytes], bytes]:
+    """이전 조각과 새 조각을 이어 완성된 줄 목록과 남은 조각을 반환 (남은 조각이 너무 길면 ValueError)"""
+    lines = (buffer + chunk).split(b"\n")
+    rest = lines.pop()
+    if len(rest) > max_line_bytes:
+        raise ValueError(f"이벤트 한 줄이 {max_line_bytes}바이트를 넘습니다")
+    return [line for line in lines if line.strip()], rest
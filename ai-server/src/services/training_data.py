@@ -0,0 +1,177 @@
+import glob
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 레이블: 모델 클래스와 동일 (0: 안전, 1: 주의, 2: 위험)
+OUTCOME_LABELS = {"safe": 0, "caution": 1, "danger": 2}
+
+# 결과 파일 이름 (일 단위 세그먼트, 헤더 없는 CSV)
+SEGMENT_PATTERN = "outcomes-*.csv"
+
+
+class OutcomeDataset:
+    """레이블이 붙은 분석 결과를 쌓는 추가 전용(append-only) 로컬 데이터셋
+
+    행: recorded_at, user_id, 모델 입력 특성..., label. 날짜별 세그먼트 파일에 헤더 없이
+    기록하며, 여러 행을 한 번의 O_APPEND write로 추가하므로 여러 워커가 같은 파일에 써도
+    행이 섞이지 않는다. 읽을 때는 chunk 단위로 읽어 메모리 사용량이 데이터 크기와 무관하다.
+    """
+
+    def __init__(self, directory: str, feature_columns: Sequence[str]):
+        self.directory = directory
+        self.feature_columns = list(feature_columns)
+        self.columns = ["recorded_at", "user_id", *self.feature_columns, "label"]
+
+    def append(self, rows: List[Tuple[float, str, Sequence[float], int]]) -> int:
+        """(기록 시각, user_id, 특성 값, 레이블) 행 추가"""
+        if not rows:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        lines = []
+        for recorded_at, user_id, features, label in rows:
+            # user_id의 쉼표/줄바꿈은 CSV를 깨뜨리므로 제거
+            safe_id = str(user_id).replace(",", "_").replace("\n", "_").replace("\r", "_")
+            values = ",".join(repr(float(value)) for value in features)
+            lines.append(f"{recorded_at:.3f},{safe_id},{values},{int(label)}\n")
+
+        path = os.path.join(self.directory, f"outcomes-{datetime.now():%Y%m%d}.csv")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, "".join(lines).encode("utf-8"))
+        finally:
+            os.close(fd)
+        return len(lines)
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)))
+
+    def iter_chunks(self, chunk_size: int = 100000) -> Iterator[Any]:
+        """세그먼트 순서대로 chunk_size 행씩 읽기 (pandas DataFrame, 형식이 깨진 행은 건너뜀)"""
+        import pandas as pd
+
+        dtypes = {column: "float64" for column in self.feature_columns}
+        dtypes.update({"recorded_at": "float64", "user_id": "str", "label": "int64"})
+        for path in self.segments():
+            reader = pd.read_csv(
+                path,
+                header=None,
+                names=self.columns,
+                dtype=dtypes,
+                chunksize=chunk_size,
+                on_bad_lines="skip"
+            )
+            for chunk in reader:
+                yield chunk
+
+    def get_stats(self) -> Dict[str, Any]:
+        segments = self.segments()
+        return {
+            "directory": self.directory,
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(path) for path in segments)
+        }
+
+
+class OutcomeRecorder:
+    """최근 분석한 사용자별 모델 입력을 보관했다가, 나중에 들어온 레이블과 묶어 데이터셋에 추가
+
+    사용자별 마지막 특성만 보관하며 최대 max_users명을 넘으면 오래된 사용자부터 제거한다.
+    """
+
+    def __init__(self, dataset: OutcomeDataset, max_users: int = 100000):
+        self.dataset = dataset
+        self.max_users = max_users
+        self._recent: "OrderedDict[str, Tuple[float, tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_recorded = 0
+        self.total_rejected = 0
+
+    def remember(self, user_id: str, features: Dict[str, float]):
+        values = tuple(features[column] for column in self.dataset.feature_columns)
+        with self._lock:
+            self._recent[user_id] = (time.time(), values)
+            self._recent.move_to_end(user_id)
+            if len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+
+    def users(self) -> List[str]:
+        with self._lock:
+            return list(self._recent)
+
+    def export_user(self, user_id: str) -> Optional[List[Any]]:
+        """[기록 시각, 모델 입력 값 목록] (다른 샤드로 이관할 때 사용)"""
+        with self._lock:
+            recent = self._recent.get(user_id)
+        return [recent[0], list(recent[1])] if recent is not None else None
+
+    def import_user(self, user_id: str, remembered_at: float, values: Sequence[float]):
+        """이관받은 최근 모델 입력 반영 (이 샤드에 더 최근 기록이 있으면 무시)"""
+        with self._lock:
+            recent = self._recent.get(user_id)
+            if recent is not None and recent[0] >= remembered_at:
+                return
+            self._recent[user_id] = (remembered_at, tuple(values))
+            self._recent.move_to_end(user_id)
+            if len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._recent.pop(user_id, None)
+
+    def record(self, outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """레이블 목록을 데이터셋에 추가: 특성이 없으면 해당 사용자의 최근 분석 특성 사용
+
+        outcome: {"user_id", "label": 0-2 또는 safe/caution/danger, "features": {특성: 값} (선택)}
+        """
+        rows = []
+        rejected = []
+        now = time.time()
+        for index, outcome in enumerate(outcomes):
+            user_id = outcome.get("user_id")
+            label = outcome.get("label")
+            label = OUTCOME_LABELS.get(label, label)
+            if not isinstance(user_id, str) or isinstance(label, bool) or label not in (0, 1, 2):
+                rejected.append({"index": index, "reason": "user_id와 label(0-2 또는 safe/caution/danger)이 필요합니다"})
+                continue
+
+            features = outcome.get("features")
+            if features is not None:
+                try:
+                    values = tuple(float(features[column]) for column in self.dataset.feature_columns)
+                except (KeyError, TypeError, ValueError):
+                    rejected.append({"index": index, "reason": f"features에 {self.dataset.feature_columns}가 필요합니다"})
+                    continue
+            else:
+                with self._lock:
+                    recent = self._recent.get(user_id)
+                if recent is None:
+                    rejected.append({"index": index, "reason": "이 워커에서 최근 분석한 기록이 없습니다 (features 필요)"})
+                    continue
+                values = recent[1]
+            # 무한대 값이 한 행이라도 기록되면 이후 재학습이 모두 실패하므로 받지 않음 (데이터셋은 추가 전용)
+            if not all(math.isfinite(value) for value in values):
+                rejected.append({"index": index, "reason": "features 값은 유한한 숫자여야 합니다"})
+                continue
+            rows.append((now, user_id, values, label))
+
+        self.dataset.append(rows)
+        self.total_recorded += len(rows)
+        self.total_rejected += len(rejected)
+        return {"recorded": len(rows), "rejected": rejected}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "recent_users": len(self._recent),
+            "recorded": self.total_recorded,
+            "rejected": self.total_rejected,
+            **self.dataset.get_stats()
+        }
@@ -0,0 +1 @@
+# 공용 유틸리티 패키지
\ No newline at end of file
@@ -0,0 +1,212 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# LogRecord 기본 속성과 uvicorn 색상 메시지 (이외의 속성은 extra로 전달된 구조화 필드로 출력)
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "color_message"}
+
+# uvicorn 접근 로그의 args: (client_addr, method, full_path, http_version, status_code)
+ACCESS_LOGGER = "uvicorn.access"
+
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 하나의 JSON 객체로 기록 (extra로 넘긴 필드는 최상위 키로 출력)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "msg": record.getMessage()
+        }
+        entry.update(_record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """기존 텍스트 형식 뒤에 구조화 필드를 key=value로 덧붙임 (개발용)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _record_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class RouteRateLimiter:
+    """route별 로그를 초당 rate건으로 제한하는 토큰 버킷
+
+    allow()는 기록해도 되면 그동안 버린 건수(0 이상)를, 버려야 하면 None을 반환한다.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.rate = rate_per_second
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, route: str) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(route)
+            if bucket is None:
+                # [남은 토큰, 마지막 갱신 시각, 버린 건수]
+                bucket = self._buckets[route] = [self.rate, now, 0]
+            tokens = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return None
+            bucket[0] = tokens - 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        return suppressed
+
+
+class AccessLogRateLimitFilter(logging.Filter):
+    """uvicorn 접근 로그를 요청 경로별로 속도 제한 (버린 건수는 다음 로그의 suppressed 필드)"""
+
+    def __init__(self, limiter: RouteRateLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.name != ACCESS_LOGGER or record.levelno >= logging.WARNING:
+            return True
+        if not isinstance(record.args, tuple) or len(record.args) < 3:
+            return True
+        suppressed = self.limiter.allow(str(record.args[2]).split("?", 1)[0])
+        if suppressed is None:
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """로그 레코드를 큐에 넣기만 하고, 포맷과 출력은 백그라운드 스레드에서 처리
+
+    기본 QueueHandler와 달리 호출한 스레드에서 메시지를 포맷하지 않는다 (인자는 변경되지
+    않는 값이어야 함). 큐가 가득 차면 기다리지 않고 버리며, 버린 건수는 다음으로 들어가는
+    레코드의 dropped 필드로 남긴다.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.dropped = 0
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[AsyncQueueHandler] = None
+_route_limiter: Optional[RouteRateLimiter] = None
+
+
+def log_route(logger: logging.Logger, route: str, msg: str, level: int = logging.INFO, **fields):
+    """요청별 로그를 route별 속도 제한을 거쳐 구조화 필드와 함께 기록
+
+    제한 여부를 LogRecord를 만들기 전에 판단하므로, 버려지는 로그는 호출 비용이 거의 없다.
+    WARNING 이상은 제한하지 않는다.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if _route_limiter is not None and level < logging.WARNING:
+        suppressed = _route_limiter.allow(route)
+        if suppressed is None:
+            return
+        if suppressed:
+            fields["suppressed"] = suppressed
+    fields["route"] = route
+    logger.log(level, msg, extra=fields)
+
+
+def _start_listener(output: logging.Handler, queue_size: int):
+    global _listener
+    _queue_handler.queue = queue.Queue(maxsize=queue_size)
+    _queue_handler.dropped = 0
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    route_rate_per_second: float = 0.0
+):
+    """루트 로거 설정: 구조화(JSON) 출력, 큐 + 백그라운드 기록 스레드, route별 로그 속도 제한
+
+    route_rate_per_second는 log_route()로 기록하는 요청별 로그와 uvicorn 접근 로그에 적용된다.
+    use_queue이면 요청 처리 스레드는 레코드를 큐에 넣기만 하고 포맷/stdout 기록은
+    기록 스레드가 맡는다. fork된 자식 프로세스에서는 기록 스레드를 새로 시작한다
+    (자식에서 os._exit 전에 stop_logging()을 호출해야 남은 로그가 기록됨).
+    """
+    global _queue_handler, _route_limiter
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    output = logging.StreamHandler()
+    output.setFormatter(formatter)
+
+    handler: logging.Handler = output
+    if use_queue:
+        _queue_handler = AsyncQueueHandler(queue.Queue(maxsize=queue_size))
+        _start_listener(output, queue_size)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=lambda: _start_listener(output, queue_size))
+        atexit.register(stop_logging)
+        handler = _queue_handler
+    _route_limiter = None
+    if route_rate_per_second > 0:
+        _route_limiter = RouteRateLimiter(route_rate_per_second)
+        handler.addFilter(AccessLogRateLimitFilter(_route_limiter))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+
+def stop_logging():
+    """큐에 남은 로그를 모두 기록하고 기록 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
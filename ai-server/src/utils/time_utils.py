@@ -0,0 +1,31 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+
+@lru_cache(maxsize=16384)
+def _parse_iso(value: str) -> Optional[float]:
+    # 같은 기기가 같은 시각 문자열을 반복 전송하는 경우가 많아 결과를 캐시
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """ISO 문자열 또는 epoch 초를 epoch 초로 변환 (해석할 수 없으면 None)
+
+    시간대가 없는 ISO 문자열은 서버 로컬 시간으로 해석한다.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _parse_iso(str(value))
+
+
+def resolve_timestamp(epoch: Optional[float], iso: Optional[str]) -> Optional[float]:
+    """epoch 값이 있으면 그대로 사용하고, 없으면 ISO 문자열을 해석"""
+    if epoch is not None:
+        return float(epoch)
+    return parse_timestamp(iso)
@@ -0,0 +1,73 @@
+"""
+전체 사용자 일괄 위험도 분석 도구
+
+사용자별 원격 측정 데이터(CSV/Parquet/Arrow)를 청크 단위로 읽어 특성 계산, 규칙/모델
+채점을 열 단위 연산으로 처리하고, 위험도가 임계값 이상인 사용자만 스트리밍으로 출력합니다.
+연락이 끊긴 사용자를 찾기 위한 주기 실행(cron 등)을 위한 도구입니다.
+
+입력 열: user_id (필수), screen_time, app_open_count, last_activity, last_checkin, location_changes
+(last_activity / last_checkin은 epoch 초 또는 ISO 8601 문자열)
+출력의 risk_factor_mask는 src/services/rule_engine.py의 RISK_FACTOR_RULES 순서대로 비트를 켠 값입니다.
+
+사용 예:
+    python sweep.py users.parquet --output flagged.ndjson
+    python sweep.py users.csv --threshold 8 --format csv --rules-only
+"""
+import argparse
+import logging
+import sys
+
+from src.config import settings
+from src.services.population_sweep import SWEEP_OUTPUT_COLUMNS, PopulationSweep
+from src.services.safety_analyzer import SafetyAnalyzer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger("sweep")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="전체 사용자 일괄 위험도 분석")
+    parser.add_argument("input", help="사용자 데이터 파일 (.csv, .parquet, .arrow)")
+    parser.add_argument("--output", default="-", help="결과 파일 (기본값: 표준 출력)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="출력 형식")
+    parser.add_argument("--threshold", type=float, default=settings.SWEEP_RISK_THRESHOLD, help="출력할 최소 위험도 (0-10)")
+    parser.add_argument("--chunk-size", type=int, default=settings.SWEEP_CHUNK_SIZE, help="한 번에 처리할 행 수")
+    parser.add_argument("--rules-only", action="store_true", help="모델 없이 규칙 기반으로만 채점")
+    args = parser.parse_args()
+
+    bundle = None
+    if not args.rules_only:
+        analyzer = SafetyAnalyzer()
+        analyzer.load_model()
+        bundle = analyzer.active_model
+        analyzer.inference_executor.shutdown()
+    logger.info(f"🔎 일괄 분석 시작: {args.input} (모델 {bundle.version if bundle else '규칙 기반'})")
+
+    sweep = PopulationSweep(bundle, chunk_size=args.chunk_size, risk_threshold=args.threshold)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        header = True
+        for flagged in sweep.run(args.input):
+            flagged = flagged[SWEEP_OUTPUT_COLUMNS]
+            if args.format == "csv":
+                flagged.to_csv(output, header=header, index=False)
+                header = False
+            else:
+                output.write(flagged.to_json(orient="records", lines=True, force_ascii=False))
+            output.flush()
+    except (OSError, ValueError, ImportError) as e:
+        logger.error(f"❌ 일괄 분석 실패: {str(e)}")
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import zlib
+
+import numpy as np
+
+from src.services.baseline_storage import MmapRecordStorage
+from src.services.pattern_store import PATTERN_RECORD_DTYPE, UserPatternStore
+
+
+def _sequential_place(keys, capacity):
+    """재구성 이전 방식: 키마다 선형 탐사로 빈 슬롯 찾기"""
+    mask = capacity - 1
+    used = np.zeros(capacity, dtype=bool)
+    positions = []
+    for key in keys.tolist():
+        index = zlib.crc32(key) & mask
+        while used[index]:
+            index = (index + 1) & mask
+        used[index] = True
+        positions.append(index)
+    return positions
+
+
+def test_place_matches_sequential_linear_probing():
+    rng = np.random.default_rng(0)
+    for capacity, count in ((16, 11), (64, 44), (1024, 716)):
+        keys = np.array([f"user-{value}".encode() for value in rng.integers(0, 10 ** 9, count)], dtype="S48")
+        positions = MmapRecordStorage._place(keys, capacity)
+        assert len(set(positions.tolist())) == count
+        # 순서는 달라도 같은 슬롯 집합이어야 하고, 모든 키가 시작 슬롯에서 빈칸 없이 도달 가능해야 함
+        assert sorted(positions.tolist()) == sorted(_sequential_place(keys, capacity))
+        occupied = np.zeros(capacity, dtype=bool)
+        occupied[positions] = True
+        for key, position in zip(keys.tolist(), positions.tolist()):
+            index = zlib.crc32(key) & (capacity - 1)
+            while index != position:
+                assert occupied[index]
+                index = (index + 1) & (capacity - 1)
+
+
+def test_growth_and_compaction_keep_records(tmp_path):
+    storage = MmapRecordStorage(str(tmp_path / "baselines.bin"), PATTERN_RECORD_DTYPE, initial_capacity=16)
+    store = UserPatternStore(storage)
+    for i in range(3000):
+        store.update(f"user-{i}", screen_time=float(i), checkin_time=1000.0 + i)
+    for i in range(0, 3000, 3):
+        storage.delete(f"user-{i}")
+    storage.maintenance()
+
+    reopened = UserPatternStore(MmapRecordStorage(str(tmp_path / "baselines.bin"), PATTERN_RECORD_DTYPE))
+    assert len(reopened) == 2000
+    for i in range(3000):
+        baseline = reopened.get_baseline(f"user-{i}")
+        if i % 3 == 0:
+            assert baseline is None
+        else:
+            assert baseline["screen"]["mean"] == np.float32(i)
+            assert reopened.last_checkin(f"user-{i}") == 1000.0 + i
+
+
+def test_small_existing_file_is_presized_on_open(tmp_path):
+    path = str(tmp_path / "baselines.bin")
+    UserPatternStore(MmapRecordStorage(path, PATTERN_RECORD_DTYPE, initial_capacity=16)).update("a", screen_time=1.0)
+    storage = MmapRecordStorage(path, PATTERN_RECORD_DTYPE, initial_capacity=4096)
+    assert storage.capacity == 4096
+    assert UserPatternStore(storage).get_baseline("a")["screen"]["mean"] == 1.0
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.services.forest_compiler import CompiledForest, verify_parity
+from src.services.model_training import generate_sample_data
+
+
+@pytest.fixture(scope="module")
+def sample():
+    X, y = generate_sample_data(n_samples=600, seed=7)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def scaled_forest(sample):
+    X, y = sample
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+@pytest.fixture(scope="module")
+def unscaled_forest(sample):
+    # 스케일링이 없는 경우 트리 입력(float32)을 그대로 넣을 수 있어 임계값 경계를 정확히 검사할 수 있음
+    X, y = sample
+    scaler = StandardScaler(with_mean=False, with_std=False).fit(X)
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=1).fit(X, y)
+    return model, scaler
+
+
+def _assert_same(compiled, model, scaler, X):
+    predictions, probabilities = compiled.predict_proba(X)
+    expected_proba = model.predict_proba(scaler.transform(X))
+    np.testing.assert_array_equal(probabilities, expected_proba)
+    np.testing.assert_array_equal(predictions, model.classes_.take(np.argmax(expected_proba, axis=1)))
+
+
+def _split_nodes(model):
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        yield tree.feature[internal], tree.threshold[internal]
+
+
+def test_random_rows_match_sklearn(scaled_forest):
+    model, scaler = scaled_forest
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.normal(180, 80, 2000),
+        rng.poisson(20, 2000),
+        rng.exponential(12, 2000),
+        rng.poisson(5, 2000)
+    ]).astype(np.float64)
+    _assert_same(compiled, model, scaler, X)
+    # 블록 경계(ROW_BLOCK_SIZE)와 단건 입력
+    _assert_same(compiled, model, scaler, X[:1])
+    _assert_same(compiled, model, scaler, X[:257])
+
+
+def test_thresholds_and_neighbours_match_sklearn(unscaled_forest, sample):
+    model, scaler = unscaled_forest
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    base = np.median(sample[0], axis=0)
+
+    rows = []
+    for features, thresholds in _split_nodes(model):
+        # 트리 입력은 float32이므로 float32 임계값과 그 양옆의 인접 값을 검사
+        at = thresholds.astype(np.float32)
+        for values in (at, np.nextafter(at, np.float32(-np.inf)), np.nextafter(at, np.float32(np.inf))):
+            block = np.repeat(base[np.newaxis, :], len(values), axis=0)
+            block[np.arange(len(values)), features] = values
+            rows.append(block)
+    X = np.vstack(rows)
+    assert len(X) >= 3 * sum(len(thresholds) for _, thresholds in _split_nodes(model))
+    _assert_same(compiled, model, scaler, X)
+
+
+def test_verify_parity_with_scaler(scaled_forest, sample):
+    model, scaler = scaled_forest
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    assert verify_parity(compiled, model, scaler, sample[0][:200])
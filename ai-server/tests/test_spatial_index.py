@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.services.location_tracker import haversine_meters
+from src.services.spatial_index import SpatialIndex
+
+
+def _populate(index, rng, n, lat_range, lon_range=(-180.0, 180.0)):
+    lat = rng.uniform(*lat_range, n)
+    lon = rng.uniform(*lon_range, n)
+    accuracy = rng.uniform(0, 200, n)
+    ts = rng.uniform(0, 1000, n)
+    for i in range(n):
+        index.update(f"u{i}", float(lat[i]), float(lon[i]), float(accuracy[i]), float(ts[i]))
+    return lat, lon, accuracy, ts
+
+
+def _brute_force(points, latitude, longitude, radius, k=None, max_accuracy=None, min_timestamp=None):
+    lat, lon, accuracy, ts = points
+    distance = haversine_meters(latitude, longitude, lat, lon)
+    keep = distance <= radius
+    if max_accuracy is not None:
+        keep &= accuracy <= max_accuracy
+    if min_timestamp is not None:
+        keep &= ts >= min_timestamp
+    order = [i for i in np.argsort(distance, kind="stable") if keep[i]]
+    return [(f"u{i}", round(float(distance[i]), 1)) for i in order[:k]]
+
+
+def _query(index, latitude, longitude, radius, **kwargs):
+    result = index.query(latitude, longitude, radius, **kwargs)
+    return [(neighbor["user_id"], neighbor["distance_m"]) for neighbor in result["neighbors"]]
+
+
+def _assert_same(actual, expected, k=None):
+    # 같은 거리의 이웃은 순서가 다를 수 있으므로 거리 목록과 (k로 잘리지 않은 경우) 사용자 집합을 비교
+    assert [d for _, d in actual] == [d for _, d in expected]
+    if k is None or len(expected) < k:
+        assert set(actual) == set(expected)
+
+
+def test_matches_brute_force_mid_latitude():
+    rng = np.random.default_rng(0)
+    index = SpatialIndex(cell_meters=500.0)
+    points = _populate(index, rng, 5000, (37.4, 37.7), (126.8, 127.2))
+    for _ in range(50):
+        latitude, longitude = rng.uniform(37.4, 37.7), rng.uniform(126.8, 127.2)
+        radius = float(rng.uniform(100, 5000))
+        k = int(rng.integers(1, 50))
+        _assert_same(_query(index, latitude, longitude, radius), _brute_force(points, latitude, longitude, radius))
+        _assert_same(
+            _query(index, latitude, longitude, radius, k=k, max_accuracy=100.0, min_timestamp=300.0),
+            _brute_force(points, latitude, longitude, radius, k, 100.0, 300.0),
+            k
+        )
+
+
+@pytest.mark.parametrize("latitude", [80.0, 88.5, 89.0, 89.97, 90.0, -89.5, -90.0])
+def test_high_latitude_matches_brute_force_and_is_bounded(latitude):
+    rng = np.random.default_rng(1)
+    index = SpatialIndex(cell_meters=500.0)
+    # 극을 가로지르는 이웃도 포함되도록 극 주변 전체 경도에 분포
+    band = (max(latitude - 0.2, -90.0), min(latitude + 0.2, 90.0))
+    points = _populate(index, rng, 3000, band)
+    for longitude in (-179.99, 0.0, 179.99):
+        for radius in (500.0, 5000.0):
+            start = time.perf_counter()
+            actual = _query(index, latitude, longitude, radius)
+            assert time.perf_counter() - start < 1.0
+            _assert_same(actual, _brute_force(points, latitude, longitude, radius))
+            _assert_same(_query(index, latitude, longitude, radius, k=5), _brute_force(points, latitude, longitude, radius, 5), 5)
+
+
+def test_out_of_range_latitude_does_not_hang():
+    index = SpatialIndex(cell_meters=500.0)
+    index.update("u0", 89.999, 0.0, 10.0, 1.0)
+    start = time.perf_counter()
+    result = index.query(95.0, 0.0, 5000.0, k=20)
+    assert time.perf_counter() - start < 1.0
+    assert result["row_scan"]